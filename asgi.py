@@ -0,0 +1,21 @@
+# asgi.py
+import os
+from mastermind import begin_era, logger
+from mastermind.backend.asgi import AskASGIApp
+
+# ASGI entry point: /api/ask runs on the event loop, everything else goes to Flask
+app = AskASGIApp(begin_era(warm=True))
+
+def main():
+    import uvicorn
+
+    logger.info("🚀 Jack is writing asynchronously...")
+    uvicorn.run(
+        app,
+        host=os.getenv('HOST', '0.0.0.0'),
+        port=int(os.getenv('APP_PORT', 5024)),
+        lifespan='on'
+    )
+
+if __name__ == "__main__":
+    main()
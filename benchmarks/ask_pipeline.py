@@ -0,0 +1,339 @@
+# benchmarks/ask_pipeline.py
+"""Benchmark the ask pipeline against a local mock LLM and write a JSON report.
+
+Measures `load_data`, `prepare_full_prompt`, `process_response` (for every
+mock response shape) and end-to-end `/api/ask` throughput and p50/p95/p99
+latency at several concurrency levels. By default the app is served in-process
+by a threaded Werkzeug server; pass `--base-url` to drive a server you started
+yourself (pointed at `python -m benchmarks.mock_llm`). Needs the Postgres
+database from `.env`.
+
+    python -m benchmarks.ask_pipeline --concurrency 1 4 16 --requests 200 --output report.json
+    python -m benchmarks.ask_pipeline --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import secrets
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import requests
+from benchmarks.mock_llm import MockLLMServer, SHAPES, USAGE
+
+QUESTIONS = [
+    "What is your position on affordable housing?",
+    "How would you improve public transit in Northern Virginia?",
+    "What will you do about climate change?",
+    "Where do you stand on healthcare costs?",
+    "How do you plan to support small businesses?",
+]
+
+BENCHMARK_USER = "benchmark@example.com"
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(seconds):
+    """Latency summary in milliseconds."""
+    values = sorted(value * 1000 for value in seconds)
+    return {
+        "n": len(values),
+        "mean_ms": round(statistics.mean(values), 3),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3),
+    }
+
+
+def time_calls(fn, repeat):
+    timings = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - started)
+    return summarize(timings)
+
+
+def fake_response(status, body):
+    response = requests.models.Response()
+    response.status_code = status
+    response._content = body
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+
+def bench_components(repeat):
+    """Time the CPU-side pieces of an ask in isolation."""
+    from mastermind.data_manager.load import load_data, CorpusLoader
+    from mastermind.ai_model import prepare_full_prompt, process_response
+    import mastermind.backend as backend
+
+    results = {"load_data": time_calls(lambda i: load_data(), max(1, repeat // 10))}
+    loader = CorpusLoader('data')
+    loader.load()
+    # What each worker's periodic check costs when nothing changed on disk
+    results["reload_unchanged"] = time_calls(lambda i: loader.load(), max(1, repeat // 10))
+
+    data, config = backend.get_data(), backend.get_config()
+    results["prepare_full_prompt"] = time_calls(
+        lambda i: prepare_full_prompt(data, config, QUESTIONS[i % len(QUESTIONS)]), repeat
+    )
+
+    bodies = {
+        shape: fake_response(200, json.dumps({"result": {"response": render()}, "success": True, "usage": USAGE}).encode())
+        for shape, render in SHAPES.items()
+    }
+    bodies["http_503"] = fake_response(503, b'{"success": false}')
+    results["process_response"] = {
+        shape: time_calls(lambda i: process_response(response), repeat)
+        for shape, response in bodies.items()
+    }
+    return results
+
+
+def provision_user(app):
+    """Create (or reset) a dedicated benchmark user and return its credentials."""
+    from mastermind.models import db, User, UserType, UserTypeEnum
+
+    password = "Bench-" + secrets.token_urlsafe(24) + "!1a"
+    with app.app_context():
+        user = User.query.filter_by(email=BENCHMARK_USER).first()
+        if not user:
+            user = User(email=BENCHMARK_USER, user_type=UserType.query.filter_by(name=UserTypeEnum.USER).first())
+            db.session.add(user)
+        user.is_active = True
+        user.set_password(password)
+        db.session.commit()
+    return BENCHMARK_USER, password
+
+
+def delete_benchmark_rows(app, email):
+    from sqlalchemy import text
+    from mastermind.models import db
+
+    with app.app_context():
+        db.session.execute(text(
+            "DELETE FROM logs.responses WHERE id IN ("
+            " SELECT q.response_id FROM logs.queries q JOIN entities.users u ON u.user_id = q.user_id"
+            " WHERE u.email = :email)"
+        ), {"email": email})
+        db.session.commit()
+
+
+def login(base_url, email, password):
+    """Log in once and return the session cookies and CSRF token for /api/ask."""
+    session = requests.Session()
+    page = session.get(f"{base_url}/auth/login")
+    token = re.search(r'name="csrf_token" value="([^"]+)"', page.text)
+    form = {"email": email, "password": password}
+    if token:
+        form["csrf_token"] = token.group(1)
+    session.post(f"{base_url}/auth/login", data=form)
+    chat = session.get(f"{base_url}/chat", allow_redirects=False)
+    if chat.status_code != 200:
+        raise SystemExit(f"Login failed for {email} (GET /chat returned {chat.status_code})")
+    token = re.search(r'name="csrf_token" value="([^"]+)"', chat.text)
+    return session.cookies, token.group(1) if token else None
+
+
+def bench_ask(base_url, email, cookies, csrf_token, concurrency, total, response_type, stream):
+    """Fire `total` asks with `concurrency` clients and summarize latency and throughput."""
+    local = threading.local()
+    headers = {"User-ID": email}
+    if csrf_token:
+        headers["X-CSRFToken"] = csrf_token
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            local.session.cookies.update(cookies)
+        return local.session
+
+    run_id = secrets.token_hex(4)
+
+    def ask(i):
+        # A unique suffix keeps the answer cache from serving repeats
+        question = f"{QUESTIONS[i % len(QUESTIONS)]} ({run_id}-{i})"
+        started = time.perf_counter()
+        try:
+            response = session().post(
+                f"{base_url}/api/ask",
+                json={"question": question, "response_type": response_type, "stream": stream},
+                headers=headers,
+                timeout=120
+            )
+            response.content  # Read the whole body, streamed or not
+            status = response.status_code
+        except requests.RequestException:
+            status = "exception"
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(ask, range(total)))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for _, status in outcomes:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "stream": stream,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2),
+        "errors": total - statuses.get("200", 0),
+        "statuses": statuses,
+        "latency": summarize([seconds for seconds, _ in outcomes]),
+    }
+
+
+def serve_in_process(app):
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path, after_path):
+    """Print p50/p95/p99 and throughput changes between two reports."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    rows = []
+    for name in ("load_data", "reload_unchanged", "prepare_full_prompt"):
+        if name in before["components"] and name in after["components"]:
+            rows.append((name, before["components"][name], after["components"][name]))
+    for shape, stats in after["components"]["process_response"].items():
+        if shape in before["components"]["process_response"]:
+            rows.append((f"process_response[{shape}]", before["components"]["process_response"][shape], stats))
+    before_asks = {run["concurrency"]: run for run in before.get("ask", [])}
+    for run in after.get("ask", []):
+        if run["concurrency"] in before_asks:
+            rows.append((f"ask[c={run['concurrency']}]", before_asks[run["concurrency"]]["latency"], run["latency"]))
+
+    print(f"{'metric':32} {'p50 before':>11} {'p50 after':>10} {'p95 before':>11} {'p95 after':>10}")
+    for name, old, new in rows:
+        print(f"{name:32} {old['p50_ms']:>11.2f} {new['p50_ms']:>10.2f} {old['p95_ms']:>11.2f} {new['p95_ms']:>10.2f}")
+    for run in after.get("ask", []):
+        old = before_asks.get(run["concurrency"])
+        if old:
+            print(f"throughput c={run['concurrency']}: {old['throughput_rps']} -> {run['throughput_rps']} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Concurrent clients per run")
+    parser.add_argument("--requests", type=int, default=100, help="Asks per concurrency level")
+    parser.add_argument("--repeat", type=int, default=200, help="Iterations for component timings")
+    parser.add_argument("--latency", type=float, default=0.3, help="Mock LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Mock LLM latency jitter in seconds")
+    parser.add_argument("--shapes", nargs="+", default=["json"], choices=sorted(SHAPES), help="Mock response shapes to cycle")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of mock responses that fail with a 503")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Mock seconds per output token")
+    parser.add_argument("--output-tokens", type=int, default=60, help="Mock output tokens when max_tokens does not cap them")
+    parser.add_argument("--response-type", default="Concise", help="Response type to ask for")
+    parser.add_argument("--stream", action="store_true", help="Use streamed asks")
+    parser.add_argument("--base-url", help="Benchmark an already running server instead of an in-process one")
+    parser.add_argument("--user", help="Login email (defaults to a provisioned benchmark user)")
+    parser.add_argument("--password", help="Login password for --user")
+    parser.add_argument("--skip-ask", action="store_true", help="Only run the component benchmarks")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    mock = None
+    if not args.base_url:
+        mock = MockLLMServer(
+            latency=args.latency, jitter=args.jitter, shapes=args.shapes, error_rate=args.error_rate,
+            token_latency=args.token_latency, output_tokens=args.output_tokens
+        ).start()
+        # Must be set before mastermind.ai_model is imported
+        os.environ["CLOUDFLARE_API_BASE"] = mock.base_url
+
+    import mastermind.backend as backend
+
+    # Every ask must reach the upstream, or the numbers only measure the cache
+    backend.get_config()
+    backend.response_cache.configure({"enabled": False})
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("password", "compare", "output")},
+        "components": bench_components(args.repeat),
+        "ask": [],
+    }
+
+    if not args.skip_ask:
+        app = server = None
+        if args.base_url:
+            base_url = args.base_url.rstrip("/")
+            if not (args.user and args.password):
+                raise SystemExit("--user and --password are required with --base-url")
+            email, password = args.user, args.password
+        else:
+            from mastermind import begin_era
+
+            app = begin_era()
+            server, base_url = serve_in_process(app)
+            email, password = (args.user, args.password) if args.user else provision_user(app)
+
+        cookies, csrf_token = login(base_url, email, password)
+        for concurrency in args.concurrency:
+            run = bench_ask(base_url, email, cookies, csrf_token, concurrency, args.requests, args.response_type, args.stream)
+            report["ask"].append(run)
+            print(
+                f"c={concurrency}: {run['throughput_rps']} req/s, p50 {run['latency']['p50_ms']} ms, "
+                f"p95 {run['latency']['p95_ms']} ms, p99 {run['latency']['p99_ms']} ms, errors {run['errors']}",
+                file=sys.stderr
+            )
+
+        if server is not None:
+            server.shutdown()
+            if email == BENCHMARK_USER:
+                delete_benchmark_rows(app, email)
+
+    if mock is not None:
+        mock.stop()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/async_concurrency.py
+"""Compare how many LLM calls one process can hold open: threads vs asyncio.
+
+Runs `generate_response` from a fixed pool of worker threads (the sync Flask
+model, one request per worker) and `generate_response_async` from a single
+event loop, both against the local mock LLM, and prints a JSON report.
+
+    python -m benchmarks.async_concurrency --requests 200 --workers 8 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.mock_llm import MockLLMServer
+
+
+def run_sync(generate_response, data, config, total, workers):
+    questions = [f"What is your position on housing? ({i})" for i in range(total)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda question: generate_response(question, data, config), questions))
+    return time.perf_counter() - started, results
+
+
+async def run_async(generate_response_async, data, config, total):
+    questions = [f"What is your position on housing? ({i})" for i in range(total)]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(generate_response_async(question, data, config) for question in questions))
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Questions to send per mode")
+    parser.add_argument("--workers", type=int, default=8, help="Worker threads for the sync mode")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock LLM latency in seconds")
+    args = parser.parse_args()
+
+    with MockLLMServer(latency=args.latency) as server:
+        os.environ["CLOUDFLARE_API_BASE"] = server.base_url
+
+        # Imported after the mock is up so the API base URL points at it
+        from mastermind.ai_model import generate_response, generate_response_async
+        from mastermind.backend import load_config
+        from mastermind.data_manager import load_data
+
+        data = load_data()
+        config = load_config()
+        config['ai'].setdefault('http', {})['async_max_connections'] = max(args.requests, 100)
+
+        report = {"requests": args.requests, "latency_s": args.latency}
+
+        server.reset()
+        elapsed, results = run_sync(generate_response, data, config, args.requests, args.workers)
+        report["sync"] = {
+            "workers": args.workers,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(args.requests / elapsed, 2),
+            "peak_concurrent_upstream": server.peak_active,
+            "errors": sum(1 for result in results if result["answer"].startswith(("Error", "Exception"))),
+        }
+
+        server.reset()
+        elapsed, results = asyncio.run(run_async(generate_response_async, data, config, args.requests))
+        report["async"] = {
+            "workers": 1,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(args.requests / elapsed, 2),
+            "peak_concurrent_upstream": server.peak_active,
+            "errors": sum(1 for result in results if result["answer"].startswith(("Error", "Exception"))),
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# benchmarks/db_persistence.py
+"""Measure database time per ask: three commits vs one unit of work.
+
+Writes the same question/answer pairs with the previous per-row persistence
+(commit after the response type, the response and the query) and with
+`save_question_and_answer`, counting SQL statements and commits, and prints a
+JSON report. Needs the Postgres database from `.env`; rows are written under
+the given user and deleted afterwards.
+
+    python -m benchmarks.db_persistence --asks 200 --user you@example.com
+"""
+import argparse
+import json
+import statistics
+import time
+from sqlalchemy import event
+
+
+def save_three_commits(user_question, response_text, response_type, response_option, user_id, config):
+    """The persistence `ask_question` used before it became one transaction."""
+    from mastermind.models import ResponseType, Response, Query, db
+
+    response_type_record = ResponseType.query.filter_by(name=response_type).first()
+    if not response_type_record and response_option:
+        response_type_record = ResponseType(name=response_option['name'], prompt=response_option['prompt'], about=response_option['about'])
+        db.session.add(response_type_record)
+        db.session.commit()
+
+    response_record = Response(response_text=response_text)
+    db.session.add(response_record)
+    db.session.commit()
+
+    query = Query(
+        query_text=user_question,
+        response_id=response_record.id,
+        response_type_id=response_type_record.id if response_type_record else None,
+        user_id=user_id,
+        showcase=False,
+        ip_address='127.0.0.1',
+        settings_selected=json.dumps(config['ai']['settings'])
+    )
+    db.session.add(query)
+    db.session.commit()
+    return query
+
+
+class StatementCounter:
+    """Counts SQL statements and commits issued through an engine."""
+
+    def __init__(self, engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self.on_execute)
+        event.listen(engine, "commit", self.on_commit)
+
+    def on_execute(self, *args):
+        self.statements += 1
+
+    def on_commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+
+def summarize(timings, counter, asks):
+    timings = sorted(timings)
+    return {
+        "asks": asks,
+        "total_ms": round(sum(timings), 2),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "statements_per_ask": round(counter.statements / asks, 2),
+        "commits_per_ask": round(counter.commits / asks, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--asks", type=int, default=200, help="Question/answer pairs per mode")
+    parser.add_argument("--user", required=True, help="Email of an existing user to log the rows under")
+    args = parser.parse_args()
+
+    from mastermind import begin_era
+    import mastermind.backend as backend
+    from mastermind.models import User, Query, Response, db
+
+    app = begin_era()
+    with app.app_context():
+        user = User.query.filter_by(email=args.user).first()
+        if not user:
+            raise SystemExit(f"User not found for email: {args.user}")
+
+        config = backend.get_config()
+        option = config['options']['response'][0]
+        answer = "I have fought for affordable housing across Northern Virginia. " * 8
+        counter = StatementCounter(db.engine)
+        report = {}
+        written = []
+
+        def run(name, save):
+            counter.reset()
+            timings = []
+            queries = []
+            for i in range(args.asks):
+                started = time.perf_counter()
+                queries.append(save(f"Benchmark question {name} {i}?"))
+                timings.append((time.perf_counter() - started) * 1000)
+            report[name] = summarize(timings, counter, args.asks)
+            # Read ids after summarising: expired attributes reload with a SELECT each
+            written.extend(query.response_id for query in queries)
+
+        run("three_commits", lambda question: save_three_commits(
+            question, answer, option['name'], option, user.user_id, config
+        ))
+        run("single_transaction", lambda question: backend.save_question_and_answer(
+            question, answer, option['name'], option, user.user_id, False, '127.0.0.1', config
+        ))
+
+        records = [{
+            'user_question': f"Benchmark question batch {i}?",
+            'answer': answer,
+            'response_type': option['name'],
+            'response_option': option,
+            'user_id': user.user_id,
+            'showcase': False,
+            'ip_address': '127.0.0.1',
+        } for i in range(args.asks)]
+        counter.reset()
+        started = time.perf_counter()
+        queries = backend.save_questions_and_answers(records, config)
+        elapsed = (time.perf_counter() - started) * 1000
+        report["bulk_batch"] = {
+            "asks": args.asks,
+            "total_ms": round(elapsed, 2),
+            "mean_ms": round(elapsed / args.asks, 3),
+            "statements_per_ask": round(counter.statements / args.asks, 2),
+            "commits_per_ask": round(counter.commits / args.asks, 2),
+        }
+        written.extend(query.response_id for query in queries)
+
+        # Clean up the benchmark rows
+        Query.query.filter(Query.response_id.in_(written)).delete(synchronize_session=False)
+        db.session.query(Response).filter(Response.id.in_(written)).delete(synchronize_session=False)
+        db.session.commit()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
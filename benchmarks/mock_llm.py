@@ -0,0 +1,227 @@
+# benchmarks/mock_llm.py
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+
+ANSWER = {
+    "answer": "I’ve fought for affordable housing across Northern Virginia — from Alexandria to Falls Church.",
+    "inference": False,
+    "links": [{"url": "https://friendsofdonbeyer.com/issues/4901-2/", "text": "Housing"}]
+}
+
+USAGE = {"prompt_tokens": 1200, "completion_tokens": 60, "total_tokens": 1260}
+
+# What the model's `response` text looks like for each shape
+SHAPES = {
+    "json": lambda: json.dumps(ANSWER, ensure_ascii=False),
+    "fenced": lambda: "Here is my answer:\n```json\n" + json.dumps(ANSWER, indent=2, ensure_ascii=False) + "\n```",
+    "malformed": lambda: json.dumps(ANSWER, ensure_ascii=False)[:-12],  # Truncated mid-object
+    "prose": lambda: ANSWER["answer"],  # No JSON at all
+}
+
+
+class MockLLMServer:
+    """Local stand-in for the Workers AI endpoint with a configurable delay.
+
+    Runs an asyncio HTTP/1.1 server (keep-alive aware) on a background thread
+    so it can hold hundreds of slow requests open at once, and records the
+    peak number of requests it was serving concurrently. `shapes` cycles the
+    model output between well-formed JSON, fenced JSON, malformed JSON and
+    plain prose; `error_rate` answers that share of requests with
+    `error_status`; requests with `stream: true` get server-sent events.
+    With `token_latency`, each request also takes that long per output token,
+    generating `output_tokens` or the request's `max_tokens` if lower.
+    """
+
+    def __init__(self, latency=0.5, host="127.0.0.1", port=0, jitter=0.0, shapes=("json",), error_rate=0.0,
+                 error_status=503, stream_chunk=8, token_latency=0.0, output_tokens=USAGE["completion_tokens"]):
+        self.latency = latency
+        self.jitter = jitter
+        self.shapes = itertools.cycle(shapes)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stream_chunk = stream_chunk
+        self.token_latency = token_latency
+        self.output_tokens = output_tokens
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/client/v4"
+
+    def response_text(self):
+        """The model output for the next request, cycling through the configured shapes."""
+        return SHAPES[next(self.shapes)]()
+
+    def completion_tokens(self, request_json):
+        return min(self.output_tokens, request_json.get("max_tokens") or self.output_tokens)
+
+    def usage(self, request_json):
+        completion = self.completion_tokens(request_json)
+        return dict(USAGE, completion_tokens=completion, total_tokens=USAGE["prompt_tokens"] + completion)
+
+    def response_body(self, request_json):
+        return json.dumps({
+            "result": {"response": self.response_text()},
+            "success": True,
+            "usage": self.usage(request_json)
+        }, ensure_ascii=False).encode("utf-8")
+
+    def stream_events(self, request_json):
+        """Server-sent events carrying the output in small pieces, like Workers AI with `stream: true`.
+
+        Raw UTF-8, without a charset in the Content-Type, as Workers AI sends it.
+        """
+        text = self.response_text()
+        for i in range(0, len(text), self.stream_chunk):
+            piece = json.dumps({'response': text[i:i + self.stream_chunk]}, ensure_ascii=False)
+            yield f"data: {piece}\n\n".encode("utf-8")
+        yield f"data: {json.dumps({'response': '', 'usage': self.usage(request_json)})}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
+
+    def delay(self, request_json=None):
+        generation = self.token_latency * self.completion_tokens(request_json) if request_json else 0.0
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)) + generation
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value.strip())
+                raw = await reader.readexactly(length) if length else b""
+
+                self.requests += 1
+                self.active += 1
+                self.peak_active = max(self.peak_active, self.active)
+                try:
+                    request_json = json.loads(raw or b"{}")
+                    if self.error_rate and random.random() < self.error_rate:
+                        await asyncio.sleep(self.delay())
+                        await self.write_error(writer)
+                    elif request_json.get("stream"):
+                        await self.write_stream(writer, request_json)
+                    else:
+                        await asyncio.sleep(self.delay(request_json))
+                        body = self.response_body(request_json)
+                        writer.write(
+                            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                            + f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+                            + body
+                        )
+                        await writer.drain()
+                finally:
+                    self.active -= 1
+        except (ConnectionResetError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def write_error(self, writer):
+        body = json.dumps({"success": False, "errors": [{"message": "Upstream overloaded"}]}).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {self.error_status} Error\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+    async def write_stream(self, writer, request_json):
+        """Send the first event after the configured delay, then the rest spread over a tenth of it."""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+        events = list(self.stream_events(request_json))
+        await asyncio.sleep(self.delay())
+        generation = self.latency / 10 + self.token_latency * self.completion_tokens(request_json)
+        gap = generation / max(1, len(events))
+        for event in events:
+            writer.write(f"{len(event):x}\r\n".encode("latin-1") + event + b"\r\n")
+            await writer.drain()
+            await asyncio.sleep(gap)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self.handle, self.host, self.port, backlog=1024)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    def reset(self):
+        self.requests = 0
+        self.peak_active = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock Workers AI endpoint for benchmarks.")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.3, help="Response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- delay in seconds")
+    parser.add_argument("--shapes", nargs="+", default=["json"], choices=sorted(SHAPES))
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Extra seconds per output token")
+    parser.add_argument("--output-tokens", type=int, default=USAGE["completion_tokens"], help="Output tokens when uncapped")
+    args = parser.parse_args()
+
+    server = MockLLMServer(
+        latency=args.latency, port=args.port, jitter=args.jitter, shapes=args.shapes, error_rate=args.error_rate,
+        token_latency=args.token_latency, output_tokens=args.output_tokens
+    ).start()
+    print(f"Mock LLM listening; start the app with CLOUDFLARE_API_BASE={server.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
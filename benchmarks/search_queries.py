@@ -0,0 +1,93 @@
+# benchmarks/search_queries.py
+"""Measure searching the query log: ILIKE scans vs the full-text indexes.
+
+Writes `--queries` question/answer pairs on assorted topics under the given
+user (one in `--rare` mentions the Metro), then times a search for a common
+and for a rare term both ways: `ILIKE '%term%'` over the question and answer
+text, and `search_queries` over the GIN-indexed tsvector columns. The rows are
+deleted afterwards.
+
+    python -m benchmarks.search_queries --queries 200000 --user you@example.com
+"""
+import argparse
+import json
+import time
+
+TOPICS = ["housing", "schools", "taxes", "broadband", "healthcare", "jobs", "parks", "public safety"]
+
+
+def ilike_search(term, per_page):
+    """What a search without the indexes would do: scan every question and answer."""
+    from mastermind.models import db, Query, Response
+    pattern = f"%{term}%"
+    matches = (
+        db.select(Query.id)
+        .outerjoin(Response, Response.id == Query.response_id)
+        .where(db.or_(Query.query_text.ilike(pattern), Response.response_text.ilike(pattern)))
+    )
+    total = db.session.execute(db.select(db.func.count()).select_from(matches.subquery())).scalar()
+    rows = db.session.execute(matches.order_by(Query.created_at.desc()).limit(per_page)).all()
+    return rows, total
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    _, total = fn(*args)
+    return {"ms": round((time.perf_counter() - started) * 1000, 2), "matches": total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200000, help="Question/answer pairs to write")
+    parser.add_argument("--rare", type=int, default=1000, help="One pair in this many mentions the Metro")
+    parser.add_argument("--user", required=True, help="Email of an existing user to write the queries under")
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+    from mastermind import begin_era
+    from mastermind.backend.search import search_queries
+    from mastermind.models import db, User
+
+    app = begin_era()
+    with app.app_context():
+        user = User.query.filter_by(email=args.user).first()
+        if not user:
+            raise SystemExit(f"User not found for email: {args.user}")
+
+        # Set-based insert: answers first, then one question per answer
+        response_ids = db.session.execute(text("""
+            INSERT INTO logs.responses (response_text, created_at, updated_at)
+            SELECT 'I have worked on ' || (:topics)[1 + i % 8] || ' across Northern Virginia'
+                   || CASE WHEN i % :rare = 0 THEN ', including the Metro Silver Line.' ELSE '.' END,
+                   localtimestamp, localtimestamp
+            FROM generate_series(1, :count) AS i
+            RETURNING id
+        """), {"topics": TOPICS, "rare": args.rare, "count": args.queries}).scalars().all()
+        db.session.execute(text("""
+            INSERT INTO logs.queries (query_text, response_id, user_id, created_at, updated_at, showcase)
+            SELECT 'Benchmark search: what about ' || (:topics)[1 + id % 8] || '?', id, :user_id,
+                   localtimestamp, localtimestamp, false
+            FROM unnest(CAST(:ids AS integer[])) AS id
+        """), {"topics": TOPICS, "user_id": user.user_id, "ids": response_ids})
+        db.session.commit()
+        db.session.execute(text("ANALYZE logs.queries, logs.responses"))
+
+        try:
+            report = {"queries": args.queries}
+            for name, term in (("common", "broadband"), ("rare", "metro")):
+                report[name] = {
+                    "ilike": timed(ilike_search, term, 20),
+                    "full_text": timed(search_queries, term, 1, 20),
+                }
+        finally:
+            db.session.rollback()
+            for start in range(0, len(response_ids), 10000):
+                db.session.execute(
+                    text("DELETE FROM logs.responses WHERE id = ANY(:ids)"), {"ids": response_ids[start:start + 10000]}
+                )
+            db.session.commit()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
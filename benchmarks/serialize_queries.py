@@ -0,0 +1,113 @@
+# benchmarks/serialize_queries.py
+"""Measure serializing logged queries: a schema and a lazy response load per row vs bulk.
+
+Without `--user`, serializes in-memory `Query` objects (no database) to compare
+building a `QuerySchema` per row with the shared `many=True` schema. With
+`--user`, also writes that many queries under the user, then loads and
+serializes them the old way (lazy `response` per row) and with
+`Query.with_answers()`, counting SQL statements; the rows are deleted afterwards.
+
+    python -m benchmarks.serialize_queries --queries 10000
+    python -m benchmarks.serialize_queries --queries 10000 --user you@example.com
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from benchmarks.db_persistence import StatementCounter
+
+
+def serialize_per_row(queries):
+    """What `Query.serialize` did before: a new schema per row, response text read after the dump."""
+    from mastermind.models import QuerySchema
+    serialized = []
+    for query in queries:
+        data = QuerySchema().dump(query)
+        data["response_text"] = query.response.response_text if query.response else None
+        serialized.append(data)
+    return serialized
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, round((time.perf_counter() - started) * 1000, 2)
+
+
+def in_memory(count):
+    from mastermind.models import Query, Response, ResponseType
+    response_type = ResponseType(id=1, name="Concise", prompt="Be concise.")
+    now = datetime.utcnow()
+    queries = [
+        Query(
+            id=i, query_text=f"Benchmark question {i}?", response_type=response_type,
+            response=Response(id=i, response_text="I have fought for affordable housing. " * 8),
+            settings_selected='{"temperature": 0.5}', timestamp=now, showcase=False,
+            created_at=now, updated_at=now
+        )
+        for i in range(count)
+    ]
+    old, old_ms = timed(serialize_per_row, queries)
+    new, new_ms = timed(Query.serialize_many, queries)
+    assert old == new
+    return {"per_row_schema_ms": old_ms, "shared_schema_ms": new_ms}
+
+
+def from_database(count, email):
+    from mastermind import begin_era
+    from mastermind.models import User, Query, Response, db
+
+    app = begin_era()
+    with app.app_context():
+        user = User.query.filter_by(email=email).first()
+        if not user:
+            raise SystemExit(f"User not found for email: {email}")
+
+        responses = [Response(response_text="I have fought for affordable housing. " * 8) for _ in range(count)]
+        db.session.add_all(responses)
+        db.session.flush()
+        db.session.add_all([
+            Query(query_text=f"Benchmark serialize {i}?", response_id=response.id, user_id=user.user_id)
+            for i, response in enumerate(responses)
+        ])
+        db.session.commit()
+        response_ids = [response.id for response in responses]
+        counter = StatementCounter(db.engine)
+        benchmark_rows = Query.query_text.like("Benchmark serialize %")
+
+        try:
+            report = {}
+            for name, load, serialize in (
+                ("lazy_per_row", lambda: Query.query.filter(benchmark_rows).all(), serialize_per_row),
+                ("eager_bulk", lambda: Query.with_answers().filter(benchmark_rows).all(), Query.serialize_many),
+            ):
+                db.session.expunge_all()
+                counter.reset()
+                started = time.perf_counter()
+                serialized = serialize(load())
+                report[name] = {
+                    "ms": round((time.perf_counter() - started) * 1000, 2),
+                    "statements": counter.statements,
+                    "rows": len(serialized),
+                }
+            return report
+        finally:
+            db.session.rollback()
+            db.session.query(Response).filter(Response.id.in_(response_ids)).delete(synchronize_session=False)
+            db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=10000, help="Queries to serialize")
+    parser.add_argument("--user", help="Email of an existing user; also benchmark loading from Postgres")
+    args = parser.parse_args()
+
+    report = {"queries": args.queries, "in_memory": in_memory(args.queries)}
+    if args.user:
+        report["database"] = from_database(args.queries, args.user)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
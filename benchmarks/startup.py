@@ -0,0 +1,62 @@
+# benchmarks/startup.py
+"""Measure how long a fresh process takes to import the app, boot it and warm it up.
+
+Each sample runs in a new interpreter, so module caches do not hide import
+cost. Needs the Postgres settings from `.env` only for the `first_request`
+phase, which is skipped with `--no-request`.
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import mastermind
+imported = time.perf_counter()
+app = mastermind.begin_era()
+booted = time.perf_counter()
+from mastermind.backend import warm_up
+warm_up()
+warmed = time.perf_counter()
+timings = {"import": imported - started, "boot": booted - imported, "warm_up": warmed - booted}
+if sys.argv[1] == "request":
+    with app.test_client() as client:
+        before = time.perf_counter()
+        client.get("/api/response-types")
+        timings["first_request"] = time.perf_counter() - before
+print(json.dumps(timings))
+"""
+
+
+def sample(request):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, "request" if request else "none"],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to sample")
+    parser.add_argument("--no-request", action="store_true", help="Skip the first-request timing")
+    args = parser.parse_args()
+
+    samples = [sample(not args.no_request) for _ in range(args.runs)]
+    report = {
+        phase: {
+            "median_ms": round(statistics.median(s[phase] for s in samples) * 1000, 1),
+            "max_ms": round(max(s[phase] for s in samples) * 1000, 1),
+        }
+        for phase in samples[0]
+    }
+    print(json.dumps({"runs": args.runs, "phases": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# gunicorn.conf.py
+import gc
+import glob
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Production server: `gunicorn wsgi:app` picks this file up from the working directory.
+bind = f"{os.getenv('HOST') or '0.0.0.0'}:{os.getenv('APP_PORT') or 5024}"
+
+# Answering mostly waits on the AI API, so each worker runs several threads
+workers = int(os.getenv('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.getenv('GUNICORN_THREADS') or 8)
+worker_class = os.getenv('GUNICORN_WORKER_CLASS') or 'gthread'
+
+# Load the app, config and corpus once in the master and fork workers from it
+preload_app = True
+
+# Upstream calls and streamed answers can take a while
+timeout = int(os.getenv('GUNICORN_TIMEOUT') or 120)
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE') or 5)
+
+# Recycle workers now and then; 0 disables it
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS') or 0)
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER') or 0)
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or '-'
+errorlog = '-'
+
+# Where workers write their metrics so any of them can serve the sum; a fresh temp dir when unset
+metrics_dir = os.getenv('METRICS_DIR')
+# How often, at most, a worker writes them out as requests finish
+metrics_write_seconds = float(os.getenv('METRICS_WRITE_SECONDS') or 1)
+
+
+def when_ready(server):
+    # Make sure this month's and the next few months' log partitions exist before
+    # taking traffic; a cron job running `flask maintain-partitions` keeps them coming
+    from wsgi import app
+    from mastermind.models import db
+    from mastermind.backend.maintenance import maintain_partitions
+
+    with app.app_context():
+        try:
+            result = maintain_partitions()
+            server.log.info(f"🗂️ Log partitions: {len(result['created'])} created, {len(result['detached'])} detached.")
+        except Exception as e:
+            server.log.warning(f"Could not maintain log partitions: {e}")
+        finally:
+            db.engine.dispose()
+
+    # Each worker keeps its own metrics; sharing them through files makes
+    # /metrics/prometheus report every worker whichever one answers the scrape
+    from mastermind.utils.metrics import registry
+
+    global metrics_dir
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for stale in glob.glob(os.path.join(metrics_dir, '*.json')):
+            os.remove(stale)
+    else:
+        metrics_dir = tempfile.mkdtemp(prefix='candidategpt-metrics-')
+        server.metrics_dir_created = True
+    registry.share(metrics_dir, metrics_write_seconds)
+
+    # Move everything loaded so far out of the collector's reach, so collections
+    # in the workers do not write to (and un-share) the preloaded pages
+    gc.freeze()
+    server.log.info(f"🚀 Preloaded app shared by {workers} workers x {threads} threads.")
+
+
+def on_reload(server):
+    # HUP: re-read config.yml and the corpus in the master before the new workers fork from it
+    from mastermind.backend import reload_state
+
+    reload_state()
+    gc.freeze()
+    server.log.info("🔄 Config and corpus reloaded; rolling workers.")
+
+
+def worker_exit(server, worker):
+    # Keep the last requests' numbers in the totals
+    from mastermind.utils.metrics import registry
+
+    registry.write(force=True)
+
+
+def on_exit(server):
+    if getattr(server, 'metrics_dir_created', False):
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared between workers
+    from wsgi import app
+    from mastermind.models import db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
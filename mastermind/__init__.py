@@ -1,4 +1,7 @@
 # mastermind/__init__.py
+import time
+_import_started = time.perf_counter()
+
 import os
 from datetime import timedelta
 from flask import Flask
@@ -12,8 +15,6 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy_utils import database_exists, create_database
 from sqlalchemy import text
 from werkzeug.middleware.proxy_fix import ProxyFix
-from langfuse import Langfuse
-import atexit
 
 
 # Imported modules from your project
@@ -21,33 +22,20 @@ from web.auth import auth_bp, login_manager, limiter
 from .utils import configure_logger, logger, test_logger
 from .models import db, migrate
 from web.admin import csrf
-from .backend import api_bp
+from .backend import api_bp, answer_log, warm_up
+from .utils.metrics import record_startup
 from web.app import web_bp
 from web.admin import admin_bp
 
 
 
-# Define langfuse configuration
-def config_langfuse():
-    langfuse_instance = Langfuse(
-        public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
-        secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
-        host=os.getenv("LANGFUSE_HOST", "https://langfuse.henselforcongress.com"),
-        debug=os.getenv("LANGFUSE_DEBUG", False)
-    )
-
-    # Ensure all logs are flushed at exit
-    atexit.register(langfuse_instance.flush)
-
-    return langfuse_instance
-
-# Initialize langfuse globally (without user-specific setup)
-langfuse_instance = config_langfuse()
-
-
+def begin_era(warm=False):
+    """Create and configure an instance of the Flask application.
 
-def begin_era():
-    """Create and configure an instance of the Flask application."""
+    Config, corpus and retrieval index load on first use unless `warm` is set,
+    in which case they load here so the first request does not pay for them.
+    """
+    boot_started = time.perf_counter()
     try:
         app = Flask(__name__, static_folder="../web/static", template_folder="../web/templates")
         logger.info("Flask application instance created successfully.")
@@ -92,10 +80,11 @@ def begin_era():
         raise
 
     try:
-        # Check if the database exists and create it if it doesn't
-        if not database_exists(app.config['SQLALCHEMY_DATABASE_URI']):
-            create_database(app.config['SQLALCHEMY_DATABASE_URI'])
-            logger.info(f"Database created at {app.config['SQLALCHEMY_DATABASE_URI']}")
+        # entrypoint.sh creates the database before the app starts, so only check when asked to
+        if os.getenv('CREATE_DATABASE_ON_BOOT', '').lower() in ('1', 'true', 'yes'):
+            if not database_exists(app.config['SQLALCHEMY_DATABASE_URI']):
+                create_database(app.config['SQLALCHEMY_DATABASE_URI'])
+                logger.info(f"Database created at {app.config['SQLALCHEMY_DATABASE_URI']}")
     except Exception as e:
         logger.error(f"Error checking/creating database: {str(e)}", exc_info=True)
         raise
@@ -153,20 +142,46 @@ def begin_era():
         raise
 
     try:
-        sentry_sdk.init(
-            dsn=os.getenv('SENRTY_DSN'),
-            traces_sample_rate=1.0,
-            integrations=[FlaskIntegration()],
-            sample_rate=0.25,
-            profiles_sample_rate=1.0,
-        )
-        logger.info("Sentry SDK initialized.")
+        # Let the query/response log writer flush inside this app's context
+        answer_log.init_app(app)
+        logger.info("Write-behind answer log attached to app.")
+    except Exception as e:
+        logger.error(f"Error attaching write-behind answer log: {str(e)}", exc_info=True)
+        raise
+
+    try:
+        # Without a DSN there is nothing to report to, and setting up the integrations is most of the boot time
+        sentry_dsn = os.getenv('SENRTY_DSN')
+        if sentry_dsn:
+            sentry_sdk.init(
+                dsn=sentry_dsn,
+                traces_sample_rate=1.0,
+                integrations=[FlaskIntegration()],
+                sample_rate=0.25,
+                profiles_sample_rate=1.0,
+            )
+            logger.info("Sentry SDK initialized.")
+        else:
+            logger.info("Sentry SDK not initialized (no DSN set).")
     except Exception as e:
         logger.error(f"Error initializing Sentry SDK: {str(e)}", exc_info=True)
         raise
 
+    boot_seconds = time.perf_counter() - boot_started
+    record_startup('boot', boot_seconds)
+    logger.info(f"🚀 App booted in {boot_seconds * 1000:.1f} ms (import took {IMPORT_SECONDS * 1000:.1f} ms).")
 
+    if warm:
+        try:
+            for phase, seconds in warm_up().items():
+                record_startup(f'warm_up_{phase}', seconds)
+            logger.info("🔥 Config, corpus and retrieval index warmed up.")
+        except Exception as e:
+            logger.error(f"Error warming up: {str(e)}", exc_info=True)
+            raise
 
+    return app
 
 
-    return app
+IMPORT_SECONDS = time.perf_counter() - _import_started
+record_startup('import', IMPORT_SECONDS)
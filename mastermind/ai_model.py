@@ -1,15 +1,21 @@
 # mastermind/ai_model.py
 import os
-import requests
+import math
+import hashlib
+import threading
 import yaml
 import json
 import re
+import time
 from datetime import datetime
 import pytz
 #from dotenv import load_dotenv
 from mastermind.utils import logger
-from mastermind.models import Query, db, Response
-from flask_login import current_user
+from mastermind.utils.http_client import get_http_client, get_async_http_client
+from mastermind.utils.metrics import (
+    timed, record_stage, record_usage, record_prompt, record_prompt_tokens, UPSTREAM_REQUESTS
+)
+from mastermind.data_manager.retrieve import get_index, estimate_tokens, document_tokens
 from langfuse.decorators import langfuse_context, observe
 
 # Load environment variables
@@ -18,6 +24,23 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CLOUDFLARE_ACCOUNT_ID = os.getenv("CLOUDFLARE_ACCOUNT_ID")
 CLOUDFLARE_AI_GATEWAY = os.getenv("CLOUDFLARE_AI_GATEWAY")
 CLOUDFLARE_API_TOKEN = os.getenv("CLOUDFLARE_API_TOKEN")
+CLOUDFLARE_API_BASE = os.getenv("CLOUDFLARE_API_BASE", "https://api.cloudflare.com/client/v4")
+
+# How fast answers are read aloud, used to turn `speaking_seconds` into a max_tokens cap
+DEFAULT_SPEECH = {
+    "words_per_minute": 150,
+    "tokens_per_word": 1.35,
+    "overhead_tokens": 200,  # JSON wrapper and links around the spoken answer
+}
+
+MODEL = "@cf/meta/llama-3.1-8b-instruct"
+
+# Prompt size limits for llama-3.1-8b-instruct on Workers AI
+DEFAULT_CONTEXT = {
+    "window_tokens": 7968,
+    "reserve_tokens": 256,  # Slack for the chat template and the estimate being off
+}
+DEFAULT_MAX_TOKENS = 256  # What Workers AI generates when max_tokens is not sent
 
 def construct_system_prompt():
     """Construct the system prompt for the AI model."""
@@ -66,24 +89,140 @@ def construct_system_prompt():
         "\n"
     )
 
+SYSTEM_PROMPT = construct_system_prompt()
+
 def construct_full_prompt(user_prompt, data_content, question):
     """Construct the full prompt for the assistant."""
     return f"{user_prompt}\n\n{data_content}\n\nQ: {question}\nA:"
 
-def prepare_headers():
+def prefix_key(system, user_prefix):
+    """Short hash of a prompt prefix, sent as the session affinity key."""
+    return hashlib.sha256(f"{system}\0{user_prefix}".encode('utf-8')).hexdigest()[:16]
+
+class PromptTemplate:
+    """The parts of a prompt that are the same for every request, compiled once per config and corpus.
+
+    Requests are laid out static-first: the system prompt, then the `ai.prompt`
+    instructions and, when retrieval is off, the whole corpus. Only the
+    retrieved context and the question (with its response type prompt) follow,
+    so that prefix is byte-identical across questions and response types and
+    upstream prompt caching can reuse it.
+    """
+
+    def __init__(self, config, data):
+        retrieval = config['ai'].get('retrieval', {})
+        self.static_corpus = not retrieval.get('enabled', False)
+        self.system = SYSTEM_PROMPT
+        self.instructions = f"{config['ai']['prompt']}\n\n"
+        self.user_prefix = self.instructions
+        # Estimated tokens of everything but the corpus context and the question
+        self.base_tokens = estimate_tokens(self.system) + estimate_tokens(self.instructions)
+        self.corpus_tokens = 0
+        if self.static_corpus:
+            corpus = "\n\n".join(data.values())
+            self.user_prefix += f"{corpus}\n\n"
+            self.corpus_tokens = sum(document_tokens(data).values())
+        self.prefix_chars = len(self.system) + len(self.user_prefix)
+        self.prefix_key = prefix_key(self.system, self.user_prefix)
+        # What requests still share when the corpus is over their budget and chunks are sent instead
+        self.instructions_chars = len(self.system) + len(self.instructions)
+        self.instructions_key = prefix_key(self.system, self.instructions)
+
+    def prefix(self, full_prompt):
+        """`(chars, key)` of the reusable prefix `full_prompt` was actually built on."""
+        if full_prompt.startswith(self.user_prefix):
+            return self.prefix_chars, self.prefix_key
+        return self.instructions_chars, self.instructions_key
+
+    def user_message(self, question, context=None):
+        """The user message: the static prefix, or the instructions and the per-request context, then the question."""
+        if context is None:
+            return f"{self.user_prefix}Q: {question}\nA:"
+        return f"{self.instructions}{context}\n\nQ: {question}\nA:"
+
+_template = {"config": None, "data": None, "template": None}
+_template_lock = threading.Lock()
+
+def prompt_template(config, data):
+    """The compiled `PromptTemplate` for this config and corpus, rebuilt when either is replaced."""
+    with _template_lock:
+        if _template["config"] is not config or _template["data"] is not data:
+            _template["template"] = PromptTemplate(config, data)
+            _template["config"] = config
+            _template["data"] = data
+        return _template["template"]
+
+def prepare_headers(config=None, session_key=None):
     """Prepare the headers for the API request."""
-    return {
+    headers = {
         "Authorization": f"Bearer {CLOUDFLARE_API_TOKEN}",
         "Content-Type": "application/json"
     }
+    # Routes requests sharing a prompt prefix to the same model instance, where it is likely cached
+    if session_key and config and config['ai'].get('prompt_cache', {}).get('session_affinity', False):
+        headers["x-session-affinity"] = session_key
+    return headers
+
+def speaking_time_tokens(seconds, speech=None):
+    """Output tokens needed for an answer that takes `seconds` to read aloud."""
+    speech = {**DEFAULT_SPEECH, **(speech or {})}
+    words = seconds / 60 * speech["words_per_minute"]
+    return math.ceil(words * speech["tokens_per_word"]) + speech["overhead_tokens"]
+
+def generation_settings(config, response_option=None):
+    """Generation parameters for a request: `ai.settings` overlaid with the response type's `settings`.
+
+    A response type with `speaking_seconds` and no `max_tokens` of its own is
+    capped at the tokens needed to say that much (tuned by `ai.speech`).
+    """
+    settings = dict(config['ai'].get('settings') or {})
+    if response_option:
+        option_settings = response_option.get('settings') or {}
+        settings.update(option_settings)
+        seconds = response_option.get('speaking_seconds')
+        if seconds and 'max_tokens' not in option_settings:
+            settings['max_tokens'] = speaking_time_tokens(seconds, config['ai'].get('speech'))
+    return settings
+
+def context_budget(config, template, question, response_option=None):
+    """Tokens of corpus context that fit next to the rest of the prompt and the answer.
+
+    What is left of `ai.context.window_tokens` after the system prompt,
+    instructions, question, the response type's max_tokens and a reserve; a
+    response type may also cap it with its own `context_tokens`.
+    """
+    context = {**DEFAULT_CONTEXT, **config['ai'].get('context', {})}
+    max_tokens = generation_settings(config, response_option).get('max_tokens', DEFAULT_MAX_TOKENS)
+    budget = (
+        context['window_tokens'] - context['reserve_tokens'] - max_tokens
+        - template.base_tokens - estimate_tokens(question)
+    )
+    if response_option and response_option.get('context_tokens') is not None:
+        budget = min(budget, response_option['context_tokens'])
+    return max(0, budget)
+
+def estimate_prompt_tokens(full_prompt):
+    """Estimated prompt tokens of a request: the system prompt plus the user message."""
+    return estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(full_prompt)
+
+def record_generation(result, config, prompt_estimate, upstream_seconds):
+    """Attach what an upstream call cost to its result, for metrics, Langfuse and the query log."""
+    result['model'] = MODEL
+    result['prompt_estimate'] = prompt_estimate
+    result['upstream_ms'] = round(upstream_seconds * 1000)
+    record_prompt_tokens(prompt_estimate, result.get('usage'))
+    if result.get('usage'):
+        log_token_usage(result['usage'], config)
+    return result
 
-def prepare_json_payload(system_prompt, full_prompt, config):
+def prepare_json_payload(system_prompt, full_prompt, config, response_option=None):
     """Prepare the JSON payload for the API request."""
     return {
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": full_prompt}
-        ]
+        ],
+        **generation_settings(config, response_option)
     }
 
 def extract_json_from_response(text):
@@ -95,17 +234,6 @@ def extract_json_from_response(text):
         return json_match.group(0)
     return None
 
-def log_query(question, config):
-    """Log the query to the database."""
-    query_record = Query(
-        query_text=question,
-        settings_selected=json.dumps(config['ai']['settings']),
-        user_id=current_user.user_id
-    )
-    db.session.add(query_record)
-    db.session.commit()
-    return query_record
-
 def sanitize_json_string(json_str):
     """Sanitize JSON strings by correcting common issues."""
     # Correctly handle existing escape characters and unnecessary backslashes
@@ -115,6 +243,53 @@ def sanitize_json_string(json_str):
     # Avoid escaping already escaped quotes
     return json_str
 
+def parse_answer_content(answer_content):
+    """Parse the model's raw text into the answer, inference flag, warning and links.
+
+    Output that is not a JSON answer is passed through as the answer with a
+    warning and `parse_failed` set.
+    """
+    result = {
+        'answer': '',
+        'warning': '',
+        'links': []
+    }
+
+    # Extract JSON string from the response content
+    json_str = extract_json_from_response(answer_content)
+    if json_str:
+        logger.debug(f"JSON string: {json_str}")
+        try:
+            try:
+                answer_data = json.loads(json_str)
+            except json.JSONDecodeError:
+                # Only malformed output is sanitized; valid JSON keeps its escaped quotes
+                answer_data = json.loads(sanitize_json_string(json_str))
+
+            # Extract data
+            if isinstance(answer_data, dict):
+                result['answer'] = answer_data.get('answer', '')
+                result['inference'] = answer_data.get('inference', False)
+                result['links'] = answer_data.get('links', [])
+
+                if result['inference']:
+                    result['warning'] = (
+                        "The response uses inference or content not directly mentioned in the source data."
+                    )
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse the assistant's response as JSON: {e}")
+            result['answer'] = answer_content
+            result['warning'] = "The assistant's response could not be parsed as JSON."
+            result['parse_failed'] = True
+
+    else:
+        logger.error("No JSON object found in the assistant's response.")
+        result['answer'] = answer_content
+        result['warning'] = "The assistant's response does not contain a valid JSON object."
+        result['parse_failed'] = True
+
+    return result
+
 def process_response(response):
     """Process the API response and extract useful information."""
     result = {
@@ -125,44 +300,19 @@ def process_response(response):
 
     if response.status_code == 200:
         try:
-            response_json = response.json()
-            logger.debug(f"Response JSON:\n {response_json}")
-
-            # Safely extract the JSON-contained content
-            answer_content = response_json.get('result', {}).get('response', '')
-            logger.debug(f"Raw response content: {answer_content}")
+            with timed("parse"):
+                response_json = response.json()
+                logger.debug(f"Response JSON:\n {response_json}")
+                usage = response_json.get('usage')
+                record_usage(usage)
 
-            # Extract JSON string from the response content
-            json_str = extract_json_from_response(answer_content)
-            if json_str:
-                # This ensures we properly handle common JSON formatting problems
-                sanitized_json_str = sanitize_json_string(json_str)
+                # Safely extract the JSON-contained content
+                answer_content = response_json.get('result', {}).get('response', '')
+                logger.debug(f"Raw response content: {answer_content}")
 
-                if sanitized_json_str:
-                    logger.debug(f"Sanitized JSON string: {sanitized_json_str}")
-                    try:
-                        # Load the sanitized JSON content
-                        answer_data = json.loads(sanitized_json_str)
-
-                        # Extract data
-                        if isinstance(answer_data, dict):
-                            result['answer'] = answer_data.get('answer', '')
-                            result['inference'] = answer_data.get('inference', False)
-                            result['links'] = answer_data.get('links', [])
-
-                            if result['inference']:
-                                result['warning'] = (
-                                    "The response uses inference or content not directly mentioned in the source data."
-                                )
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Failed to parse the assistant's response as JSON: {e}")
-                        result['answer'] = answer_content
-                        result['warning'] = "The assistant's response could not be parsed as JSON."
-
-            else:
-                logger.error("No JSON object found in the assistant's response.")
-                result['answer'] = answer_content
-                result['warning'] = "The assistant's response does not contain a valid JSON object."
+                result = parse_answer_content(answer_content)
+                if usage:
+                    result['usage'] = usage
 
         except (json.JSONDecodeError, KeyError) as e:
             logger.error(f"Failed to retrieve or decode JSON data: {e}")
@@ -174,20 +324,123 @@ def process_response(response):
 
     return result
 
+class AnswerStreamExtractor:
+    """Incrementally pull the value of the "answer" field out of streamed JSON text.
+
+    Tokens arrive in arbitrary pieces, so the extractor keeps just enough state
+    to find the `"answer": "` opening and then decode the string (including
+    escape sequences split across chunks) until its closing quote.
+    """
+
+    ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self):
+        self.raw = []
+        self.decoded = []
+        self._seek = ''
+        self._pending = ''
+        self.state = 'seek'  # seek -> inside -> done
+
+    def feed(self, text):
+        """Consume raw model text and return any newly decoded answer characters."""
+        self.raw.append(text)
+        if self.state == 'done':
+            return ''
+        if self.state == 'seek':
+            self._seek += text
+            match = re.search(r'"answer"\s*:\s*"', self._seek)
+            if not match:
+                # Only keep a tail long enough to match a split key
+                self._seek = self._seek[-32:]
+                return ''
+            text = self._seek[match.end():]
+            self._seek = ''
+            self.state = 'inside'
+        decoded = self._decode(text)
+        self.decoded.append(decoded)
+        return decoded
+
+    def _decode(self, text):
+        out = []
+        text = self._pending + text
+        self._pending = ''
+        i = 0
+        while i < len(text):
+            char = text[i]
+            if char == '\\':
+                if i + 1 >= len(text):
+                    self._pending = text[i:]
+                    break
+                code = text[i + 1]
+                if code == 'u':
+                    if i + 6 > len(text):
+                        self._pending = text[i:]
+                        break
+                    try:
+                        out.append(chr(int(text[i + 2:i + 6], 16)))
+                    except ValueError:
+                        out.append(text[i:i + 6])
+                    i += 6
+                    continue
+                out.append(self.ESCAPES.get(code, code))
+                i += 2
+                continue
+            if char == '"':
+                self.state = 'done'
+                break
+            out.append(char)
+            i += 1
+        return ''.join(out)
+
+    @property
+    def text(self):
+        """Everything the model has emitted so far."""
+        return ''.join(self.raw)
+
+    @property
+    def answer(self):
+        """The answer text decoded so far, exactly as it was streamed."""
+        return ''.join(self.decoded)
+
+def iter_stream_tokens(response):
+    """Yield `(text, usage)` pairs from a Workers AI server-sent event stream."""
+    # Event streams are UTF-8, but requests falls back to ISO-8859-1 for text/* without a charset
+    response.encoding = 'utf-8'
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+        payload = line[len('data:'):].strip()
+        if payload == '[DONE]':
+            break
+        try:
+            event = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed stream event: {payload}")
+            continue
+        yield event.get('response') or '', event.get('usage')
+
 # Handle response generation
 @observe(as_type="generation", capture_input=True, capture_output=True)
-def generate_response(question, data, config):
+def generate_response(question, data, config, retrieval_query=None, response_option=None):
     """Main function to generate a response using the Cloudflare API."""
     logger.debug("🎤 Starting the generate_response function.")
 
-    full_prompt = prepare_full_prompt(data, config, question)
+    full_prompt = prepare_full_prompt(
+        data, config, question, retrieval_query=retrieval_query, response_option=response_option
+    )
+    prompt_estimate = estimate_prompt_tokens(full_prompt)
 
     try:
         # Construct the Cloudflare API call
-        response = send_request(full_prompt, config)
+        started = time.perf_counter()
+        response = send_request(
+            full_prompt, config, response_option=response_option,
+            session_key=prompt_template(config, data).prefix(full_prompt)[1]
+        )
+        upstream_seconds = time.perf_counter() - started
 
         # Process the response and log results
-        result = process_response(response)
+        result = record_generation(process_response(response), config, prompt_estimate, upstream_seconds)
 
         if response.status_code == 200:
             logger.info(f"Response generated successfully for question: {question}")
@@ -196,7 +449,6 @@ def generate_response(question, data, config):
 
     except Exception as e:
         logger.exception("Error during response generation")
-        db.session.rollback()
         result = {
             'answer': f"Exception: {str(e)}",
             'warning': '',
@@ -205,8 +457,71 @@ def generate_response(question, data, config):
 
     return result
 
+@observe(as_type="generation", capture_input=True, capture_output=False)
+def stream_response(question, data, config, retrieval_query=None, response_option=None):
+    """Stream a response, yielding `('token', text)` events and a final `('done', result)`.
+
+    Only the decoded `answer` text is forwarded while tokens arrive; links and
+    inference are parsed from the complete output once the stream ends.
+    """
+    logger.debug("🎤 Starting the stream_response function.")
 
-def log_token_usage(usage_data, config, full_prompt):
+    full_prompt = prepare_full_prompt(
+        data, config, question, retrieval_query=retrieval_query, response_option=response_option
+    )
+    prompt_estimate = estimate_prompt_tokens(full_prompt)
+    extractor = AnswerStreamExtractor()
+    usage = None
+
+    try:
+        started = time.perf_counter()
+        response = send_request(
+            full_prompt, config, stream=True, response_option=response_option,
+            session_key=prompt_template(config, data).prefix(full_prompt)[1]
+        )
+
+        if response.status_code != 200:
+            # Not a stream; fall back to the regular error handling
+            logger.error(f"Failed API response: {response.status_code}")
+            yield 'done', process_response(response)
+            return
+
+        try:
+            for text, event_usage in iter_stream_tokens(response):
+                if event_usage:
+                    usage = event_usage
+                answer_delta = extractor.feed(text)
+                if answer_delta:
+                    yield 'token', answer_delta
+        finally:
+            response.close()
+        upstream_seconds = time.perf_counter() - started
+        record_stage("upstream", upstream_seconds)
+
+        with timed("parse"):
+            result = parse_answer_content(extractor.text)
+        if extractor.state == 'done':
+            # The saved and final answer is the one the client already saw
+            result['answer'] = extractor.answer
+        if usage:
+            result['usage'] = usage
+            record_usage(usage)
+        record_generation(result, config, prompt_estimate, upstream_seconds)
+        logger.info(f"Response streamed successfully for question: {question}")
+
+    except Exception as e:
+        logger.exception("Error during streamed response generation")
+        result = {
+            'answer': f"Exception: {str(e)}",
+            'warning': '',
+            'links': []
+        }
+
+    langfuse_context.update_current_observation(output=result)
+    yield 'done', result
+
+
+def log_token_usage(usage_data, config):
     """Log token usage and generation-specific parameters to Langfuse."""
     prompt_tokens = usage_data.get('prompt_tokens', 0)
     completion_tokens = usage_data.get('completion_tokens', 0)
@@ -232,8 +547,8 @@ def log_token_usage(usage_data, config, full_prompt):
     # Send the update to Langfuse with generation-specific params
     langfuse_context.update_current_observation(
         usage=usage_payload,
-        model=config['ai']['model'],
-        metadata={"model": config['ai']['model']},
+        model=MODEL,
+        metadata={"model": MODEL},
         completion_start_time=completion_start_time,
         model_parameters=model_parameters,
         public=True
@@ -242,101 +557,134 @@ def log_token_usage(usage_data, config, full_prompt):
     logger.debug(f"Langfuse Usage Payload:\n{usage_payload}")
 
 
-def prepare_full_prompt(data, config, question):
-    """Prepare the full prompt and headers for the OpenAI API request."""
-    user_prompt = config['ai']['prompt']
-    data_content = "\n\n".join(data.values())
+def prepare_data_content(data, config, question, retrieval_query=None, token_budget=None):
+    """Select the corpus content to send: the top BM25 chunks that fit the token budget."""
+    retrieval = config['ai'].get('retrieval', {})
+    budget = retrieval.get('token_budget', 2000)
+    if token_budget is not None:
+        budget = min(budget, token_budget)
 
-    full_prompt = construct_full_prompt(user_prompt, data_content, question)
-    logger.debug("Constructed full prompt.")
+    index = get_index(data)
+    data_content = index.render_context(
+        retrieval_query or question,
+        top_k=retrieval.get('top_k', 8),
+        token_budget=budget
+    )
+    logger.debug(f"Retrieved context in {index.last_lookup_seconds * 1000:.3f} ms.")
+    return data_content
+
+def prepare_full_prompt(data, config, question, retrieval_query=None, response_option=None):
+    """Prepare the full prompt and headers for the OpenAI API request.
+
+    The corpus context is packed into the response type's context budget: the
+    whole corpus when retrieval is off and it fits, otherwise the best
+    matching chunks that do.
+    """
+    with timed("prompt"):
+        template = prompt_template(config, data)
+        budget = context_budget(config, template, question, response_option)
+        if template.static_corpus and template.corpus_tokens <= budget:
+            full_prompt = template.user_message(question)
+        else:
+            if template.static_corpus:
+                logger.warning(
+                    f"⚠️ Corpus (~{template.corpus_tokens} tokens) is over the {budget}-token context budget; "
+                    "sending the best matching chunks instead."
+                )
+            data_content = prepare_data_content(
+                data, config, question, retrieval_query=retrieval_query, token_budget=budget
+            )
+            full_prompt = template.user_message(question, data_content)
+
+    # How much of this request repeats the previous ones byte for byte
+    total_chars = len(template.system) + len(full_prompt)
+    prefix_chars, _ = template.prefix(full_prompt)
+    record_prompt(prefix_chars, total_chars)
+    logger.debug(f"Constructed full prompt; reusable prefix {prefix_chars}/{total_chars} chars.")
 
     return full_prompt
 
-def send_request(full_prompt, config):
+def send_request(full_prompt, config, stream=False, response_option=None, session_key=None):
     """Send the request to the AI API."""
-    headers = prepare_headers()
-    system_prompt = construct_system_prompt()
-    json_data = prepare_json_payload(system_prompt, full_prompt, config)
+    headers = prepare_headers(config, session_key)
+    system_prompt = SYSTEM_PROMPT
+    json_data = prepare_json_payload(system_prompt, full_prompt, config, response_option)
+    if stream:
+        json_data['stream'] = True
 
     # logger.debug(f"{json_data}")
 
     logger.info("Sending request to  API.")
-    response = requests.post(
-        f"https://api.cloudflare.com/client/v4/accounts/{CLOUDFLARE_ACCOUNT_ID}/ai/run/@cf/meta/llama-3.1-8b-instruct",
+    client = get_http_client(config['ai'].get('http'))
+    started = time.perf_counter()
+    response = client.post(
+        f"{CLOUDFLARE_API_BASE}/accounts/{CLOUDFLARE_ACCOUNT_ID}/ai/run/{MODEL}",
         headers=headers,
-        json=json_data
+        json=json_data,
+        stream=stream
     )
 
+    # Connect is only recorded when a new connection had to be opened
+    if response.connect_seconds:
+        record_stage("upstream_connect", response.connect_seconds)
+    record_stage("upstream_ttfb", response.elapsed.total_seconds())
+    if not stream:
+        record_stage("upstream", time.perf_counter() - started)
+    UPSTREAM_REQUESTS.inc(status=response.status_code)
+
     logger.debug(f"Received response with status code {response.status_code}.")
     return response
 
-def process_and_log_response(response, query_record, config):
-    """Process the API response and update logs, Langfuse, and the database."""
-    result = process_response(response)
-
-    # Check for successful response
-    if response.status_code == 200:
-        handle_successful_response(result, query_record, response, config)
-    else:
-        logger.error(f"API request failed: {response.status_code}")
-
-    return result
-
-def handle_successful_response(result, query_record, response, config):
-    """Handle a successful response, including logging token usage and saving data."""
-    usage_data = response.json().get('usage', {})
-    log_token_usage(usage_data, config)
+async def send_request_async(full_prompt, config, response_option=None, session_key=None):
+    """Send the request to the AI API without blocking the event loop."""
+    headers = prepare_headers(config, session_key)
+    system_prompt = SYSTEM_PROMPT
+    json_data = prepare_json_payload(system_prompt, full_prompt, config, response_option)
+
+    logger.info("Sending async request to  API.")
+    client = get_async_http_client(config['ai'].get('http'))
+    started = time.perf_counter()
+    response = await client.post(
+        f"{CLOUDFLARE_API_BASE}/accounts/{CLOUDFLARE_ACCOUNT_ID}/ai/run/{MODEL}",
+        headers=headers,
+        json=json_data
+    )
+    record_stage("upstream", time.perf_counter() - started)
+    UPSTREAM_REQUESTS.inc(status=response.status_code)
 
-    # Save the response to the database
-    if result['answer']:
-        save_response_to_db(result['answer'], query_record)
+    logger.debug(f"Received response with status code {response.status_code}.")
+    return response
 
-        # Log the successful response processing with Langfuse
-        log_langfuse_success(query_record.response_id, result['answer'], config)
+@observe(as_type="generation", capture_input=True, capture_output=True)
+async def generate_response_async(question, data, config, retrieval_query=None, response_option=None):
+    """Async variant of `generate_response` for the ASGI ask pipeline."""
+    logger.debug("🎤 Starting the generate_response_async function.")
 
-def log_langfuse_success(response_id, answer, config):
-    """Log the successful processing of the response in Langfuse."""
-    langfuse_context.update_current_observation(
-        output={"response_id": response_id, "answer": answer},
-        name="ai_query_success",
-        metadata={
-            "api_key": "OpenAI",
-            "model": config['ai']['model'],
-            "prompt": config['ai']['prompt'],
-            "model_parameters": config['ai'].get('settings', {})
-        },
-        tags=["ai", "openai", "success"],
-        public=True
+    full_prompt = prepare_full_prompt(
+        data, config, question, retrieval_query=retrieval_query, response_option=response_option
     )
+    prompt_estimate = estimate_prompt_tokens(full_prompt)
 
-def save_response_to_db(answer, query_record):
-    """Save the generated response to the database."""
-    new_response = Response(response_text=answer)
-    db.session.add(new_response)
-    db.session.flush()  # Get the new response ID
-
-    # Update the query with the response ID
-    query_record.response_id = new_response.id
-    db.session.commit()
-
-    logger.info("Response saved and query updated successfully.")
+    try:
+        started = time.perf_counter()
+        response = await send_request_async(
+            full_prompt, config, response_option=response_option,
+            session_key=prompt_template(config, data).prefix(full_prompt)[1]
+        )
+        upstream_seconds = time.perf_counter() - started
+        result = record_generation(process_response(response), config, prompt_estimate, upstream_seconds)
 
-def handle_request_error(e, query_record, config):
-    """Handle errors during the API request."""
-    logger.exception("An exception occurred during the API request.")
-    db.session.rollback()
+        if response.status_code == 200:
+            logger.info(f"Response generated successfully for question: {question}")
+        else:
+            logger.error(f"Failed API response: {response.status_code}")
 
-    # Log error with Langfuse
-    langfuse_context.update_current_observation(
-        output={"error": str(e)},
-        name="ai_query_error",
-        metadata={"api_key": "OpenAI", "model": config['ai']['model']},
-        tags=["ai", "openai", "error"],
-        public=False  # Keep errors private
-    )
+    except Exception as e:
+        logger.exception("Error during async response generation")
+        result = {
+            'answer': f"Exception: {str(e)}",
+            'warning': '',
+            'links': []
+        }
 
-    return {
-        'answer': f"Exception: {str(e)}",
-        'warning': '',
-        'links': []
-    }
+    return result
@@ -1,15 +1,28 @@
 # mastermind/backend/__init__.py
-from flask import Blueprint, request, jsonify, abort
+from flask import Blueprint, request, jsonify, abort, stream_with_context, g
+from flask import Response as FlaskResponse
 from flask_login import login_required, current_user
 import json
+import threading
+import time
 import yaml
 #from dotenv import load_dotenv
-from mastermind.data_manager.load import load_data
-from mastermind.ai_model import generate_response
+from mastermind.data_manager.load import corpus_loader, corpus_version
+from mastermind.data_manager.retrieve import get_index
+from mastermind.ai_model import generate_response, stream_response, generation_settings
 from mastermind import logger
 from flask_wtf.csrf import CSRFProtect
-from mastermind.models import User, ResponseType, Query, UserTypeEnum, Response, db
+from mastermind.models import Query, UserTypeEnum, Response, db
 from mastermind.utils.auth import role_required
+from mastermind.utils.http_client import http_client_stats
+from mastermind.utils.cache import response_cache, is_cacheable, stable_hash
+from mastermind.utils.singleflight import answer_flight
+from mastermind.utils.write_behind import WriteBehindQueue
+from mastermind.utils.identity import identity_cache
+from mastermind.utils.query_stats import query_stats
+from mastermind.utils.partitions import partition_maintenance
+from mastermind.utils.metrics import timed, record_request, server_timing_header
+from .response_types import response_options, response_type_registry
 
 from langfuse.decorators import langfuse_context, observe
 
@@ -18,10 +31,35 @@ csrf = CSRFProtect()
 # load_dotenv()
 
 # Initialize Blueprint
-api_bp = Blueprint('api_bp', __name__)
+api_bp = Blueprint('api_bp', __name__, cli_group=None)
 
-logger.debug("Loading initial data.")
-data = load_data()
+@api_bp.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@api_bp.after_request
+def record_request_metrics(response):
+    """Count the request and echo stage timings in a Server-Timing header."""
+    elapsed = time.perf_counter() - g.get('request_started', time.perf_counter())
+    record_request(request.endpoint or 'unknown', response.status_code, elapsed)
+    timings = g.get('server_timing', []) + [('total', elapsed)]
+    response.headers['Server-Timing'] = server_timing_header(timings)
+    if 'prompt_prefix' in g:
+        # Reusable prompt prefix / whole prompt, in characters
+        response.headers['X-Prompt-Prefix'] = '%d/%d' % g.prompt_prefix
+    if 'prompt_tokens' in g:
+        # Estimated / actual prompt tokens (0 when the AI API did not report usage)
+        response.headers['X-Prompt-Tokens'] = '%d/%d' % g.prompt_tokens
+    return response
+
+# Corpus and config are loaded on first use (or by warm_up), not at import,
+# so CLI commands, migrations and tests that never ask a question skip them
+data = None
+config = None
+_state_lock = threading.Lock()
+# Serializes corpus refreshes; readers never take it, they just use the current snapshot
+_data_lock = threading.Lock()
+_next_data_check = 0.0
 
 # Load configurations from config.yml
 def load_config():
@@ -35,30 +73,191 @@ def load_config():
         logger.error(f"Failed to load configuration: {e}")
         raise
 
-config = load_config()
+def apply_config(new_config):
+    """Make `new_config` the active config and reconfigure the caches and queues that read it."""
+    global config
+    response_cache.configure(new_config.get('cache'))
+    identity_cache.configure(new_config.get('identity_cache'))
+    query_stats.configure(new_config.get('query_stats'))
+    partition_maintenance.configure(new_config.get('partitions'))
+    answer_log.configure(new_config.get('write_behind'))
+    config = new_config
 
-@api_bp.route('/api/ask', methods=['POST'])
-@observe(name="api_ask_endpoint")
-@login_required
-@role_required(UserTypeEnum.USER.name, UserTypeEnum.ADMIN.name)
-def ask_question():
-    logger.debug('Entered /api/ask endpoint.')
-    logger.debug(f'Headers: {request.headers}')
-    logger.debug(f'Request data (raw): {request.data}')
-    logger.debug(f'JSON data (parsed): {request.get_json()}')
+def get_config():
+    """The active config, loaded from config.yml on first use."""
+    if config is None:
+        with _state_lock:
+            if config is None:
+                apply_config(load_config())
+    return config
+
+def refresh_data(force=False):
+    """Pick up corpus changes on disk and publish the new snapshot.
 
+    Only changed files are re-read, and the new snapshot's retrieval index is
+    built before it replaces the old one, so requests always see a complete
+    corpus. Unless `force` is set (or nothing is loaded yet), returns at once
+    when another thread is already refreshing. Returns True if the snapshot changed.
+    """
+    global data, _next_data_check
+    if not _data_lock.acquire(blocking=force or data is None):
+        return False
     try:
-        user_question = request.json.get('question')
-        response_type = request.json.get('response_type')
-        showcase = request.json.get('showcase', False)
+        previous = data
+        loaded = corpus_loader.load()
+        get_index(loaded)
+        data = loaded
+        interval = get_config().get('corpus', {}).get('check_interval_seconds', 30)
+        _next_data_check = time.monotonic() + interval if interval else float('inf')
+    finally:
+        _data_lock.release()
+    if previous is not None and loaded is not previous:
+        response_cache.invalidate()
+        logger.info(f"📚 Corpus updated to {loaded.version}. I knew you were trouble when you walked in.")
+    return loaded is not previous
+
+def get_data():
+    """The active corpus snapshot, loaded (and its retrieval index built) on first use.
+
+    Every `corpus.check_interval_seconds` one request also checks the data
+    directory for changes, so each worker converges on the corpus on disk
+    without being told to reload.
+    """
+    if data is None or time.monotonic() >= _next_data_check:
+        refresh_data()
+    return data
+
+def reload_state():
+    """Re-read config.yml and the corpus and make them active.
+
+    Used by the gunicorn master on a graceful reload (HUP), so the workers it
+    forks next start from the new config and corpus.
+    """
+    new_config = load_config()
+    with _state_lock:
+        apply_config(new_config)
+    refresh_data(force=True)
+
+def warm_up():
+    """Load the config, corpus and retrieval index now instead of on the first request.
+
+    Returns the seconds each step took.
+    """
+    timings = {}
+    started = time.perf_counter()
+    get_config()
+    timings['config'] = time.perf_counter() - started
+    started = time.perf_counter()
+    get_data()
+    timings['data'] = time.perf_counter() - started
+    return timings
+
+def save_question_and_answer(user_question, response_text, response_type, response_option, user_id, showcase, ip_address, config):
+    """Persist the response type (if new), the response and the query that links them in one transaction."""
+    return save_questions_and_answers([{
+        'user_question': user_question,
+        'answer': response_text,
+        'response_type': response_type,
+        'response_option': response_option,
+        'user_id': user_id,
+        'showcase': showcase,
+        'ip_address': ip_address,
+    }], config)[0]
 
-        # Get the User-ID (email) from the headers
-        user_email = request.headers.get('User-ID')
-        if not user_email:
-            user_email = 'anonymous'  # Fallback if no user id
+def find_response_option(response_type, config):
+    """Look up a response option from the config by name."""
+    return response_options(config).get(response_type)
 
-        # Retrieve user based on email to get the user_id
-        user = User.query.filter_by(email=user_email).first()
+def build_full_prompt(user_question, response_option):
+    """Append the response type's length/style prompt to the question."""
+    response_prompt = response_option['prompt'] if response_option else ""
+    return f"{user_question} {response_prompt}"
+
+def save_questions_and_answers(records, config):
+    """Persist many question/answer pairs in one transaction.
+
+    Each record is a dict with user_question, answer, response_type,
+    response_option, user_id, showcase and ip_address. Responses and queries
+    are each written as one multi-row INSERT, followed by a single commit.
+    """
+    try:
+        with timed("db_write"):
+            # Configured response types resolve from the cached id map without a DB read
+            response_type_ids = response_type_registry.resolve({record['response_type'] for record in records}, config)
+
+            response_records = [Response(response_text=record['answer']) for record in records]
+            db.session.add_all(response_records)
+            db.session.flush()  # One multi-row INSERT ... RETURNING for the new ids
+
+            queries = []
+            for record, response_record in zip(records, response_records):
+                queries.append(Query(
+                    query_text=record['user_question'],
+                    response_id=response_record.id,
+                    response_type_id=response_type_ids.get(record['response_type']),
+                    user_id=record['user_id'],
+                    showcase=record['showcase'],
+                    ip_address=record['ip_address'],
+                    settings_selected=record.get('settings_selected') or json.dumps(
+                        generation_settings(config, record.get('response_option'))
+                    ),  # Store the settings the answer was generated with
+                    **record.get('usage', {})
+                ))
+            db.session.add_all(queries)
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return queries
+
+def write_logged_answers(records):
+    """Flush a batch of queued question/answer records."""
+    save_questions_and_answers(records, get_config())
+
+answer_log = WriteBehindQueue('answer-log', write_logged_answers)
+
+def usage_record(result):
+    """Query log columns describing how an answer was produced; cache hits used no tokens."""
+    if result.get('cache_hit'):
+        return {'cache_hit': True, 'model': result.get('model')}
+    usage = result.get('usage') or {}
+    return {
+        'cache_hit': False,
+        'model': result.get('model'),
+        'prompt_tokens': usage.get('prompt_tokens'),
+        'completion_tokens': usage.get('completion_tokens'),
+        'total_tokens': usage.get('total_tokens'),
+        'prompt_tokens_estimate': result.get('prompt_estimate'),
+        'upstream_ms': result.get('upstream_ms'),
+    }
+
+def log_question_and_answer(user_question, response_text, response_type, response_option, user_id, showcase, ip_address, config, result=None):
+    """Record a question/answer pair, via the write-behind queue when it is enabled."""
+    answer_log.put({
+        'user_question': user_question,
+        'answer': response_text,
+        'response_type': response_type,
+        'response_option': response_option,
+        'user_id': user_id,
+        'showcase': showcase,
+        'ip_address': ip_address,
+        'settings_selected': json.dumps(generation_settings(config, response_option)),
+        'usage': usage_record(result) if result is not None else {},
+    })
+
+def prepare_ask(payload, user_email, config):
+    """Resolve the asking user and response option, and build the full prompt."""
+    user_question = payload.get('question')
+    response_type = payload.get('response_type')
+    showcase = payload.get('showcase', False)
+
+    # Get the User-ID (email) from the headers
+    if not user_email:
+        user_email = 'anonymous'  # Fallback if no user id
+
+    with timed("resolve"):
+        # Retrieve user based on email to get the user_id (cached for a short TTL)
+        user = identity_cache.get_by_email(user_email)
         if not user:
             raise ValueError(f"User not found for email: {user_email}")
 
@@ -69,46 +268,141 @@ def ask_question():
         logger.debug(f"Extracted response_type: {response_type}")
         logger.debug(f"User-ID: {user_id}")
 
-        response_option = next((option for option in config['options']['response'] if option['name'] == response_type), None)
-        response_prompt = response_option['prompt'] if response_option else ""
+        response_option = find_response_option(response_type, config)
+        full_prompt = build_full_prompt(user_question, response_option)
+    logger.info(f"Full prompt generated: {full_prompt}")
+
+    return {
+        'user_question': user_question,
+        'response_type': response_type,
+        'response_option': response_option,
+        'showcase': showcase,
+        'user_email': user_email,
+        'user_id': user_id,
+        'full_prompt': full_prompt,
+    }
+
+def answer_cache_key(user_question, response_type, response_option, data, config):
+    """Cache key for an answer: normalized question, response type, AI settings and corpus version."""
+    return response_cache.make_key(user_question, response_type, config['ai'], corpus_version(data), response_option)
+
+def generate_cached_response(full_prompt, user_question, response_type, response_option, data, config):
+    """Serve a cached answer when one exists, otherwise generate and cache it."""
+    cache_key = answer_cache_key(user_question, response_type, response_option, data, config)
+    response_result = response_cache.get(cache_key)
+    if response_result is not None:
+        logger.info(f"Answer served from cache for question: {user_question}")
+        return dict(response_result, cache_hit=True)
+
+    # Identical prompts already being generated share the one upstream call
+    flight_key = stable_hash({"prompt": full_prompt, "ai": config['ai'], "corpus": corpus_version(data)})
+
+    def generate():
+        result = generate_response(
+            full_prompt, data, config, retrieval_query=user_question, response_option=response_option
+        )
+        if is_cacheable(result):
+            response_cache.set(cache_key, result)
+        return result
+
+    response_result, shared = answer_flight.do(flight_key, generate)
+    if shared:
+        logger.info(f"Answer shared with an in-flight request for question: {user_question}")
+        return dict(response_result, cache_hit=True)
+    return response_result
+
+def format_sse(event, payload):
+    """Format a server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def stream_answer(full_prompt, user_question, response_type, response_option, user_id, showcase):
+    """Stream answer tokens as server-sent events, then persist and send the final result."""
+    # Pin the corpus/config for this request in case a reload happens mid-stream
+    request_data, request_config = get_data(), get_config()
+    ip_address = request.remote_addr
+
+    def events():
+        cache_key = answer_cache_key(user_question, response_type, response_option, request_data, request_config)
+        result = response_cache.get(cache_key)
+        if result is not None:
+            logger.info(f"Answer served from cache for question: {user_question}")
+            result = dict(result, cache_hit=True)
+            yield format_sse('token', {'text': result.get('answer', '')})
+        else:
+            result = {'answer': '', 'warning': '', 'links': []}
+            for kind, payload in stream_response(
+                full_prompt, request_data, request_config,
+                retrieval_query=user_question, response_option=response_option
+            ):
+                if kind == 'token':
+                    yield format_sse('token', {'text': payload})
+                else:
+                    result = payload
+            if is_cacheable(result):
+                response_cache.set(cache_key, result)
+
+        try:
+            log_question_and_answer(
+                user_question, result.get('answer', ''), response_type, response_option,
+                user_id, showcase, ip_address, request_config, result=result
+            )
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error saving streamed response: {e}", exc_info=True)
+            yield format_sse('error', {'error': 'Failed to save response.'})
+
+        logger.info(f"Response streamed successfully for question: {user_question}")
+        yield format_sse('done', {
+            'answer': result.get('answer', ''),
+            'warning': result.get('warning', ''),
+            'links': result.get('links', []),
+            'inference': result.get('inference', False)
+        })
+
+    return FlaskResponse(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@api_bp.route('/api/ask', methods=['POST'])
+@observe(name="api_ask_endpoint")
+@login_required
+@role_required(UserTypeEnum.USER.name, UserTypeEnum.ADMIN.name)
+def ask_question():
+    logger.debug('Entered /api/ask endpoint.')
+    logger.debug(f'Headers: {request.headers}')
+    logger.debug(f'Request data (raw): {request.data}')
+    logger.debug(f'JSON data (parsed): {request.get_json()}')
+
+    user_id = None
+    try:
+        stream = request.json.get('stream', False)
+        config = get_config()
+        ask = prepare_ask(request.json, request.headers.get('User-ID'), config)
+        user_question = ask['user_question']
+        response_type = ask['response_type']
+        response_option = ask['response_option']
+        showcase = ask['showcase']
+        user_email = ask['user_email']
+        user_id = ask['user_id']
+        full_prompt = ask['full_prompt']
 
-        full_prompt = f"{user_question} {response_prompt}"
-        logger.info(f"Full prompt generated: {full_prompt}")
+        if stream:
+            return stream_answer(full_prompt, user_question, response_type, response_option, user_id, showcase)
 
         # Generate the AI response
-        response_result = generate_response(full_prompt, data, config)
+        response_result = generate_cached_response(full_prompt, user_question, response_type, response_option, get_data(), config)
         response_text = response_result.get('answer', '')
         warning = response_result.get('warning', '')
         links = response_result.get('links', [])
 
         logger.info(f"Response generated successfully for question: {user_question}")
 
-        # Fetch or create response type in database
-        response_type_record = ResponseType.query.filter_by(name=response_type).first()
-        if not response_type_record and response_option:
-            response_type_record = ResponseType(name=response_option['name'], prompt=response_option['prompt'], about=response_option['about'])
-            db.session.add(response_type_record)
-            db.session.commit()
-
-        # Save the response
-        response_record = Response(
-            response_text=response_text
+        log_question_and_answer(
+            user_question, response_text, response_type, response_option,
+            user_id, showcase, request.remote_addr, config, result=response_result
         )
-        db.session.add(response_record)
-        db.session.commit()
-
-        # Save the query and link the response
-        query = Query(
-            query_text=user_question,
-            response_id=response_record.id,
-            response_type_id=response_type_record.id if response_type_record else None,
-            user_id=user_id,
-            showcase=showcase,
-            ip_address=request.remote_addr,
-            settings_selected=json.dumps(config['ai']['settings'])  # Store the settings
-        )
-        db.session.add(query)
-        db.session.commit()
 
         langfuse_context.update_current_observation(
             user_id=user_email,
@@ -143,9 +437,12 @@ def ask_question():
 @api_bp.route('/api/reload-config')
 def reload_config():
     """Reload the configuration from config.yml"""
-    global config
     try:
-        config = load_config()
+        new_config = load_config()
+        with _state_lock:
+            apply_config(new_config)
+        response_cache.invalidate()
+        response_type_registry.sync(new_config)
         logger.info("Configuration reloaded successfully.")
         return jsonify({'message': 'Configuration reloaded successfully.'})
     except Exception as e:
@@ -154,16 +451,61 @@ def reload_config():
 
 @api_bp.route('/api/reload-data')
 def reload_data():
-    """Reload the data from the data directory"""
-    global data
+    """Reload changed files from the data directory"""
     try:
-        data = load_data()
+        changed = refresh_data(force=True)
         logger.info("Data reloaded successfully.")
-        return jsonify({'message': 'Data reloaded successfully.'})
+        return jsonify({
+            'message': 'Data reloaded successfully.',
+            'changed': changed,
+            'corpus': corpus_loader.stats(),
+            'index': get_index(data).stats()
+        })
     except Exception as e:
         logger.error(f"Failed to reload data: {e}")
         return jsonify({'error': 'Failed to reload data.'}), 500
 
+@api_bp.route('/api/retrieval-stats')
+def retrieval_stats():
+    """Get build and lookup timing for the retrieval index"""
+    try:
+        return jsonify({'index': get_index(get_data()).stats(), 'corpus': corpus_loader.stats()})
+    except Exception as e:
+        logger.error(f"Failed to retrieve index stats: {e}")
+        return jsonify({'error': 'Failed to retrieve index stats.'}), 500
+
+@api_bp.route('/api/http-stats')
+def http_stats():
+    """Get connection pool and retry counters for the upstream AI client"""
+    try:
+        return jsonify({'client': http_client_stats()})
+    except Exception as e:
+        logger.error(f"Failed to retrieve HTTP client stats: {e}")
+        return jsonify({'error': 'Failed to retrieve HTTP client stats.'}), 500
+
+@api_bp.route('/api/cache-stats')
+def cache_stats():
+    """Get hit/miss counters for the answer cache"""
+    try:
+        return jsonify({
+            'cache': response_cache.stats(),
+            'single_flight': answer_flight.stats(),
+            'response_types': response_type_registry.stats(),
+            'identity': identity_cache.stats()
+        })
+    except Exception as e:
+        logger.error(f"Failed to retrieve cache stats: {e}")
+        return jsonify({'error': 'Failed to retrieve cache stats.'}), 500
+
+@api_bp.route('/api/write-behind-stats')
+def write_behind_stats():
+    """Get queue depth, lag and write counters for the query/response log writer"""
+    try:
+        return jsonify({'answer_log': answer_log.stats()})
+    except Exception as e:
+        logger.error(f"Failed to retrieve write-behind stats: {e}")
+        return jsonify({'error': 'Failed to retrieve write-behind stats.'}), 500
+
 @api_bp.route('/api/response-types')
 def get_response_types():
     """Get the list of response types from the configuration"""
@@ -173,7 +515,7 @@ def get_response_types():
                 'name': option['name'],
                 'about': option.get('about', ''),
             }
-            for option in config['options']['response']
+            for option in response_options(get_config()).values()
         ]
         logger.info("Response types retrieved successfully.")
         return jsonify({'response_types': response_types})
@@ -181,5 +523,5 @@ def get_response_types():
         logger.error(f"Failed to retrieve response types: {e}")
         return jsonify({'error': 'Failed to retrieve response types.'}), 500
 
-
-
+# Registers the batch, usage, history and search routes (and the batch and partition CLI commands) on api_bp
+from . import batch, usage, history, search, maintenance  # noqa: E402,F401
@@ -0,0 +1,211 @@
+# mastermind/backend/asgi.py
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.wsgi import WsgiToAsgi
+from flask import request
+from flask_login import current_user
+from werkzeug.exceptions import HTTPException
+
+import mastermind.backend as backend
+from mastermind.ai_model import generate_response_async
+from mastermind.models import UserTypeEnum
+from mastermind.utils import logger
+from mastermind.utils.cache import response_cache, is_cacheable, stable_hash
+from mastermind.utils.http_client import close_async_http_client
+from mastermind.utils.metrics import record_request
+from mastermind.utils.singleflight import AsyncSingleFlight
+
+ASK_ROLES = (UserTypeEnum.USER.name, UserTypeEnum.ADMIN.name)
+
+
+class AskASGIApp:
+    """ASGI entry point that serves POST /api/ask on an event loop.
+
+    Authentication, CSRF and the user lookup run through the Flask app in a
+    worker thread, the upstream LLM call is awaited without holding a thread,
+    and the Query/Response rows are written from a small thread pool. Every
+    other route, and streamed asks, are handed to the Flask app unchanged.
+    """
+
+    def __init__(self, flask_app, db_threads=None):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(db_threads or os.getenv('ASGI_DB_THREADS', 16)),
+            thread_name_prefix='ask-db'
+        )
+        self.flight = AsyncSingleFlight()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['path'] == '/api/ask' and scope['method'] == 'POST':
+            await self.ask(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                logger.info("🚀 Async ask pipeline started.")
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await close_async_http_client()
+                self.executor.shutdown(wait=True)
+                backend.answer_log.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def run_sync(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def ask(self, scope, receive, send):
+        started = time.perf_counter()
+
+        async def reply(status, payload):
+            await send_json(send, status, payload)
+            record_request('asgi_ask', status, time.perf_counter() - started)
+
+        body = await read_body(receive)
+        headers = decode_headers(scope)
+        remote_addr = client_address(scope, headers)
+
+        try:
+            payload = json.loads(body or b'{}')
+        except json.JSONDecodeError:
+            await reply(400, {'error': 'Invalid JSON body.'})
+            return
+
+        if payload.get('stream'):
+            # Streaming already frees the client early; let the Flask view handle it
+            async def replay():
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await self.wsgi(scope, replay, send)
+            return
+
+        try:
+            ask = await self.run_sync(self.authorize, scope, headers, body, remote_addr)
+        except HTTPException as e:
+            await reply(e.code, {'error': e.description})
+            return
+        except Exception as e:
+            logger.error(f"Error preparing async ask: {e}", exc_info=True)
+            await reply(500, {'error': 'Failed to generate response.'})
+            return
+
+        try:
+            # Pin the corpus/config for this request in case a reload happens meanwhile
+            data, config = backend.get_data(), backend.get_config()
+            result = await self.generate(ask, data, config)
+
+            await self.run_sync(self.persist, ask, result, remote_addr, config)
+            logger.info(f"Async response generated successfully for question: {ask['user_question']}")
+
+            await reply(200, {
+                'answer': result.get('answer', ''),
+                'warning': result.get('warning', ''),
+                'links': result.get('links', [])
+            })
+        except Exception as e:
+            logger.error(f"Error generating async response: {e}", exc_info=True)
+            await reply(500, {'error': 'Failed to generate response.'})
+
+    def authorize(self, scope, headers, body, remote_addr):
+        """Run session, CSRF and role checks through Flask, then build the prompt."""
+        with self.flask_app.test_request_context(
+            scope['path'],
+            method='POST',
+            headers=headers,
+            data=body,
+            environ_base={'REMOTE_ADDR': remote_addr}
+        ):
+            csrf = self.flask_app.extensions.get('csrf')
+            if csrf is not None:
+                csrf.protect()
+
+            if not current_user.is_authenticated:
+                logger.warning("401 Unauthorized: async ask without a session")
+                raise_http(401, 'Login required.')
+            if current_user.user_type.name.value not in ASK_ROLES:
+                logger.warning(f"403 Forbidden: User {current_user.email} does not have the required role {ASK_ROLES}")
+                raise_http(403, 'Forbidden.')
+
+            return backend.prepare_ask(request.get_json(), request.headers.get('User-ID'), backend.get_config())
+
+    async def generate(self, ask, data, config):
+        """Cached, coalesced, awaited upstream generation."""
+        cache_key = backend.answer_cache_key(
+            ask['user_question'], ask['response_type'], ask['response_option'], data, config
+        )
+        result = response_cache.get(cache_key)
+        if result is not None:
+            logger.info(f"Answer served from cache for question: {ask['user_question']}")
+            return dict(result, cache_hit=True)
+
+        flight_key = stable_hash({
+            "prompt": ask['full_prompt'], "ai": config['ai'], "corpus": backend.corpus_version(data)
+        })
+
+        async def generate():
+            generated = await generate_response_async(
+                ask['full_prompt'], data, config, retrieval_query=ask['user_question'],
+                response_option=ask['response_option']
+            )
+            if is_cacheable(generated):
+                response_cache.set(cache_key, generated)
+            return generated
+
+        result, shared = await self.flight.do(flight_key, generate)
+        return dict(result, cache_hit=True) if shared else result
+
+    def persist(self, ask, result, remote_addr, config):
+        with self.flask_app.app_context():
+            backend.log_question_and_answer(
+                ask['user_question'], result.get('answer', ''), ask['response_type'],
+                ask['response_option'], ask['user_id'], ask['showcase'], remote_addr, config, result=result
+            )
+
+
+def raise_http(code, description):
+    error = HTTPException(description=description)
+    error.code = code
+    raise error
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def decode_headers(scope):
+    return [(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']]
+
+
+def client_address(scope, headers):
+    """Remote address, honouring one proxy hop like the app's ProxyFix(x_for=1)."""
+    forwarded = next((value for name, value in headers if name.lower() == 'x-forwarded-for'), None)
+    if forwarded:
+        return forwarded.split(',')[-1].strip()
+    client = scope.get('client')
+    return client[0] if client else None
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('latin-1')),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,231 @@
+# mastermind/backend/batch.py
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import click
+from flask import request, jsonify, current_app, stream_with_context
+from flask import Response as FlaskResponse
+from flask_login import login_required, current_user
+
+import mastermind.backend as backend
+from mastermind.backend import api_bp
+from mastermind.models import User, UserTypeEnum
+from mastermind.utils import logger
+from mastermind.utils.auth import role_required
+
+DEFAULT_BATCH_SETTINGS = {
+    'max_items': 500,
+    'concurrency': 8,
+    'max_concurrency': 32,
+}
+
+
+def batch_settings(config):
+    return {**DEFAULT_BATCH_SETTINGS, **(config.get('batch') or {})}
+
+
+def expand_items(payload):
+    """Normalise a batch payload into a list of {question, response_type} items.
+
+    Accepts explicit `items`, or `questions` combined with every entry of
+    `response_types` (or a single `response_type`). Raises ValueError when the
+    payload is not shaped like that.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("The request body must be a JSON object.")
+    items = payload.get('items') or []
+    questions = payload.get('questions') or []
+    response_types = payload.get('response_types') or [payload.get('response_type')]
+    if not all(isinstance(value, list) for value in (items, questions, response_types)):
+        raise ValueError("items, questions and response_types must be lists.")
+    if not all(isinstance(item, dict) for item in items):
+        raise ValueError("Each entry of items must be an object with a question and a response_type.")
+
+    items = list(items)
+    for question in questions:
+        for response_type in response_types:
+            items.append({'question': question, 'response_type': response_type})
+    if not all(isinstance(item.get('question') or '', str) for item in items):
+        raise ValueError("Questions must be strings.")
+    return [item for item in items if item.get('question')]
+
+
+def unknown_response_types(items, config):
+    """Response types named by `items` that are not configured, which would be asked without a type prompt."""
+    options = backend.response_options(config)
+    return sorted({str(item.get('response_type')) for item in items if item.get('response_type') not in options})
+
+
+def run_batch(items, user_id, data, config, concurrency, showcase=False, ip_address=None):
+    """Fan items out to the LLM and yield `(index, result)` as each completes.
+
+    The corpus/config are pinned once for the whole batch, so the retrieval
+    index, system prompt and cache keys are shared by every item.
+    """
+    app = current_app._get_current_object()
+    prepared = []
+    for item in items:
+        response_option = backend.find_response_option(item.get('response_type'), config)
+        prepared.append({
+            'user_question': item['question'],
+            'response_type': item.get('response_type'),
+            'response_option': response_option,
+            'full_prompt': backend.build_full_prompt(item['question'], response_option),
+        })
+
+    def generate(entry):
+        with app.app_context():
+            return backend.generate_cached_response(
+                entry['full_prompt'], entry['user_question'], entry['response_type'],
+                entry['response_option'], data, config
+            )
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ask-batch') as pool:
+        futures = {pool.submit(generate, entry): index for index, entry in enumerate(prepared)}
+        for future in as_completed(futures):
+            index = futures[future]
+            entry = prepared[index]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {e}", exc_info=True)
+                result = {'answer': f"Exception: {str(e)}", 'warning': '', 'links': []}
+            yield index, {
+                'index': index,
+                'question': entry['user_question'],
+                'response_type': entry['response_type'],
+                'answer': result.get('answer', ''),
+                'warning': result.get('warning', ''),
+                'links': result.get('links', []),
+                '_record': {
+                    'user_question': entry['user_question'],
+                    'answer': result.get('answer', ''),
+                    'response_type': entry['response_type'],
+                    'response_option': entry['response_option'],
+                    'user_id': user_id,
+                    'showcase': showcase,
+                    'ip_address': ip_address,
+                    'usage': backend.usage_record(result),
+                }
+            }
+
+
+def public(result):
+    return {key: value for key, value in result.items() if not key.startswith('_')}
+
+
+def save_batch(results, config):
+    """Write every question/answer pair of a finished batch in one transaction."""
+    records = [result['_record'] for result in sorted(results, key=lambda result: result['index'])]
+    backend.save_questions_and_answers(records, config)
+    return len(records)
+
+
+@api_bp.route('/api/ask/batch', methods=['POST'])
+@login_required
+@role_required(UserTypeEnum.USER.name, UserTypeEnum.ADMIN.name)
+def ask_batch():
+    """Answer a list of questions with bounded concurrency; optionally stream NDJSON as they finish."""
+    payload = request.get_json(silent=True) or {}
+    data, config = backend.get_data(), backend.get_config()
+    settings = batch_settings(config)
+
+    try:
+        items = expand_items(payload)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not items:
+        return jsonify({'error': 'No questions provided.'}), 400
+    if len(items) > settings['max_items']:
+        return jsonify({'error': f"A batch may contain at most {settings['max_items']} questions."}), 400
+    unknown = unknown_response_types(items, config)
+    if unknown:
+        return jsonify({'error': f"Unknown response type(s): {', '.join(unknown)}."}), 400
+    try:
+        concurrency = int(payload.get('concurrency') or settings['concurrency'])
+    except (TypeError, ValueError):
+        return jsonify({'error': 'concurrency must be a number.'}), 400
+    concurrency = max(1, min(concurrency, settings['max_concurrency']))
+    showcase = payload.get('showcase', False)
+    user_id = current_user.user_id
+    ip_address = request.remote_addr
+    logger.info(f"Batch of {len(items)} questions from {current_user.email} (concurrency {concurrency}).")
+
+    if payload.get('stream'):
+        def lines():
+            results = []
+            started = time.perf_counter()
+            for _, result in run_batch(items, user_id, data, config, concurrency, showcase, ip_address):
+                results.append(result)
+                yield json.dumps(public(result)) + "\n"
+            try:
+                saved = save_batch(results, config)
+                yield json.dumps({'done': True, 'saved': saved, 'elapsed_s': round(time.perf_counter() - started, 3)}) + "\n"
+            except Exception as e:
+                logger.error(f"Error saving batch: {e}", exc_info=True)
+                yield json.dumps({'done': True, 'error': 'Failed to save responses.'}) + "\n"
+
+        return FlaskResponse(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+    try:
+        started = time.perf_counter()
+        results = [result for _, result in run_batch(items, user_id, data, config, concurrency, showcase, ip_address)]
+        saved = save_batch(results, config)
+        results.sort(key=lambda result: result['index'])
+        return jsonify({
+            'results': [public(result) for result in results],
+            'saved': saved,
+            'elapsed_s': round(time.perf_counter() - started, 3)
+        })
+    except Exception as e:
+        logger.error(f"Error generating batch: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to generate responses.'}), 500
+
+
+def read_items(source, response_types):
+    """Read questions from a text file (one per line) or JSON Lines of items."""
+    items = []
+    for line in source:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            items.append(json.loads(line))
+        else:
+            items.extend({'question': line, 'response_type': response_type} for response_type in response_types)
+    return items
+
+
+@api_bp.cli.command('ask-batch')
+@click.argument('questions', type=click.File('r'))
+@click.option('--user', 'user_email', required=True, help="Email of the user the queries are logged under.")
+@click.option('--response-type', 'response_types', multiple=True, help="Response type(s) for plain-text questions.")
+@click.option('--concurrency', type=int, default=None, help="Parallel upstream calls.")
+@click.option('--output', type=click.File('w'), default='-', help="Where to write JSON Lines results.")
+def ask_batch_command(questions, user_email, response_types, concurrency, output):
+    """Pre-generate answers for QUESTIONS (text or JSON Lines, '-' for stdin)."""
+    config = backend.get_config()
+    settings = batch_settings(config)
+    if not response_types:
+        response_types = (config['options']['response'][0]['name'],)
+
+    user = User.query.filter_by(email=user_email).first()
+    if not user:
+        raise click.ClickException(f"User not found for email: {user_email}")
+
+    items = read_items(questions, response_types)
+    unknown = unknown_response_types(items, config)
+    if unknown:
+        raise click.ClickException(f"Unknown response type(s): {', '.join(unknown)}.")
+    concurrency = concurrency or settings['concurrency']
+    click.echo(f"Answering {len(items)} questions with concurrency {concurrency}...", err=True)
+
+    started = time.perf_counter()
+    results = []
+    for _, result in run_batch(items, user.user_id, backend.get_data(), config, concurrency, ip_address='cli'):
+        results.append(result)
+        output.write(json.dumps(public(result)) + "\n")
+        output.flush()
+
+    saved = save_batch(results, config)
+    click.echo(f"Saved {saved} answers in {time.perf_counter() - started:.1f}s.", err=True)
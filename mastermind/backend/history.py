@@ -0,0 +1,23 @@
+# mastermind/backend/history.py
+from flask import request, jsonify
+from flask_login import login_required, current_user
+
+from mastermind.backend import api_bp
+from mastermind.models import Query, HISTORY_PAGE_SIZE
+from mastermind.utils import logger
+
+
+@api_bp.route('/api/history')
+@login_required
+def history():
+    """One page of the current user's queries and answers, newest first; follow `next_cursor` for older ones."""
+    try:
+        limit = int(request.args.get('limit', HISTORY_PAGE_SIZE))
+        queries, next_cursor = Query.history_page(current_user.user_id, request.args.get('cursor'), limit)
+    except ValueError as e:
+        logger.warning(f"Bad history request: {e}")
+        return jsonify({'error': 'Invalid cursor or limit.'}), 400
+    except Exception as e:
+        logger.error(f"Failed to retrieve query history: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to retrieve query history.'}), 500
+    return jsonify({'queries': Query.serialize_many(queries), 'next_cursor': next_cursor})
@@ -0,0 +1,28 @@
+# mastermind/backend/maintenance.py
+import click
+
+import mastermind.backend as backend
+from mastermind.backend import api_bp
+from mastermind.utils.partitions import partition_maintenance
+
+
+def maintain_partitions():
+    """Create the upcoming monthly log partitions and detach expired ones, per `config['partitions']`."""
+    backend.get_config()
+    result = partition_maintenance.run()
+    if result['detached']:
+        # Rows left with their partitions; the counters already account for it
+        backend.query_stats.invalidate()
+    return result
+
+
+@api_bp.cli.command('maintain-partitions')
+@click.option('--retention-months', type=int, default=None, help="Override partitions.retention_months for this run.")
+def maintain_partitions_command(retention_months):
+    """Create upcoming partitions of logs.queries / logs.responses and detach expired ones."""
+    backend.get_config()
+    if retention_months is not None:
+        partition_maintenance.settings['retention_months'] = retention_months
+    result = maintain_partitions()
+    click.echo(f"Created {len(result['created'])} partitions: {', '.join(result['created']) or '-'}", err=True)
+    click.echo(f"Detached {len(result['detached'])} partitions: {', '.join(result['detached']) or '-'}", err=True)
@@ -0,0 +1,90 @@
+# mastermind/backend/response_types.py
+import threading
+from sqlalchemy.dialects.postgresql import insert
+from mastermind.models import ResponseType, db
+from mastermind.utils import logger
+
+_options_index = (None, {})
+
+
+def response_options(config):
+    """Name-indexed view of `config['options']['response']`, rebuilt only when the config object changes."""
+    global _options_index
+    indexed_config, by_name = _options_index
+    if indexed_config is not config:
+        by_name = {option['name']: option for option in config['options']['response']}
+        # Swap in one assignment so concurrent readers never pair a config with another's view
+        _options_index = (config, by_name)
+    return by_name
+
+
+class ResponseTypeRegistry:
+    """Cached name → `ResponseType.id` map for the configured response options.
+
+    The options are upserted into `meta.response_types` once per config (on the
+    first write after startup, and on reload), after which resolving a
+    configured response type needs no database read.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.synced_config = None
+        self._lock = threading.Lock()
+        self._counters = {
+            "syncs": 0,
+            "lookups": 0,
+            "db_lookups": 0,
+        }
+
+    def sync(self, config):
+        """Upsert every configured option and cache the resulting ids. Needs an app context."""
+        options = list(response_options(config).values())
+        ids = {}
+        if options:
+            statement = insert(ResponseType).values([
+                {'name': option['name'], 'prompt': option['prompt'], 'about': option.get('about')}
+                for option in options
+            ])
+            statement = statement.on_conflict_do_update(
+                index_elements=[ResponseType.name],
+                set_={'prompt': statement.excluded.prompt, 'about': statement.excluded.about}
+            ).returning(ResponseType.id, ResponseType.name)
+            ids = {name: response_type_id for response_type_id, name in db.session.execute(statement)}
+            db.session.commit()
+
+        with self._lock:
+            self.ids = ids
+            self.synced_config = config
+            self._counters["syncs"] += 1
+        logger.info(f"🗂️ Synced {len(ids)} response types.")
+        return ids
+
+    def resolve(self, names, config):
+        """Map response type names to ids; unknown names fall back to one DB query."""
+        if self.synced_config is not config:
+            with self._lock:
+                needs_sync = self.synced_config is not config
+            if needs_sync:
+                self.sync(config)
+
+        ids = self.ids
+        resolved = {name: ids[name] for name in names if name in ids}
+        missing = [name for name in names if name not in ids and name is not None]
+        if missing:
+            # Names outside the config (e.g. retired options) are looked up but not cached
+            self._count("db_lookups")
+            for response_type in ResponseType.query.filter(ResponseType.name.in_(missing)):
+                resolved[response_type.name] = response_type.id
+        self._count("lookups")
+        return resolved
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counters[key] += amount
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "cached": len(self.ids)}
+
+
+response_type_registry = ResponseTypeRegistry()
@@ -0,0 +1,122 @@
+# mastermind/backend/search.py
+from datetime import date, timedelta
+from flask import request, jsonify
+from flask_login import login_required
+from sqlalchemy import func, union, cast, literal
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from mastermind.backend import api_bp
+from mastermind.models import db, Query, Response, ResponseType, User, UserTypeEnum
+from mastermind.utils import logger
+from mastermind.utils.auth import role_required
+
+# Must match the configuration of the generated tsvector columns
+SEARCH_CONFIG = 'english'
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+HEADLINE_OPTIONS = 'MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<mark>, StopSel=</mark>'
+# Escaped before highlighting, so the <mark> tags are the only markup in a headline
+HTML_ESCAPES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#39;'))
+
+
+def escape_html(text):
+    """SQL expression for `text` with HTML special characters escaped; `&amp;` and friends stay single words to the parser."""
+    for character, entity in HTML_ESCAPES:
+        text = func.replace(text, character, entity)
+    return text
+
+
+def search_queries(terms, page=1, per_page=SEARCH_PAGE_SIZE, since=None, until=None):
+    """Logged questions whose text or answer matches `terms`, best match first; returns `(rows, total)`.
+
+    `terms` uses web search syntax ("quoted phrases", or, -excluded). Matches
+    come from the GIN indexes on the generated tsvector columns, one lookup on
+    questions and one on answers; only the requested page is sorted out and
+    gets highlighted excerpts. `since`/`until` bound `created_at`, so
+    a recent window only reads its own monthly partitions.
+
+    `headline` is HTML: the answer text escaped, with matches wrapped in
+    `<mark>`. The other fields are plain text.
+    """
+    per_page = max(1, min(per_page, SEARCH_MAX_PAGE_SIZE))
+    page = max(1, page)
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, terms)
+
+    by_question = db.select(Query.id).where(Query.query_tsv.op('@@')(tsquery))
+    by_answer = (
+        db.select(Query.id)
+        .join(Response, Response.id == Query.response_id)
+        .where(Response.response_tsv.op('@@')(tsquery))
+    )
+    if since is not None:
+        by_question = by_question.where(Query.created_at >= since)
+        by_answer = by_answer.where(Query.created_at >= since)
+    if until is not None:
+        by_question = by_question.where(Query.created_at < until)
+        by_answer = by_answer.where(Query.created_at < until)
+    matches = union(by_question, by_answer).subquery()
+
+    # Questions weigh A and answers B, so ranking both together favours a match in the question
+    empty = cast(literal(''), TSVECTOR)
+    rank = func.ts_rank(
+        func.coalesce(Query.query_tsv, empty).op('||')(func.coalesce(Response.response_tsv, empty)), tsquery
+    )
+    ranked = (
+        # The total comes along with the page instead of matching everything a second time
+        db.select(Query.id, rank.label('rank'), func.count().over().label('total'))
+        .join(matches, matches.c.id == Query.id)
+        .outerjoin(Response, Response.id == Query.response_id)
+        .order_by(rank.desc(), Query.created_at.desc(), Query.id.desc())
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .subquery()
+    )
+    # Excerpts are built for the rows on this page only
+    statement = (
+        db.select(
+            Query.id, Query.query_text, Query.created_at, Response.response_text,
+            ResponseType.name.label('response_type'), User.email.label('user_email'), ranked.c.rank, ranked.c.total,
+            func.ts_headline(
+                SEARCH_CONFIG, escape_html(func.coalesce(Response.response_text, '')), tsquery, HEADLINE_OPTIONS
+            ).label('headline'),
+        )
+        .join(ranked, ranked.c.id == Query.id)
+        .join(User, User.user_id == Query.user_id)
+        .outerjoin(Response, Response.id == Query.response_id)
+        .outerjoin(ResponseType, ResponseType.id == Query.response_type_id)
+        .order_by(ranked.c.rank.desc(), Query.created_at.desc(), Query.id.desc())
+    )
+    rows, total = [], 0
+    for row in db.session.execute(statement).mappings():
+        result = dict(row)
+        total = result.pop('total')
+        result['created_at'] = result['created_at'].isoformat()
+        result['rank'] = round(float(result['rank']), 6)
+        rows.append(result)
+    if not rows and page > 1:
+        # Past the last page: count the matches on their own
+        total = db.session.execute(db.select(func.count()).select_from(matches)).scalar()
+    return rows, total
+
+
+@api_bp.route('/api/search')
+@login_required
+@role_required(UserTypeEnum.ADMIN.name)
+def search():
+    """Full-text search over every logged question and answer, ranked, a page at a time."""
+    terms = request.args.get('q', '').strip()
+    if not terms:
+        return jsonify({'error': 'q is required.'}), 400
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = max(1, min(int(request.args.get('per_page', SEARCH_PAGE_SIZE)), SEARCH_MAX_PAGE_SIZE))
+        since = date.fromisoformat(request.args['since']) if request.args.get('since') else None
+        until = date.fromisoformat(request.args['until']) + timedelta(days=1) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be numbers, since and until YYYY-MM-DD dates.'}), 400
+    try:
+        rows, total = search_queries(terms, page, per_page, since, until)
+        return jsonify({'q': terms, 'page': page, 'per_page': per_page, 'total': total, 'results': rows})
+    except Exception as e:
+        logger.error(f"Failed to search queries: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to search queries.'}), 500
@@ -0,0 +1,94 @@
+# mastermind/backend/usage.py
+from datetime import datetime, timedelta
+from flask import request, jsonify
+from flask_login import login_required
+from sqlalchemy import func, case
+
+import mastermind.backend as backend
+from mastermind.backend import api_bp
+from mastermind.models import db, Query, ResponseType, User, UserTypeEnum
+from mastermind.utils import logger
+from mastermind.utils.auth import role_required
+
+# Column each `group_by` name groups the query log by
+GROUPS = {
+    'day': lambda: func.date_trunc('day', Query.timestamp),
+    'user': lambda: User.email,
+    'response_type': lambda: ResponseType.name,
+}
+
+
+def query_cost(prompt_tokens, completion_tokens, pricing):
+    """USD cost of the given tokens under `ai.pricing` (per million tokens)."""
+    pricing = pricing or {}
+    return (
+        (prompt_tokens or 0) * pricing.get('prompt_per_million', 0)
+        + (completion_tokens or 0) * pricing.get('completion_per_million', 0)
+    ) / 1_000_000
+
+
+def usage_summary(since, until=None, group_by=('day',), pricing=None):
+    """Aggregate the logged queries between `since` and `until` by day, user and/or response type.
+
+    Each row counts queries and cache hits, sums the tokens the AI API reported
+    (and the local prompt estimate), and gives upstream latency and cost.
+    """
+    keys = [GROUPS[name]().label(name) for name in group_by]
+    upstream_calls = func.count(Query.upstream_ms)
+    statement = (
+        db.select(
+            *keys,
+            func.count(Query.id).label('queries'),
+            func.sum(case((Query.cache_hit.is_(True), 1), else_=0)).label('cache_hits'),
+            upstream_calls.label('upstream_calls'),
+            func.sum(Query.prompt_tokens).label('prompt_tokens'),
+            func.sum(Query.completion_tokens).label('completion_tokens'),
+            func.sum(Query.total_tokens).label('total_tokens'),
+            func.sum(Query.prompt_tokens_estimate).label('prompt_tokens_estimate'),
+            func.avg(Query.upstream_ms).label('avg_upstream_ms'),
+            func.percentile_cont(0.95).within_group(Query.upstream_ms).label('p95_upstream_ms'),
+        )
+        .select_from(Query)
+        .join(User, User.user_id == Query.user_id)
+        .outerjoin(ResponseType, ResponseType.id == Query.response_type_id)
+        .where(Query.timestamp >= since)
+        .group_by(*keys)
+        .order_by(*keys)
+    )
+    if until is not None:
+        statement = statement.where(Query.timestamp < until)
+
+    rows = []
+    for row in db.session.execute(statement).mappings():
+        summary = dict(row)
+        if 'day' in summary:
+            summary['day'] = summary['day'].date().isoformat()
+        for name in ('prompt_tokens', 'completion_tokens', 'total_tokens', 'prompt_tokens_estimate'):
+            summary[name] = int(summary[name] or 0)
+        for name in ('avg_upstream_ms', 'p95_upstream_ms'):
+            summary[name] = round(float(summary[name]), 1) if summary[name] is not None else None
+        summary['cost_usd'] = round(query_cost(summary['prompt_tokens'], summary['completion_tokens'], pricing), 6)
+        rows.append(summary)
+    return rows
+
+
+@api_bp.route('/api/usage')
+@login_required
+@role_required(UserTypeEnum.ADMIN.name)
+def usage():
+    """Token usage, latency and cost of recent queries, grouped by day, user and/or response type."""
+    try:
+        days = max(1, min(int(request.args.get('days', 7)), 366))
+        group_by = [name for name in request.args.get('group_by', 'day').split(',') if name]
+        unknown = [name for name in group_by if name not in GROUPS]
+        if unknown or not group_by:
+            return jsonify({'error': f"group_by must be a comma-separated list of {', '.join(GROUPS)}."}), 400
+
+        since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+        rows = usage_summary(since, group_by=group_by, pricing=backend.get_config()['ai'].get('pricing'))
+        return jsonify({'since': since.date().isoformat(), 'group_by': group_by, 'usage': rows})
+    except ValueError:
+        return jsonify({'error': 'days must be a number.'}), 400
+    except Exception as e:
+        logger.error(f"Failed to summarize usage: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to summarize usage.'}), 500
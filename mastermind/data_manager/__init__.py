@@ -1,3 +1,3 @@
 # mastermind/data_manager/__init__.py
 
-from .load import load_data
+from .load import load_data, corpus_version, Corpus, CorpusLoader, corpus_loader
@@ -1,32 +1,169 @@
 # mastermind/data_manager/load/__init__.py
 import os
+import hashlib
+import threading
+import time
 from mastermind import logger
 
-def load_data():
-    """Load data from markdown files in the data directory."""
-    logger.debug("📂 Starting data loading process. Ready for it?")
-    data = {}
-    base_dir = 'data'
+_version = {"data": None, "version": None}
+_version_lock = threading.Lock()
+
+
+class Corpus(dict):
+    """Read-only snapshot of the corpus: document key -> markdown text.
+
+    Carries the content hash of every document and of the whole snapshot
+    (`version`), and keeps the structures derived from it (like the retrieval
+    index) so they are built once per snapshot. Reloading produces a new
+    snapshot instead of changing this one.
+    """
+
+    def __init__(self, documents, hashes):
+        super().__init__(documents)
+        self.hashes = hashes
+        digest = hashlib.sha256()
+        for key in sorted(hashes):
+            digest.update(key.encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(hashes[key].encode('utf-8'))
+            digest.update(b'\0')
+        self.version = digest.hexdigest()[:16]
+        self.index = None
+        self.index_lock = threading.Lock()
+        self.tokens = None
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Corpus snapshots are read-only; load a new snapshot instead.")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class CorpusLoader:
+    """Loads the markdown files under `base_dir` into `Corpus` snapshots, incrementally.
 
-    if not os.path.exists(base_dir):
-        logger.error("❌ Data directory does not exist. We are never ever getting back together.")
-        return data
+    Files are fingerprinted by modification time and size, and only files whose
+    fingerprint changed are read again; a re-read file with the same content
+    hash is not a change. When nothing changed, `load()` returns the current
+    snapshot itself, so callers can compare snapshots by identity.
+    """
+
+    def __init__(self, base_dir='data'):
+        self.base_dir = base_dir
+        self.files = {}  # key -> (mtime_ns, size, content hash, text)
+        self.snapshot = None
+        self.last_changes = {"added": [], "modified": [], "removed": []}
+        self.loads = 0
+        self.files_read = 0
+        self.last_load_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def scan(self):
+        """Map each markdown file's key to its path, mtime and size."""
+        entries = {}
+        for root, _, files in os.walk(self.base_dir):
+            for file in files:
+                if file.endswith('.md'):
+                    path = os.path.join(root, file)
+                    try:
+                        stat = os.stat(path)
+                    except OSError as e:
+                        logger.error(f"🚫 Error reading file info: {path}. Error: {e}.")
+                        continue
+                    entries[os.path.relpath(path, self.base_dir)] = (path, stat.st_mtime_ns, stat.st_size)
+        return entries
+
+    def load(self):
+        """Return the corpus snapshot for the files on disk, re-reading only changed files."""
+        with self._lock:
+            started = time.perf_counter()
+            if not os.path.exists(self.base_dir):
+                logger.error("❌ Data directory does not exist. We are never ever getting back together.")
+                entries = {}
+            else:
+                entries = self.scan()
+
+            files = {}
+            changes = {"added": [], "modified": [], "removed": sorted(set(self.files) - set(entries))}
+            for key in sorted(entries):
+                path, mtime_ns, size = entries[key]
+                previous = self.files.get(key)
+                if previous is not None and previous[:2] == (mtime_ns, size):
+                    files[key] = previous
+                    continue
 
-    for root, _, files in os.walk(base_dir):
-        for file in files:
-            if file.endswith('.md'):
-                path = os.path.join(root, file)
                 try:
                     with open(path, 'r', encoding='utf-8') as f:
-                        key = os.path.relpath(path, base_dir)
-                        data[key] = f.read()
-                        logger.debug(f"📄 Loaded data from file: {path}. Look what you made me do!")
+                        text = f.read()
+                    self.files_read += 1
+                    logger.debug(f"📄 Loaded data from file: {path}. Look what you made me do!")
                 except Exception as e:
                     logger.error(f"🚫 Error loading file: {path}. Error: {e}. You belong with me...or not.")
+                    if previous is not None:
+                        files[key] = previous  # Keep serving the last good copy
+                    continue
+
+                digest = content_hash(text)
+                files[key] = (mtime_ns, size, digest, text)
+                if previous is None:
+                    changes["added"].append(key)
+                elif previous[2] != digest:
+                    changes["modified"].append(key)
+
+            self.files = files
+            self.loads += 1
+            if self.snapshot is None or any(changes.values()):
+                self.snapshot = Corpus(
+                    {key: entry[3] for key, entry in files.items()},
+                    {key: entry[2] for key, entry in files.items()}
+                )
+                self.last_changes = changes
+                if self.snapshot:
+                    logger.info(
+                        f"📚 Corpus {self.snapshot.version} loaded: {len(changes['added'])} added, "
+                        f"{len(changes['modified'])} modified, {len(changes['removed'])} removed. Everything has changed!"
+                    )
+                else:
+                    logger.warning("⚠️ No markdown files found or data is empty. I knew you were trouble.")
+            self.last_load_seconds = time.perf_counter() - started
+            return self.snapshot
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            "version": snapshot.version if snapshot is not None else None,
+            "documents": len(snapshot) if snapshot is not None else 0,
+            "loads": self.loads,
+            "files_read": self.files_read,
+            "last_changes": self.last_changes,
+            "last_load_ms": round(self.last_load_seconds * 1000, 3),
+        }
+
+
+def load_data():
+    """Load data from markdown files in the data directory."""
+    logger.debug("📂 Starting data loading process. Ready for it?")
+    return CorpusLoader('data').load()
+
+def corpus_version(data):
+    """Content hash of a loaded corpus, memoized for the most recent `data` dict."""
+    if isinstance(data, Corpus):
+        return data.version
+    with _version_lock:
+        if _version["data"] is not data:
+            digest = hashlib.sha256()
+            for key in sorted(data):
+                digest.update(key.encode('utf-8'))
+                digest.update(b'\0')
+                digest.update(data[key].encode('utf-8'))
+                digest.update(b'\0')
+            _version["data"] = data
+            _version["version"] = digest.hexdigest()[:16]
+        return _version["version"]
 
-    if data:
-        logger.info("📚 Data loaded successfully from markdown files. Everything has changed!")
-    else:
-        logger.warning("⚠️ No markdown files found or data is empty. I knew you were trouble.")
 
-    return data
+# The process-wide loader behind the app's corpus
+corpus_loader = CorpusLoader('data')
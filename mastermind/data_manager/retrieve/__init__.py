@@ -0,0 +1,308 @@
+# mastermind/data_manager/retrieve/__init__.py
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from mastermind.utils import logger
+from mastermind.data_manager.load import Corpus
+
+# BM25 tuning constants (the usual Okapi defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+HEADING_PATTERN = re.compile(r"^#{1,6}\s+(.*)$")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers him his how i if
+in into is it its itself just me more most my myself no nor not now of off on
+once only or other our ours out over own same she should so some such than that
+the their theirs them then there these they this those through to too under
+until up very was we were what when where which while who whom why will with
+would you your yours
+""".split())
+
+
+def tokenize(text):
+    """Lowercase and split text into searchable terms, dropping stopwords."""
+    return [term for term in TOKEN_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) used for prompt budgeting."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def document_tokens(data):
+    """Estimated tokens of each corpus document; computed once per `Corpus` snapshot."""
+    if isinstance(data, Corpus):
+        if data.tokens is None:
+            data.tokens = {key: estimate_tokens(text) for key, text in data.items()}
+        return data.tokens
+    return {key: estimate_tokens(text) for key, text in data.items()}
+
+
+class Chunk:
+    """A heading/paragraph sized slice of a corpus document."""
+
+    def __init__(self, doc_key, position, text, source=None, title=None, heading=None):
+        self.doc_key = doc_key
+        self.position = position
+        self.text = text
+        self.source = source
+        self.title = title
+        self.heading = heading
+        self.tokens = estimate_tokens(text)
+        self._terms = None
+
+    @property
+    def terms(self):
+        """Term frequencies for indexing; title and heading terms count towards every chunk of the section."""
+        if self._terms is None:
+            self._terms = Counter(tokenize(" ".join(filter(None, [self.title, self.heading, self.text]))))
+        return self._terms
+
+    def __repr__(self):
+        return f"<Chunk {self.doc_key}#{self.position}>"
+
+
+def chunk_document(doc_key, text):
+    """Split a markdown document into heading/paragraph chunks.
+
+    The `Source:` and `Title:` header lines are lifted off the document and
+    attached to every chunk so citations survive retrieval.
+    """
+    source = None
+    title = None
+    heading = None
+    chunks = []
+    paragraph = []
+
+    def flush():
+        body = "\n".join(paragraph).strip()
+        paragraph.clear()
+        if body:
+            chunks.append(Chunk(doc_key, len(chunks), body, source=source, title=title, heading=heading))
+
+    for line in text.splitlines():
+        stripped = line.strip()
+
+        if stripped.startswith("Source:") and source is None and not chunks:
+            source = stripped[len("Source:"):].strip()
+            continue
+        if stripped.startswith("Title:") and title is None and not chunks:
+            title = stripped[len("Title:"):].strip()
+            continue
+        if stripped == "###":
+            # End-of-document marker used by the scraped pages
+            continue
+
+        heading_match = HEADING_PATTERN.match(stripped)
+        if heading_match:
+            flush()
+            heading = heading_match.group(1).strip()
+            continue
+
+        if not stripped:
+            flush()
+            continue
+
+        paragraph.append(line.rstrip())
+
+    flush()
+    return chunks
+
+
+def chunk_corpus(data):
+    """Chunk every document of a `load_data()` dictionary, in a stable order."""
+    chunks = []
+    for doc_key in sorted(data):
+        chunks.extend(chunk_document(doc_key, data[doc_key]))
+    return chunks
+
+
+class BM25Index:
+    """Inverted BM25 index over corpus chunks."""
+
+    def __init__(self, chunks, k1=BM25_K1, b=BM25_B):
+        started = time.perf_counter()
+
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.lengths = []
+
+        for chunk_id, chunk in enumerate(chunks):
+            terms = chunk.terms
+            self.lengths.append(sum(terms.values()))
+            for term, freq in terms.items():
+                self.postings[term].append((chunk_id, freq))
+
+        total = len(chunks)
+        self.avg_length = (sum(self.lengths) / total) if total else 0.0
+        self.idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+        self.build_seconds = time.perf_counter() - started
+        self.lookups = 0
+        self.lookup_seconds_total = 0.0
+        self.last_lookup_seconds = 0.0
+        self._lock = threading.Lock()
+
+        logger.info(
+            f"🔎 Built retrieval index: {total} chunks, {len(self.postings)} terms "
+            f"in {self.build_seconds * 1000:.2f} ms."
+        )
+
+    def search(self, query, top_k=None):
+        """Return `(chunk, score)` pairs ranked by BM25 score, best first."""
+        started = time.perf_counter()
+
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for chunk_id, freq in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / self.avg_length)
+                scores[chunk_id] += idf * freq * (self.k1 + 1) / (freq + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if top_k is not None:
+            ranked = ranked[:top_k]
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.lookups += 1
+            self.lookup_seconds_total += elapsed
+            self.last_lookup_seconds = elapsed
+
+        logger.debug(f"🔎 Retrieval lookup matched {len(scores)} chunks in {elapsed * 1000:.3f} ms.")
+        return [(self.chunks[chunk_id], score) for chunk_id, score in ranked]
+
+    def select(self, query, top_k=8, token_budget=2000):
+        """Pick the best chunks for a query that fit inside the token budget.
+
+        Falls back to corpus order when nothing in the query matches, so the
+        model is never sent an empty context.
+        """
+        ranked = [chunk for chunk, _ in self.search(query)]
+        if not ranked:
+            ranked = list(self.chunks)
+
+        selected = []
+        used = 0
+        for chunk in ranked:
+            if len(selected) >= top_k:
+                break
+            if used + chunk.tokens > token_budget:
+                continue
+            selected.append(chunk)
+            used += chunk.tokens
+
+        return selected
+
+    def render_context(self, query, top_k=8, token_budget=2000):
+        """Render the selected chunks grouped by document with their sources."""
+        selected = self.select(query, top_k=top_k, token_budget=token_budget)
+        return render_chunks(selected)
+
+    def stats(self):
+        """Timing and size figures for monitoring."""
+        with self._lock:
+            lookups = self.lookups
+            total = self.lookup_seconds_total
+            last = self.last_lookup_seconds
+
+        return {
+            "documents": len({chunk.doc_key for chunk in self.chunks}),
+            "chunks": len(self.chunks),
+            "terms": len(self.postings),
+            "build_ms": round(self.build_seconds * 1000, 3),
+            "lookups": lookups,
+            "last_lookup_ms": round(last * 1000, 3),
+            "avg_lookup_ms": round((total / lookups) * 1000, 3) if lookups else 0.0,
+        }
+
+
+def render_chunks(chunks):
+    """Render chunks back into prompt text, keeping each document's `Source:` line."""
+    by_document = defaultdict(list)
+    for chunk in chunks:
+        by_document[chunk.doc_key].append(chunk)
+
+    sections = []
+    for doc_key in sorted(by_document):
+        doc_chunks = sorted(by_document[doc_key], key=lambda chunk: chunk.position)
+        first = doc_chunks[0]
+        header = []
+        if first.source:
+            header.append(f"Source: {first.source}")
+        if first.title:
+            header.append(f"Title: {first.title}")
+        body = "\n\n".join(chunk.text for chunk in doc_chunks)
+        sections.append("\n".join(header) + "\n\n" + body if header else body)
+
+    return "\n\n".join(sections)
+
+
+_active = {"data": None, "index": None}
+_active_lock = threading.Lock()
+
+
+# (document key, content hash) -> chunks, for the documents of the last indexed snapshot
+_chunk_cache = {}
+_chunk_cache_lock = threading.Lock()
+
+
+def snapshot_chunks(corpus):
+    """Chunk a `Corpus` snapshot, reusing the chunks (and their term counts) of unchanged documents."""
+    with _chunk_cache_lock:
+        cache = {}
+        chunks = []
+        reused = 0
+        for doc_key in sorted(corpus):
+            key = (doc_key, corpus.hashes[doc_key])
+            doc_chunks = _chunk_cache.get(key)
+            if doc_chunks is None:
+                doc_chunks = chunk_document(doc_key, corpus[doc_key])
+            else:
+                reused += 1
+            cache[key] = doc_chunks
+            chunks.extend(doc_chunks)
+        _chunk_cache.clear()
+        _chunk_cache.update(cache)
+    logger.debug(f"🔎 Reused the chunks of {reused} of {len(corpus)} documents.")
+    return chunks
+
+
+def build_index(data):
+    """Chunk the corpus and build a fresh BM25 index for it."""
+    if isinstance(data, Corpus):
+        return BM25Index(snapshot_chunks(data))
+    return BM25Index(chunk_corpus(data))
+
+
+def get_index(data):
+    """Return the index for `data`.
+
+    A `Corpus` snapshot keeps its own index, built on first use; for plain
+    dicts the most recent one is kept and rebuilt when a different dict is passed in.
+    """
+    if isinstance(data, Corpus):
+        with data.index_lock:
+            if data.index is None:
+                data.index = build_index(data)
+            return data.index
+
+    with _active_lock:
+        if _active["data"] is not data or _active["index"] is None:
+            _active["index"] = build_index(data)
+            _active["data"] = data
+        return _active["index"]
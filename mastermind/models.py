@@ -1,12 +1,13 @@
 # mastermind/models.py
+import base64
 from datetime import datetime
 from flask import request, current_app
 from werkzeug.security import generate_password_hash, check_password_hash
 import uuid
 import enum
-from sqlalchemy import (func, Column, String, Integer, DateTime, Boolean, Text, ForeignKey, Index)
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (func, tuple_, Column, String, Integer, DateTime, Boolean, Text, ForeignKey, Index, Computed)
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from marshmallow import Schema, fields, validate
@@ -120,7 +121,7 @@ class User(db.Model, UserMixin):
     def serialize(self):
         """Serialize the User object to a dictionary."""
         logger.debug(f"Serializing user {self.email}")
-        return UserSchema().dump(self)
+        return user_schema.dump(self)
 
     def __repr__(self):
         return f"<User {self.email}>"
@@ -131,7 +132,7 @@ Index('idx_users_email', User.email)
 class QuerySchema(Schema):
     id = fields.Integer()
     query_text = fields.String(required=True)
-    response_text = fields.String()  # Include response_text
+    response_text = fields.Function(lambda query: query.response.response_text if query.response else None)
     response_type = fields.Nested('ResponseTypeSchema', only=['name'])  # Reference ResponseTypeSchema
     settings_selected = fields.String()
     timestamp = fields.DateTime()
@@ -141,56 +142,159 @@ class QuerySchema(Schema):
     created_at = fields.DateTime()
     updated_at = fields.DateTime()
 
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
 class Query(db.Model):
     """Query model for storing user queries and their responses."""
     __tablename__ = 'queries'
     __table_args__ = {'schema': 'logs'}
 
+    # Partitioned by month on created_at, so the table's primary key is (id, created_at); ids stay unique
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, comment="Auto incrementing primary key")
     query_text = db.Column(db.Text, nullable=False, comment="Text of the query made by the user")
-    response_id = db.Column(db.Integer, db.ForeignKey('logs.responses.id', ondelete='CASCADE'), nullable=True, comment="ID of the response received")
+    # No foreign key: logs.responses is partitioned, and a trigger deletes the query along with its response
+    response_id = db.Column(db.Integer, nullable=True, comment="ID of the response received")
     response_type_id = db.Column(db.Integer, db.ForeignKey('meta.response_types.id', ondelete='SET NULL'), nullable=True, comment="Foreign key to the response type")
     settings_selected = db.Column(db.String(255), nullable=True, comment="Settings used when making the query")
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, comment="Time when query was made")
     ip_address = db.Column(db.String(45), nullable=True, comment="IP address from which the query was made")
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('entities.users.user_id', ondelete='CASCADE'), nullable=False, comment="ID of the user who made the query")
     showcase = db.Column(db.Boolean, default=False, nullable=False, comment="Indicates whether the query is marked for showcase")
+    model = db.Column(db.String(100), nullable=True, comment="AI model that generated the answer")
+    prompt_tokens = db.Column(db.Integer, nullable=True, comment="Prompt tokens reported by the AI API")
+    completion_tokens = db.Column(db.Integer, nullable=True, comment="Completion tokens reported by the AI API")
+    total_tokens = db.Column(db.Integer, nullable=True, comment="Total tokens reported by the AI API")
+    prompt_tokens_estimate = db.Column(db.Integer, nullable=True, comment="Prompt tokens estimated locally when packing the prompt")
+    upstream_ms = db.Column(db.Integer, nullable=True, comment="Time the AI API took to answer, in milliseconds")
+    cache_hit = db.Column(db.Boolean, nullable=True, comment="Answer was reused from the cache or an identical in-flight request")
     created_at = db.Column(db.DateTime, default=func.now(), nullable=False, comment="Record creation date")
     updated_at = db.Column(db.DateTime, default=func.now(), nullable=False, comment="Record last update date")
+    # Maintained by the database for full-text search; deferred so loading queries skips it
+    query_tsv = deferred(db.Column(TSVECTOR, Computed("setweight(to_tsvector('english', query_text), 'A')", persisted=True), comment="Search vector of the query text"))
 
-    response = db.relationship('Response', back_populates='query', uselist=False)  # Establish a bidirectional relationship with Response
+    response = db.relationship(
+        'Response', primaryjoin='foreign(Query.response_id) == Response.id', back_populates='query', uselist=False
+    )  # Establish a bidirectional relationship with Response
     response_type = db.relationship('ResponseType', lazy='joined')
 
+    @classmethod
+    def with_answers(cls):
+        """Query loading each row's response (and response type) in the same SELECT."""
+        return cls.query.options(db.joinedload(cls.response))
+
+    @classmethod
+    def history_page(cls, user_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+        """One page of a user's queries, newest first, with their responses; returns `(queries, next_cursor)`.
+
+        Keyset pagination on (created_at, id) over idx_queries_user_created, so a
+        page costs the same however far back in the history it is. Raises
+        ValueError for a malformed cursor.
+        """
+        limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+        page = cls.with_answers().filter(cls.user_id == user_id)
+        if cursor:
+            created_at, query_id = decode_history_cursor(cursor)
+            page = page.filter(tuple_(cls.created_at, cls.id) < (created_at, query_id))
+        queries = page.order_by(cls.created_at.desc(), cls.id.desc()).limit(limit + 1).all()
+        next_cursor = encode_history_cursor(queries[limit - 1]) if len(queries) > limit else None
+        return queries[:limit], next_cursor
+
+    @staticmethod
+    def serialize_many(queries):
+        """Serialize many Query objects at once; load them with `with_answers()` to avoid a SELECT per row."""
+        return queries_schema.dump(queries)
+
     def serialize(self):
         """Serialize the Query object to a dictionary."""
-        logger.debug(f"Serializing query {self.id}")
-        serialized_data = QuerySchema().dump(self)
-        serialized_data["response_text"] = self.response.response_text if self.response else None
-        return serialized_data
+        return query_schema.dump(self)
 
     def __repr__(self):
         return f"<Query {self.id} by User {self.user_id}>"
 
+# Usage reports filter and group by query time
+Index('idx_queries_timestamp', Query.timestamp)
+# A user's history, newest first
+Index('idx_queries_user_created', Query.user_id, Query.created_at.desc(), Query.id.desc())
+# Full-text search over questions, and from a matching answer back to its question
+Index('idx_queries_query_tsv', Query.query_tsv, postgresql_using='gin')
+Index('idx_queries_response_id', Query.response_id)
+
+def encode_history_cursor(query):
+    """Opaque cursor pointing just past `query` in a user's history."""
+    raw = f"{query.created_at.isoformat()}|{query.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_history_cursor(cursor):
+    """The (created_at, id) a history cursor points past; raises ValueError when it is malformed."""
+    try:
+        created_at, query_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(query_id)
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid history cursor: {cursor}") from e
+
+class QueryCounter(db.Model):
+    """Running counts over logs.queries, maintained by triggers on that table.
+
+    Each counter is spread over several `shard` rows so concurrent writers do
+    not queue on one row; its value is the sum of its rows.
+    """
+    __tablename__ = 'query_counters'
+    __table_args__ = {'schema': 'logs'}
+
+    name = db.Column(db.String(50), primary_key=True, comment="Counter name (total, showcase)")
+    shard = db.Column(db.SmallInteger, primary_key=True, default=0, comment="Row of the counter a connection updates")
+    value = db.Column(db.BigInteger, nullable=False, default=0, comment="Current count")
+    updated_at = db.Column(db.DateTime, default=func.now(), nullable=False, comment="Record last update date")
+
+    def __repr__(self):
+        return f"<QueryCounter {self.name}[{self.shard}]={self.value}>"
+
+    @classmethod
+    def totals(cls):
+        """{name: value} with each counter's shards added up."""
+        rows = db.session.query(cls.name, func.sum(cls.value)).group_by(cls.name).all()
+        return {name: int(value) for name, value in rows}
+
+class ShowcaseQuery(db.Model):
+    """Ids of the queries marked for showcase, maintained by triggers on logs.queries."""
+    __tablename__ = 'showcase_queries'
+    __table_args__ = {'schema': 'logs'}
+
+    query_id = db.Column(db.Integer, primary_key=True, comment="ID of a query marked for showcase")
+    created_at = db.Column(db.DateTime, default=func.now(), nullable=False, comment="Record creation date")
+
+    def __repr__(self):
+        return f"<ShowcaseQuery {self.query_id}>"
+
 class Response(db.Model):
     """Response model for storing responses separately if needed."""
     __tablename__ = 'responses'
     __table_args__ = {'schema': 'logs', 'extend_existing': True}
 
+    # Partitioned like logs.queries; the table's primary key is (id, created_at)
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, comment="Auto incrementing primary key")
     response_text = db.Column(db.Text, nullable=False, comment="Response text")
     created_at = db.Column(db.DateTime, default=func.now(), nullable=False, comment="Record creation date")
     updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now(), nullable=False, comment="Record last update date")
+    # Maintained by the database for full-text search; deferred so loading responses skips it
+    response_tsv = deferred(db.Column(TSVECTOR, Computed("setweight(to_tsvector('english', response_text), 'B')", persisted=True), comment="Search vector of the response text"))
 
-    query = db.relationship('Query', back_populates='response', uselist=False)  # Establish bidirectional relationship without FK
+    query = db.relationship(
+        'Query', primaryjoin='foreign(Query.response_id) == Response.id', back_populates='response', uselist=False
+    )  # Establish bidirectional relationship without FK
 
     def serialize(self):
         """Serialize the Response object to a dictionary."""
         logger.debug(f"Serializing response {self.id}")
-        return ResponseSchema().dump(self)
+        return response_schema.dump(self)
 
     def __repr__(self):
         return f"<Response {self.id}>"
 
+# Full-text search over answers
+Index('idx_responses_response_tsv', Response.response_tsv, postgresql_using='gin')
+
 class ResponseSchema(Schema):
     id = fields.Integer()
     response_text = fields.String(required=True)
@@ -241,7 +345,14 @@ class Activity(db.Model):
     def serialize(self):
         """Serialize the Activity object to a dictionary."""
         logger.debug(f"Serializing activity {self.id}")
-        return ActivitySchema().dump(self)
+        return activity_schema.dump(self)
 
     def __repr__(self):
         return f"<Activity {self.id} by User {self.user_id}>"
+
+# Schemas are built once and reused; constructing one per row is much of the cost of serializing
+user_schema = UserSchema()
+query_schema = QuerySchema()
+queries_schema = QuerySchema(many=True)
+response_schema = ResponseSchema()
+activity_schema = ActivitySchema()
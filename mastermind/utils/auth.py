@@ -14,14 +14,12 @@ def role_required(*roles):
                 logger.warning(f"403 Forbidden: User not authenticated")
                 abort(403)
 
-            logger.debug(f"Current user email: {current_user.email}")
-            logger.debug(f"Current user type: {current_user.user_type.name.value}")
-
-            if current_user.user_type.name.value not in roles:
+            role = current_user.user_type.name.value
+            if role not in roles:
                 logger.warning(f"403 Forbidden: User {current_user.email} does not have the required role {roles}")
                 abort(403)
 
-            logger.info(f"User {current_user.email} has access with role {current_user.user_type.name.value}")
+            logger.info(f"User {current_user.email} has access with role {role}")
             return fn(*args, **kwargs)
         return decorated_view
     return wrapper
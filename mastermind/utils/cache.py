@@ -0,0 +1,217 @@
+# mastermind/utils/cache.py
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from .logging import logger
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+EDGE_PUNCTUATION = " \t\n.?!,;:\"'“”‘’"
+
+
+def normalize_question(question):
+    """Canonical form of a question for exact-match caching.
+
+    Case, unicode width, repeated whitespace and surrounding punctuation are
+    ignored so "What is your position on housing?" and
+    "what is your position on housing" share one entry.
+    """
+    text = unicodedata.normalize("NFKC", question or "").casefold()
+    text = WHITESPACE_PATTERN.sub(" ", text)
+    return text.strip(EDGE_PUNCTUATION)
+
+
+def stable_hash(value):
+    """SHA-256 of a JSON-serialisable value with deterministic key order."""
+    encoded = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_entries=1024, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[1] if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisTier:
+    """Optional shared cache tier so workers and replicas reuse each other's answers."""
+
+    def __init__(self, url, ttl, prefix="candidategpt:answer:"):
+        import redis  # Optional dependency, only needed when a shared tier is configured
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(self.ttl))
+
+
+class ResponseCache:
+    """Two-tier exact-match answer cache with hit/miss counters."""
+
+    def __init__(self):
+        self.enabled = False
+        self.local = TTLCache()
+        self.shared = None
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "local_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "shared_errors": 0,
+        }
+
+    def configure(self, settings):
+        """Apply `config['cache']` settings; clears the in-process tier."""
+        settings = settings or {}
+        self.enabled = settings.get("enabled", False)
+        ttl = settings.get("ttl_seconds", 3600)
+        self.local = TTLCache(max_entries=settings.get("max_entries", 1024), ttl=ttl)
+
+        self.shared = None
+        shared_url = os.getenv("CACHE_REDIS_URL") or settings.get("redis_url")
+        if self.enabled and shared_url:
+            try:
+                self.shared = RedisTier(shared_url, ttl)
+                logger.info("🗄️ Shared answer cache tier enabled.")
+            except ImportError:
+                logger.warning("⚠️ CACHE_REDIS_URL is set but the redis package is not installed; using the in-process cache only.")
+            except Exception as e:
+                logger.error(f"Failed to set up the shared answer cache tier: {e}")
+
+        logger.info(f"🗄️ Answer cache {'enabled' if self.enabled else 'disabled'} (ttl={ttl}s).")
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counters[key] += amount
+
+    def make_key(self, question, response_type, ai_config, corpus_version, response_option=None):
+        """Cache key covering everything that changes the generated answer."""
+        return stable_hash({
+            "question": normalize_question(question),
+            "response_type": response_type,
+            "response_option": response_option,
+            "ai": ai_config,
+            "corpus": corpus_version,
+        })
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+
+        value = self.local.get(key)
+        if value is not None:
+            self._count("hits")
+            self._count("local_hits")
+            return value
+
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except Exception as e:
+                self._count("shared_errors")
+                logger.warning(f"Shared answer cache lookup failed: {e}")
+                value = None
+            if value is not None:
+                self._count("hits")
+                self._count("shared_hits")
+                self.local.set(key, value)
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+
+        self._count("evictions", self.local.set(key, value))
+        self._count("stores")
+
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value)
+            except Exception as e:
+                self._count("shared_errors")
+                logger.warning(f"Shared answer cache store failed: {e}")
+
+    def invalidate(self):
+        """Drop in-process entries. Shared entries age out since their keys embed the corpus/config hashes."""
+        self.local.clear()
+        self._count("invalidations")
+        logger.info("🗄️ Answer cache invalidated.")
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "enabled": self.enabled,
+            "shared": self.shared is not None,
+            "entries": len(self.local),
+            "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+def is_cacheable(result):
+    """Only successful, non-empty answers are worth caching.
+
+    Raw model output that could not be parsed is left out too, so the next ask retries it.
+    """
+    answer = result.get("answer") or ""
+    return bool(answer) and not answer.startswith(("Error:", "Exception:")) and not result.get("parse_failed")
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,337 @@
+# mastermind/utils/http_client.py
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+import httpx
+from .logging import logger
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_SETTINGS = {
+    "connect_timeout": 5.0,
+    "read_timeout": 60.0,
+    "max_retries": 2,
+    "backoff_base": 0.5,
+    "backoff_max": 10.0,
+    "pool_connections": 4,
+    "pool_maxsize": 16,
+}
+
+
+def parse_retry_after(value, now=None):
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+_connect_timing = threading.local()
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """Records how long opening the TCP connection took on this thread."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_timing.seconds = getattr(_connect_timing, "seconds", 0.0) + time.perf_counter() - started
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """Records how long the TCP+TLS handshake took on this thread."""
+
+    connect = TimedHTTPConnection.connect
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PooledHTTPClient:
+    """Keep-alive HTTP client with a bounded connection pool, timeouts and retries.
+
+    One instance is shared per process so repeated upstream calls reuse TCP+TLS
+    connections instead of paying a fresh handshake per question.
+    """
+
+    def __init__(self, **settings):
+        self.settings = {**DEFAULT_SETTINGS, **{k: v for k, v in settings.items() if v is not None}}
+        self.pid = os.getpid()
+
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(
+            pool_connections=int(self.settings["pool_connections"]),
+            pool_maxsize=int(self.settings["pool_maxsize"]),
+            pool_block=False,
+            max_retries=0  # Retries are handled here so Retry-After can be honoured
+        )
+        self.adapter.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+        self._lock = threading.Lock()
+        self._counters = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "failures": 0,
+            "timeouts": 0,
+        }
+
+        logger.debug(f"🔌 HTTP client created with settings: {self.settings}")
+
+    @property
+    def timeout(self):
+        return (float(self.settings["connect_timeout"]), float(self.settings["read_timeout"]))
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counters[key] += amount
+
+    def backoff_delay(self, attempt, response=None):
+        """Seconds to wait before the next attempt: Retry-After if given, else jittered backoff."""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, float(self.settings["backoff_max"]))
+        ceiling = min(float(self.settings["backoff_max"]), float(self.settings["backoff_base"]) * (2 ** attempt))
+        # Full jitter keeps many workers from retrying in lockstep
+        return random.uniform(0, ceiling)
+
+    def request(self, method, url, **kwargs):
+        """Send a request, retrying on connection errors and 429/5xx responses.
+
+        A read timeout is raised at once: the upstream may still be generating
+        the answer, and sending the POST again would pay for it twice.
+
+        The returned response carries `connect_seconds`: time spent opening new
+        connections across all attempts (0 when a pooled connection was reused).
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        max_retries = int(self.settings["max_retries"])
+        self._count("requests")
+        _connect_timing.seconds = 0.0
+
+        attempt = 0
+        while True:
+            self._count("attempts")
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ReadTimeout:
+                self._count("timeouts")
+                self._count("failures")
+                raise
+            except requests.ConnectionError as e:
+                if isinstance(e, requests.ConnectTimeout):
+                    self._count("timeouts")
+                if attempt >= max_retries:
+                    self._count("failures")
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"🔁 Upstream request failed ({e}); retrying in {delay:.2f}s.")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                    if response.status_code >= 400:
+                        self._count("failures")
+                    response.connect_seconds = _connect_timing.seconds
+                    return response
+                delay = self.backoff_delay(attempt, response)
+                logger.warning(f"🔁 Upstream returned {response.status_code}; retrying in {delay:.2f}s.")
+                response.close()
+
+            self._count("retries")
+            attempt += 1
+            time.sleep(delay)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """Request counters plus per-host connection pool figures."""
+        with self._lock:
+            counters = dict(self._counters)
+
+        pools = []
+        pool_manager = self.adapter.poolmanager
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle": pool.pool.qsize() if pool.pool is not None else 0,
+                "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+            })
+
+        return {**counters, "pid": self.pid, "pools": pools}
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncPooledHTTPClient:
+    """asyncio counterpart of `PooledHTTPClient`, built on an httpx connection pool.
+
+    Waiting on the upstream does not hold a thread, so one process can keep
+    hundreds of LLM calls open at once.
+    """
+
+    def __init__(self, **settings):
+        self.settings = {**DEFAULT_SETTINGS, **{k: v for k, v in settings.items() if v is not None}}
+        self.pid = os.getpid()
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                float(self.settings["read_timeout"]),
+                connect=float(self.settings["connect_timeout"])
+            ),
+            limits=httpx.Limits(
+                max_connections=int(self.settings.get("async_max_connections", 512)),
+                max_keepalive_connections=int(self.settings["pool_maxsize"])
+            )
+        )
+        self._counters = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "in_flight": 0,
+        }
+
+        logger.debug(f"🔌 Async HTTP client created with settings: {self.settings}")
+
+    backoff_delay = PooledHTTPClient.backoff_delay
+
+    async def request(self, method, url, **kwargs):
+        """Send a request, retrying on connection errors and 429/5xx responses.
+
+        Read and write timeouts are raised at once, as in `PooledHTTPClient.request`.
+        """
+        max_retries = int(self.settings["max_retries"])
+        self._counters["requests"] += 1
+        self._counters["in_flight"] += 1
+
+        try:
+            attempt = 0
+            while True:
+                self._counters["attempts"] += 1
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except (httpx.ReadTimeout, httpx.WriteTimeout):
+                    # The request may have reached the upstream; do not pay for it twice
+                    self._counters["timeouts"] += 1
+                    self._counters["failures"] += 1
+                    raise
+                except (httpx.ConnectError, httpx.TimeoutException) as e:
+                    if isinstance(e, httpx.TimeoutException):
+                        self._counters["timeouts"] += 1
+                    if attempt >= max_retries:
+                        self._counters["failures"] += 1
+                        raise
+                    delay = self.backoff_delay(attempt)
+                    logger.warning(f"🔁 Upstream request failed ({e}); retrying in {delay:.2f}s.")
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                        if response.status_code >= 400:
+                            self._counters["failures"] += 1
+                        return response
+                    delay = self.backoff_delay(attempt, response)
+                    logger.warning(f"🔁 Upstream returned {response.status_code}; retrying in {delay:.2f}s.")
+
+                self._counters["retries"] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+        finally:
+            self._counters["in_flight"] -= 1
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self):
+        return {**self._counters, "pid": self.pid}
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_client = {"instance": None}
+_client_lock = threading.Lock()
+
+
+def get_http_client(settings=None):
+    """Return the process-wide client, rebuilding it after a fork or a settings change."""
+    settings = settings or {}
+    with _client_lock:
+        client = _client["instance"]
+        wanted = {**DEFAULT_SETTINGS, **{k: v for k, v in settings.items() if v is not None}}
+        if client is None or client.pid != os.getpid() or client.settings != wanted:
+            if client is not None and client.pid == os.getpid():
+                client.close()
+            client = PooledHTTPClient(**settings)
+            _client["instance"] = client
+        return client
+
+
+def http_client_stats():
+    """Stats for the current client, or an empty dict before the first request."""
+    client = _client["instance"]
+    return client.stats() if client is not None else {}
+
+
+_async_clients = {}
+
+
+def get_async_http_client(settings=None):
+    """Return the client for the running event loop, rebuilding it on a settings change."""
+    loop = asyncio.get_running_loop()
+    wanted = {**DEFAULT_SETTINGS, **{k: v for k, v in (settings or {}).items() if v is not None}}
+    client = _async_clients.get(loop)
+    if client is None or client.settings != wanted:
+        if client is not None:
+            loop.create_task(client.aclose())
+        client = AsyncPooledHTTPClient(**(settings or {}))
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_http_client():
+    """Close the running loop's client, e.g. on ASGI lifespan shutdown."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def async_http_client_stats():
+    """Stats for every event loop's async client."""
+    return [client.stats() for client in list(_async_clients.values())]
@@ -0,0 +1,138 @@
+# mastermind/utils/identity.py
+import threading
+from flask import g
+from flask_login import UserMixin
+from mastermind.models import User, UserTypeEnum
+from .cache import TTLCache
+from .logging import logger
+
+
+class CachedUserType:
+    """Stands in for `User.user_type` so `user_type.name.value` checks keep working."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"<UserType {self.name.value}>"
+
+
+class Identity(UserMixin):
+    """The fields authentication needs (id, email, active flag, role), detached from the session.
+
+    Any other attribute, e.g. `given_name` or `organization`, is read from the
+    full `User` row, which is loaded at most once per request.
+    """
+
+    def __init__(self, user_id, email, active, role):
+        self.user_id = user_id
+        self.email = email
+        self.active = active
+        self.user_type = CachedUserType(UserTypeEnum(role))
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.user_id, user.email, user.is_active, user.user_type.name.value)
+
+    @property
+    def role(self):
+        return self.user_type.name.value
+
+    @property
+    def is_active(self):
+        return self.active
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    def get_id(self):
+        return str(self.user_id)
+
+    @property
+    def record(self):
+        """The full `User` row, loaded once per request."""
+        records = g.setdefault('identity_records', {})
+        if self.user_id not in records:
+            records[self.user_id] = User.query.get(self.user_id)
+        return records[self.user_id]
+
+    def __getattr__(self, name):
+        # Only reached for attributes the identity does not hold itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.record, name)
+
+    def __repr__(self):
+        return f"<Identity {self.email}>"
+
+
+class IdentityCache:
+    """Short-TTL per-process cache of `Identity` objects by user id and by email.
+
+    Edits in `web/admin.py` invalidate this process's entries; other worker
+    processes pick up changes when their entries expire.
+    """
+
+    def __init__(self):
+        self.by_id = TTLCache(max_entries=4096, ttl=30)
+        self.by_email = TTLCache(max_entries=4096, ttl=30)
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+        }
+
+    def configure(self, settings):
+        """Apply `config['identity_cache']` settings; clears the cache."""
+        settings = settings or {}
+        ttl = settings.get("ttl_seconds", 30)
+        max_entries = settings.get("max_entries", 4096)
+        self.by_id = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.by_email = TTLCache(max_entries=max_entries, ttl=ttl)
+        logger.info(f"🪪 Identity cache configured (ttl={ttl}s).")
+
+    def _count(self, key):
+        with self._lock:
+            self._counters[key] += 1
+
+    def _lookup(self, cache, key, load):
+        identity = cache.get(key)
+        if identity is not None:
+            self._count("hits")
+            return identity
+
+        self._count("misses")
+        user = load()
+        if user is None:
+            return None
+        identity = Identity.from_user(user)
+        self.by_id.set(str(identity.user_id), identity)
+        self.by_email.set(identity.email, identity)
+        return identity
+
+    def get(self, user_id):
+        """Identity for a user id (as stored in the session), or None if the user does not exist."""
+        return self._lookup(self.by_id, str(user_id), lambda: User.query.get(user_id))
+
+    def get_by_email(self, email):
+        return self._lookup(self.by_email, email, lambda: User.query.filter_by(email=email).first())
+
+    def invalidate(self, user_id=None, *emails):
+        """Drop a user's cached identity, under its id and every email it may be cached under."""
+        if user_id is not None:
+            identity = self.by_id.pop(str(user_id))
+            if identity is not None:
+                self.by_email.pop(identity.email)
+        for email in emails:
+            self.by_email.pop(email)
+        self._count("invalidations")
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        return {**counters, "entries": len(self.by_id)}
+
+
+identity_cache = IdentityCache()
@@ -0,0 +1,353 @@
+# mastermind/utils/metrics.py
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_app_context
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}_total{format_labels(self.labelnames, key)} {format_value(value)}"
+
+    def export(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def empty(self):
+        return Counter(self.name, self.documentation, self.labelnames)
+
+    def merge(self, exported, worker):
+        # Counts from every worker add up
+        with self._lock:
+            for key, value in exported:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge:
+    """Last-set value with optional labels."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+
+    def export(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def empty(self):
+        return Gauge(self.name, self.documentation, self.labelnames + ("worker",))
+
+    def merge(self, exported, worker):
+        # Last-set values do not add up, so each worker keeps its own series
+        with self._lock:
+            for key, value in exported:
+                self._values[tuple(key) + (str(worker),)] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds, with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["count"] += 1
+            series["sum"] += value
+
+    def count(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        return series["count"] if series else 0
+
+    def samples(self):
+        with self._lock:
+            series_items = [(key, dict(series, buckets=list(series["buckets"]))) for key, series in self._series.items()]
+        for key, series in sorted(series_items):
+            for bound, count in zip(self.buckets, series["buckets"]):
+                yield f"{self.name}_bucket{format_labels(self.labelnames, key, [('le', format_value(float(bound)))])} {count}"
+            yield f"{self.name}_bucket{format_labels(self.labelnames, key, [('le', '+Inf')])} {series['count']}"
+            yield f"{self.name}_count{format_labels(self.labelnames, key)} {series['count']}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, key)} {format_value(series['sum'])}"
+
+    def export(self):
+        with self._lock:
+            return [[list(key), dict(series, buckets=list(series["buckets"]))] for key, series in self._series.items()]
+
+    def empty(self):
+        return Histogram(self.name, self.documentation, self.labelnames, self.buckets)
+
+    def merge(self, exported, worker):
+        with self._lock:
+            for key, other in exported:
+                series = self._series.setdefault(
+                    tuple(key), {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+                )
+                series["buckets"] = [a + b for a, b in zip(series["buckets"], other["buckets"])]
+                series["count"] += other["count"]
+                series["sum"] += other["sum"]
+
+
+class Registry:
+    """Holds the process's metrics and renders them in the Prometheus text format.
+
+    Once `share(directory)` is called (gunicorn does it in the master, before
+    forking), every process writes its values to `<directory>/<pid>.json` at
+    most once per `interval` seconds as requests finish (and whenever it serves
+    a scrape), and `render()` reports all of them: counters and histograms
+    summed, gauges with a `worker` label. Files of exited workers are kept so
+    the sums never go down; their gauges are left out.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self.metrics = []
+        self.directory = None
+        self.interval = 1.0
+        self._written = float("-inf")
+        self._write_lock = threading.Lock()
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def share(self, directory, interval=1.0):
+        """Aggregate with the other processes writing to `directory`, each at most every `interval` seconds."""
+        self.directory = str(directory)
+        self.interval = interval
+
+    def write(self, force=False):
+        """Save this process's values to the shared directory, if there is one and `interval` has passed (or `force`)."""
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._written < self.interval:
+            return
+        # A request that finds another thread writing skips its turn; forced writes wait for it
+        if not self._write_lock.acquire(blocking=force):
+            return
+        try:
+            self._written = now
+            path = os.path.join(self.directory, f"{os.getpid()}.json")
+            exported = {metric.name: metric.export() for metric in self.metrics}
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(exported, f)
+            # Readers only ever see a whole file
+            os.replace(f"{path}.tmp", path)
+        finally:
+            self._write_lock.release()
+
+    def collect(self):
+        """Merged copies of the metrics, from every process's file in the shared directory."""
+        self.write(force=True)
+        merged = [metric.empty() for metric in self.metrics]
+        for filename in os.listdir(self.directory):
+            worker, extension = os.path.splitext(filename)
+            if extension != ".json" or not worker.isdigit():
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    exported = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = process_alive(int(worker))
+            for metric in merged:
+                if metric.kind == "gauge" and not alive:
+                    continue
+                metric.merge(exported.get(metric.name, []), worker)
+        return merged
+
+    def render(self):
+        lines = []
+        for metric in (self.collect() if self.directory else self.metrics):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "candidategpt_http_requests", "API requests by endpoint and status.", ("endpoint", "status")
+))
+ERRORS = registry.register(Counter(
+    "candidategpt_http_errors", "API responses with a 4xx/5xx status, by endpoint and status.", ("endpoint", "status")
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "candidategpt_http_request_seconds", "API request latency by endpoint.", ("endpoint",)
+))
+STAGE_SECONDS = registry.register(Histogram(
+    "candidategpt_ask_stage_seconds", "Time spent in each stage of answering a question.", ("stage",)
+))
+UPSTREAM_REQUESTS = registry.register(Counter(
+    "candidategpt_upstream_requests", "Responses from the AI API by status.", ("status",)
+))
+TOKENS = registry.register(Counter(
+    "candidategpt_tokens", "Tokens reported by the AI API.", ("kind",)
+))
+PROMPT_CHARS = registry.register(Counter(
+    "candidategpt_prompt_chars",
+    "Characters sent to the AI API: `prefix` is the part identical across requests, `total` everything.",
+    ("part",)
+))
+PROMPT_ESTIMATE_RATIO = registry.register(Histogram(
+    "candidategpt_prompt_estimate_ratio",
+    "Prompt tokens reported by the AI API divided by the local estimate made when packing the prompt.",
+    buckets=(0.5, 0.75, 0.9, 1.0, 1.1, 1.25, 1.5, 2.0)
+))
+STARTUP_SECONDS = registry.register(Gauge(
+    "candidategpt_startup_seconds", "Time this process spent in each startup phase.", ("phase",)
+))
+
+
+def record_stage(stage, seconds):
+    """Observe a stage duration and, inside a request, add it to the Server-Timing header."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if has_app_context():
+        g.setdefault("server_timing", []).append((stage, seconds))
+
+
+@contextmanager
+def timed(stage):
+    """Context manager that records how long its body took as `stage`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def record_request(endpoint, status, seconds):
+    """Count a finished API request and observe its latency."""
+    REQUESTS.inc(endpoint=endpoint, status=status)
+    if status >= 400:
+        ERRORS.inc(endpoint=endpoint, status=status)
+    REQUEST_SECONDS.observe(seconds, endpoint=endpoint)
+    registry.write()
+
+
+def record_usage(usage):
+    """Count prompt/completion tokens from an AI API `usage` object."""
+    if not usage:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind):
+            TOKENS.inc(usage[kind], kind=kind.replace("_tokens", ""))
+    # Prompt tokens the provider served from its prefix cache, when it says so
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    if cached:
+        TOKENS.inc(cached, kind="cached_prompt")
+
+
+def record_prompt(prefix_chars, total_chars):
+    """Count a prompt's reusable-prefix and total size; inside a request, keep them for the response header."""
+    PROMPT_CHARS.inc(prefix_chars, part="prefix")
+    PROMPT_CHARS.inc(total_chars, part="total")
+    if has_app_context():
+        g.prompt_prefix = (prefix_chars, total_chars)
+
+
+def record_prompt_tokens(estimate, usage):
+    """Compare a prompt's estimated tokens with what the AI API counted; inside a request, keep both for the response header."""
+    TOKENS.inc(estimate, kind="prompt_estimate")
+    actual = (usage or {}).get("prompt_tokens")
+    if actual and estimate:
+        PROMPT_ESTIMATE_RATIO.observe(actual / estimate)
+    if has_app_context():
+        g.prompt_tokens = (estimate, actual or 0)
+
+
+def record_startup(phase, seconds):
+    """Set how long a startup phase (import, boot, warm_up_*) took in this process."""
+    STARTUP_SECONDS.set(seconds, phase=phase)
+
+
+def server_timing_header(timings):
+    """Format `(stage, seconds)` pairs as a Server-Timing header value."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings)
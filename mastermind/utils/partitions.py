@@ -0,0 +1,183 @@
+# mastermind/utils/partitions.py
+import re
+from datetime import date
+from sqlalchemy import text
+from mastermind.models import db
+from .logging import logger
+
+# Tables partitioned by month on created_at (see migration c4e8a1f7d2b6)
+PARTITIONED_TABLES = ('logs.responses', 'logs.queries')
+
+DEFAULT_SETTINGS = {
+    "months_ahead": 3,
+    "retention_months": 0,
+    "archive_schema": "archive",
+}
+
+# The logs.query_counters row (of each counter) this connection updates, as in the counter triggers
+COUNTER_SHARD = "pg_backend_pid() % 16"
+
+# Run before a partition of the table is detached, with {partition} filled in:
+# the counter triggers do not see rows leaving with their partition
+BEFORE_DETACH = {
+    'logs.queries': (
+        """
+        UPDATE logs.query_counters AS counters
+        SET value = counters.value - delta.amount, updated_at = now()
+        FROM (
+            SELECT 'total' AS name, count(*) AS amount FROM {partition}
+            UNION ALL
+            SELECT 'showcase', count(*) FILTER (WHERE showcase) FROM {partition}
+        ) AS delta
+        WHERE counters.name = delta.name AND delta.amount <> 0 AND counters.shard = """ + COUNTER_SHARD + """
+        """,
+        "DELETE FROM logs.showcase_queries WHERE query_id IN (SELECT id FROM {partition} WHERE showcase)",
+    ),
+}
+
+RANGE_BOUND = re.compile(r"FROM \('(\d{4})-(\d{2})-01[^']*'\) TO \('(\d{4})-(\d{2})-01[^']*'\)")
+
+
+def add_months(month, months):
+    """The first day of the month `months` after (or before) `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+class PartitionMaintenance:
+    """Creates the upcoming monthly partitions of the log tables and detaches expired ones.
+
+    Rows are routed to their month by Postgres; this only keeps the next
+    `months_ahead` months created (rows for a missing month land in the
+    table's default partition and are moved out when the month is created)
+    and, when `retention_months` is set, detaches the months that ended more
+    than that many months ago into `archive_schema` (or drops them when it is
+    empty). Each step runs in its own short transaction under an advisory
+    lock, so concurrent runs take turns.
+    """
+
+    def __init__(self):
+        self.settings = dict(DEFAULT_SETTINGS)
+
+    def configure(self, settings):
+        """Apply `config['partitions']`."""
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+
+    def partitions(self, table):
+        """`(monthly, default)`: {first day of month: partition name} and the default partition's name (or None)."""
+        rows = db.session.execute(text("""
+            SELECT child.oid::regclass::text, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = CAST(:table AS regclass)
+        """), {'table': table}).all()
+        monthly, default = {}, None
+        for name, bound in rows:
+            if bound == 'DEFAULT':
+                default = name
+                continue
+            match = RANGE_BOUND.search(bound)
+            if match:
+                monthly[date(int(match[1]), int(match[2]), 1)] = name
+        return monthly, default
+
+    def stored_columns(self, table):
+        """`table`'s column list without generated columns, which cannot be inserted into."""
+        return db.session.execute(text("""
+            SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+            FROM pg_attribute
+            WHERE attrelid = CAST(:table AS regclass) AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+        """), {'table': table}).scalar()
+
+    def current_month(self):
+        # created_at is filled in by the database, so months follow its clock
+        today = db.session.execute(text("SELECT localtimestamp::date")).scalar()
+        return date(today.year, today.month, 1)
+
+    def _lock(self):
+        db.session.execute(text("SELECT pg_advisory_xact_lock(hashtext('mastermind.partitions'))"))
+
+    def create(self, table, month):
+        """Create `table`'s partition for `month`, moving any of its rows out of the default partition."""
+        self._lock()
+        monthly, default = self.partitions(table)
+        if month in monthly:
+            db.session.commit()
+            return None
+
+        name = partition_name(table, month)
+        rows = f"created_at >= '{month}' AND created_at < '{add_months(month, 1)}'"
+        stranded = default and db.session.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {rows})")).scalar()
+        if stranded:
+            db.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+        db.session.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        ))
+        if stranded:
+            # Straight between partitions, so the parent's counter triggers do not fire
+            columns = self.stored_columns(table)
+            db.session.execute(text(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {default} WHERE {rows}"))
+            db.session.execute(text(f"DELETE FROM {default} WHERE {rows}"))
+            db.session.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+        db.session.commit()
+        logger.info(f"🗂️ Created partition {name}{' (moved rows out of the default partition)' if stranded else ''}.")
+        return name
+
+    def detach(self, table, name):
+        """Detach partition `name` of `table` and archive (or drop) it; returns where it went."""
+        self._lock()
+        for statement in BEFORE_DETACH.get(table, ()):
+            db.session.execute(text(statement.format(partition=name)))
+        db.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        archive = self.settings["archive_schema"]
+        if archive:
+            db.session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive}"))
+            db.session.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive}"))
+            moved = f"{archive}.{name.split('.')[-1]}"
+        else:
+            db.session.execute(text(f"DROP TABLE {name}"))
+            moved = None
+        db.session.commit()
+        logger.info(f"🗄️ Detached partition {name}{f' into {moved}' if moved else ' and dropped it'}.")
+        return moved
+
+    def ensure(self, current=None):
+        """Create every missing partition from the current month through `months_ahead`; returns their names."""
+        current = current or self.current_month()
+        created = []
+        for table in PARTITIONED_TABLES:
+            for ahead in range(self.settings["months_ahead"] + 1):
+                name = self.create(table, add_months(current, ahead))
+                if name:
+                    created.append(name)
+        return created
+
+    def expire(self, current=None):
+        """Detach the partitions older than `retention_months` (0 keeps everything); returns their names."""
+        retention = self.settings["retention_months"]
+        if not retention:
+            return []
+        cutoff = add_months(current or self.current_month(), -retention)
+        detached = []
+        for table in PARTITIONED_TABLES:
+            monthly, _ = self.partitions(table)
+            for month, name in sorted(monthly.items()):
+                if add_months(month, 1) <= cutoff:
+                    self.detach(table, name)
+                    detached.append(name)
+        return detached
+
+    def run(self, current=None):
+        """Create upcoming partitions, then apply the retention policy."""
+        try:
+            return {"created": self.ensure(current), "detached": self.expire(current)}
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+partition_maintenance = PartitionMaintenance()
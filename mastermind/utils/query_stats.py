@@ -0,0 +1,71 @@
+# mastermind/utils/query_stats.py
+import random
+import threading
+from mastermind.models import db, Query, QueryCounter, ShowcaseQuery
+from .cache import TTLCache
+from .logging import logger
+
+DEFAULT_SETTINGS = {
+    "ttl_seconds": 10,
+    "recent": 5,
+}
+
+
+class QueryStats:
+    """Short-TTL per-process snapshot of the query counters, showcase ids and most recent queries.
+
+    Counts are summed from the `logs.query_counters` shards and showcase ids come from
+    `logs.showcase_queries`, both kept up to date by triggers on
+    `logs.queries`, so refreshing the snapshot costs the same however long
+    the query log grows. Between refreshes the public routes do no counting at all.
+    """
+
+    def __init__(self):
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.cache = TTLCache(max_entries=1, ttl=self.settings["ttl_seconds"])
+        self._lock = threading.Lock()
+
+    def configure(self, settings):
+        """Apply `config['query_stats']`."""
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.cache = TTLCache(max_entries=1, ttl=self.settings["ttl_seconds"])
+
+    def invalidate(self):
+        self.cache.clear()
+
+    def load(self):
+        counters = QueryCounter.totals()
+        showcase_ids = tuple(query_id for (query_id,) in db.session.query(ShowcaseQuery.query_id).all())
+        # Newest by primary key: an index scan of a few rows, unlike sorting on created_at
+        recent = Query.with_answers().order_by(Query.id.desc()).limit(self.settings["recent"]).all()
+        logger.debug(f"📊 Query stats refreshed: {counters}, {len(showcase_ids)} showcase ids.")
+        return {
+            "total_queries": counters.get("total", 0),
+            "showcase_queries": counters.get("showcase", 0),
+            "showcase_ids": showcase_ids,
+            "recent_queries": Query.serialize_many(recent),
+        }
+
+    def snapshot(self):
+        """The current snapshot, reloaded at most once per TTL by one thread."""
+        value = self.cache.get("snapshot")
+        if value is None:
+            with self._lock:
+                value = self.cache.get("snapshot")
+                if value is None:
+                    value = self.load()
+                    self.cache.set("snapshot", value)
+        return value
+
+    def random_showcase(self, count=5):
+        """Up to `count` random showcased queries, fetched by primary key."""
+        showcase_ids = self.snapshot()["showcase_ids"]
+        picked = random.sample(showcase_ids, min(count, len(showcase_ids)))
+        if not picked:
+            return []
+        queries = Query.with_answers().filter(Query.id.in_(picked)).all()
+        random.shuffle(queries)
+        return queries
+
+
+query_stats = QueryStats()
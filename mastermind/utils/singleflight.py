@@ -0,0 +1,123 @@
+# mastermind/utils/singleflight.py
+import asyncio
+import threading
+from .logging import logger
+
+
+class _Call:
+    """One in-flight call and the callers waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait and receive the same result or exception.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "leaders": 0,
+            "coalesced": 0,
+            "max_waiters": 0,
+        }
+
+    def do(self, key, fn):
+        """Run `fn()` once per key at a time; return `(result, shared)`."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._counters["coalesced"] += 1
+                self._counters["max_waiters"] = max(self._counters["max_waiters"], call.waiters)
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._counters["leaders"] += 1
+                leader = True
+
+        if not leader:
+            logger.debug(f"🛬 Joining in-flight call {key[:12]} ({call.waiters} waiting).")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self):
+        """Totals plus the current waiter count for every in-flight key."""
+        with self._lock:
+            in_flight = {key[:12]: call.waiters for key, call in self._calls.items()}
+            counters = dict(self._counters)
+        return {**counters, "in_flight": len(in_flight), "waiters": in_flight}
+
+
+class AsyncSingleFlight:
+    """`SingleFlight` for coroutines sharing one event loop."""
+
+    def __init__(self):
+        self._calls = {}
+        self._waiters = {}
+        self._counters = {
+            "leaders": 0,
+            "coalesced": 0,
+            "max_waiters": 0,
+        }
+
+    async def do(self, key, coro_fn):
+        """Await `coro_fn()` once per key at a time; return `(result, shared)`."""
+        future = self._calls.get(key)
+        if future is not None:
+            self._waiters[key] += 1
+            self._counters["coalesced"] += 1
+            self._counters["max_waiters"] = max(self._counters["max_waiters"], self._waiters[key])
+            # Shield so one cancelled waiter does not cancel the shared call
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self._waiters[key] = 0
+        self._counters["leaders"] += 1
+        try:
+            result = await coro_fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a leader-only failure does not log "never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._calls.pop(key, None)
+            self._waiters.pop(key, None)
+
+    def stats(self):
+        waiters = {key[:12]: count for key, count in self._waiters.items()}
+        return {**self._counters, "in_flight": len(waiters), "waiters": waiters}
+
+
+answer_flight = SingleFlight()
@@ -0,0 +1,204 @@
+# mastermind/utils/write_behind.py
+import atexit
+import os
+import queue
+import threading
+import time
+from .logging import logger
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "max_size": 1000,
+    "batch_size": 100,
+    "flush_interval_ms": 250,
+    "put_timeout_ms": 50,
+}
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Bounded in-process queue drained by a background thread in batches.
+
+    `put` returns as soon as the item is queued. When the queue is full the
+    caller waits up to `put_timeout_ms` and then writes its own item inline, so
+    a slow database slows requests down instead of dropping rows. `flush` is
+    called with a list of items inside the app context given to `init_app`.
+    """
+
+    def __init__(self, name, flush):
+        self.name = name
+        self.flush = flush
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.app = None
+        self.pid = None
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "inline_writes": 0,
+            "failed_batches": 0,
+            "dropped": 0,
+            "max_depth": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "last_lag_ms": 0.0,
+            "max_lag_ms": 0.0,
+        }
+        atexit.register(self.close)
+
+    @property
+    def enabled(self):
+        return bool(self.settings["enabled"])
+
+    def init_app(self, app):
+        self.app = app
+
+    def configure(self, settings):
+        """Apply `config['write_behind']`; queue size and batching take effect on the next start."""
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        logger.info(f"📝 Write-behind {self.name} {'enabled' if self.enabled else 'disabled'}.")
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counters[key] += amount
+
+    def _ensure_started(self):
+        # A queue or thread inherited across fork is unusable, so start afresh per process
+        if self._thread is not None and self._thread.is_alive() and self.pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self._queue = queue.Queue(maxsize=int(self.settings["max_size"]))
+            self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+            self._thread.start()
+        logger.info(f"📝 Write-behind {self.name} worker started.")
+
+    def put(self, item):
+        """Queue an item for the background writer, writing it inline if the queue stays full."""
+        if not self.enabled:
+            self._write([item])
+            return
+
+        self._ensure_started()
+        try:
+            self._queue.put((time.monotonic(), item), timeout=float(self.settings["put_timeout_ms"]) / 1000)
+        except queue.Full:
+            logger.warning(f"📝 Write-behind {self.name} queue is full; writing inline.")
+            self._count("inline_writes")
+            self._write([item])
+            return
+
+        with self._lock:
+            self._counters["enqueued"] += 1
+            self._counters["max_depth"] = max(self._counters["max_depth"], self._queue.qsize())
+
+    def _run(self):
+        interval = float(self.settings["flush_interval_ms"]) / 1000
+        batch_size = int(self.settings["batch_size"])
+        stopping = False
+        while not stopping:
+            try:
+                entry = self._queue.get(timeout=interval)
+            except queue.Empty:
+                continue
+
+            entries = []
+            while True:
+                if entry is _STOP:
+                    stopping = True
+                else:
+                    entries.append(entry)
+                if stopping or len(entries) >= batch_size:
+                    break
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if entries:
+                self._write_batch(entries)
+
+    def _write_batch(self, entries):
+        started = time.monotonic()
+        lag_ms = (started - entries[0][0]) * 1000
+        items = [item for _, item in entries]
+        try:
+            self._write(items)
+        except Exception as e:
+            logger.error(f"Write-behind {self.name} batch of {len(items)} failed, retrying one by one: {e}", exc_info=True)
+            self._count("failed_batches")
+            for item in items:
+                try:
+                    self._write([item])
+                except Exception as e:
+                    logger.error(f"Write-behind {self.name} dropped an item: {e}")
+                    self._count("dropped")
+
+        with self._lock:
+            self._counters["batches"] += 1
+            self._counters["last_batch_size"] = len(items)
+            self._counters["last_flush_ms"] = round((time.monotonic() - started) * 1000, 3)
+            self._counters["last_lag_ms"] = round(lag_ms, 3)
+            self._counters["max_lag_ms"] = max(self._counters["max_lag_ms"], round(lag_ms, 3))
+
+    def _write(self, items):
+        if self.app is not None:
+            with self.app.app_context():
+                self.flush(items)
+        else:
+            self.flush(items)
+        self._count("written", len(items))
+
+    def close(self, timeout=10):
+        """Stop the worker after it drains the queue; anything left is written inline."""
+        thread = self._thread
+        if thread is None or self.pid != os.getpid():
+            return
+        if thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            thread.join(timeout)
+
+        leftovers = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _STOP:
+                leftovers.append(entry)
+        if leftovers:
+            self._write_batch(leftovers)
+
+        self._thread = None
+        logger.info(f"📝 Write-behind {self.name} flushed and stopped.")
+
+    def stats(self):
+        """Counters plus current depth and the age of the oldest queued item."""
+        depth = 0
+        oldest_age_ms = 0.0
+        if self._queue is not None and self.pid == os.getpid():
+            with self._queue.mutex:
+                depth = len(self._queue.queue)
+                head = self._queue.queue[0] if depth else None
+            if head is not None and head is not _STOP:
+                oldest_age_ms = round((time.monotonic() - head[0]) * 1000, 3)
+
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "enabled": self.enabled,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "depth": depth,
+            "max_size": int(self.settings["max_size"]),
+            "oldest_age_ms": oldest_age_ms,
+        }
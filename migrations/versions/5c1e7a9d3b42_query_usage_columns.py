@@ -0,0 +1,46 @@
+"""Record token usage, upstream latency, model and cache hits per query
+
+Revision ID: 5c1e7a9d3b42
+Revises: 20edf329dd04
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a9d3b42'
+down_revision: Union[str, None] = '20edf329dd04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # All nullable: rows written before this revision have no usage recorded
+    with op.batch_alter_table('queries', schema='logs') as batch_op:
+        batch_op.add_column(sa.Column('model', sa.String(length=100), nullable=True, comment="AI model that generated the answer"))
+        batch_op.add_column(sa.Column('prompt_tokens', sa.Integer(), nullable=True, comment="Prompt tokens reported by the AI API"))
+        batch_op.add_column(sa.Column('completion_tokens', sa.Integer(), nullable=True, comment="Completion tokens reported by the AI API"))
+        batch_op.add_column(sa.Column('total_tokens', sa.Integer(), nullable=True, comment="Total tokens reported by the AI API"))
+        batch_op.add_column(sa.Column('prompt_tokens_estimate', sa.Integer(), nullable=True, comment="Prompt tokens estimated locally when packing the prompt"))
+        batch_op.add_column(sa.Column('upstream_ms', sa.Integer(), nullable=True, comment="Time the AI API took to answer, in milliseconds"))
+        batch_op.add_column(sa.Column('cache_hit', sa.Boolean(), nullable=True, comment="Answer was reused from the cache or an identical in-flight request"))
+
+    # Usage reports group by day, then user or response type
+    op.create_index('idx_queries_timestamp', 'queries', ['timestamp'], schema='logs')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_queries_timestamp', table_name='queries', schema='logs')
+
+    with op.batch_alter_table('queries', schema='logs') as batch_op:
+        batch_op.drop_column('cache_hit')
+        batch_op.drop_column('upstream_ms')
+        batch_op.drop_column('prompt_tokens_estimate')
+        batch_op.drop_column('total_tokens')
+        batch_op.drop_column('completion_tokens')
+        batch_op.drop_column('prompt_tokens')
+        batch_op.drop_column('model')
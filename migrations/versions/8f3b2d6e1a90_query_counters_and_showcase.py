@@ -0,0 +1,143 @@
+"""Maintain query counters and showcase ids with triggers
+
+Revision ID: 8f3b2d6e1a90
+Revises: 5c1e7a9d3b42
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b2d6e1a90'
+down_revision: Union[str, None] = '5c1e7a9d3b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'query_counters',
+        sa.Column('name', sa.String(length=50), primary_key=True, comment="Counter name (total, showcase)"),
+        sa.Column('value', sa.BigInteger(), nullable=False, server_default='0', comment="Current count"),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now(), comment="Record last update date"),
+        schema='logs'
+    )
+    # No foreign key, so logs.queries can be partitioned later; the triggers keep it in step
+    op.create_table(
+        'showcase_queries',
+        sa.Column('query_id', sa.Integer(), primary_key=True, comment="ID of a query marked for showcase"),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now(), comment="Record creation date"),
+        schema='logs'
+    )
+
+    # Statement-level triggers: a multi-row INSERT touches each counter row once
+    op.execute("""
+        CREATE FUNCTION logs.queries_counters_insert() RETURNS trigger AS $$
+        BEGIN
+            UPDATE logs.query_counters AS counters
+            SET value = counters.value + delta.amount, updated_at = now()
+            FROM (
+                SELECT 'total' AS name, count(*) AS amount FROM new_rows
+                UNION ALL
+                SELECT 'showcase', count(*) FILTER (WHERE showcase) FROM new_rows
+            ) AS delta
+            WHERE counters.name = delta.name AND delta.amount <> 0;
+
+            INSERT INTO logs.showcase_queries (query_id)
+            SELECT id FROM new_rows WHERE showcase
+            ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE FUNCTION logs.queries_counters_delete() RETURNS trigger AS $$
+        BEGIN
+            UPDATE logs.query_counters AS counters
+            SET value = counters.value - delta.amount, updated_at = now()
+            FROM (
+                SELECT 'total' AS name, count(*) AS amount FROM old_rows
+                UNION ALL
+                SELECT 'showcase', count(*) FILTER (WHERE showcase) FROM old_rows
+            ) AS delta
+            WHERE counters.name = delta.name AND delta.amount <> 0;
+
+            DELETE FROM logs.showcase_queries
+            WHERE query_id IN (SELECT id FROM old_rows WHERE showcase);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE FUNCTION logs.queries_counters_update() RETURNS trigger AS $$
+        BEGIN
+            UPDATE logs.query_counters
+            SET value = value
+                + (SELECT count(*) FILTER (WHERE showcase) FROM new_rows)
+                - (SELECT count(*) FILTER (WHERE showcase) FROM old_rows),
+                updated_at = now()
+            WHERE name = 'showcase';
+
+            DELETE FROM logs.showcase_queries
+            WHERE query_id IN (
+                SELECT old_rows.id FROM old_rows JOIN new_rows ON new_rows.id = old_rows.id
+                WHERE old_rows.showcase AND NOT new_rows.showcase
+            );
+            INSERT INTO logs.showcase_queries (query_id)
+            SELECT new_rows.id FROM new_rows JOIN old_rows ON old_rows.id = new_rows.id
+            WHERE new_rows.showcase AND NOT old_rows.showcase
+            ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE FUNCTION logs.queries_counters_truncate() RETURNS trigger AS $$
+        BEGIN
+            UPDATE logs.query_counters SET value = 0, updated_at = now();
+            DELETE FROM logs.showcase_queries;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER queries_counters_insert AFTER INSERT ON logs.queries
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION logs.queries_counters_insert();
+    """)
+    op.execute("""
+        CREATE TRIGGER queries_counters_delete AFTER DELETE ON logs.queries
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION logs.queries_counters_delete();
+    """)
+    op.execute("""
+        CREATE TRIGGER queries_counters_update AFTER UPDATE ON logs.queries
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION logs.queries_counters_update();
+    """)
+    op.execute("""
+        CREATE TRIGGER queries_counters_truncate AFTER TRUNCATE ON logs.queries
+        FOR EACH STATEMENT EXECUTE FUNCTION logs.queries_counters_truncate();
+    """)
+
+    # Backfill from the existing log; queries written meanwhile wait on this lock
+    op.execute("LOCK TABLE logs.queries IN SHARE MODE")
+    op.execute("""
+        INSERT INTO logs.query_counters (name, value)
+        SELECT 'total', count(*) FROM logs.queries
+        UNION ALL
+        SELECT 'showcase', count(*) FROM logs.queries WHERE showcase
+    """)
+    op.execute("INSERT INTO logs.showcase_queries (query_id) SELECT id FROM logs.queries WHERE showcase")
+
+
+def downgrade() -> None:
+    for operation in ('truncate', 'update', 'delete', 'insert'):
+        op.execute(f"DROP TRIGGER IF EXISTS queries_counters_{operation} ON logs.queries")
+        op.execute(f"DROP FUNCTION IF EXISTS logs.queries_counters_{operation}()")
+    op.drop_table('showcase_queries', schema='logs')
+    op.drop_table('query_counters', schema='logs')
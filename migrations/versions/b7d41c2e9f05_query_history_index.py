@@ -0,0 +1,32 @@
+"""Index a user's query history for keyset pagination
+
+Revision ID: b7d41c2e9f05
+Revises: 8f3b2d6e1a90
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d41c2e9f05'
+down_revision: Union[str, None] = '8f3b2d6e1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently (outside the migration transaction) so the query log keeps taking writes
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_queries_user_created
+            ON logs.queries (user_id, created_at DESC, id DESC)
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS logs.idx_queries_user_created")
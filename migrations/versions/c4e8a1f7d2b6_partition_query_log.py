@@ -0,0 +1,140 @@
+"""Partition logs.queries and logs.responses by month on created_at
+
+Revision ID: c4e8a1f7d2b6
+Revises: b7d41c2e9f05
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f7d2b6'
+down_revision: Union[str, None] = 'b7d41c2e9f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created past the current one; `flask maintain-partitions` keeps it up from here
+MONTHS_AHEAD = 3
+
+COUNTER_TRIGGERS = """
+    CREATE TRIGGER queries_counters_insert AFTER INSERT ON logs.queries
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION logs.queries_counters_insert();
+
+    CREATE TRIGGER queries_counters_delete AFTER DELETE ON logs.queries
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION logs.queries_counters_delete();
+
+    CREATE TRIGGER queries_counters_update AFTER UPDATE ON logs.queries
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION logs.queries_counters_update();
+
+    CREATE TRIGGER queries_counters_truncate AFTER TRUNCATE ON logs.queries
+    FOR EACH STATEMENT EXECUTE FUNCTION logs.queries_counters_truncate();
+"""
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def copy_table(table, partitioned):
+    """Replace logs.<table> with a (partitioned or plain) copy holding the same rows, without keys or indexes yet."""
+    op.execute(f"ALTER TABLE logs.{table} RENAME TO {table}_old")
+    op.execute(f"""
+        CREATE TABLE logs.{table} (LIKE logs.{table}_old INCLUDING DEFAULTS INCLUDING COMMENTS)
+        {'PARTITION BY RANGE (created_at)' if partitioned else ''}
+    """)
+    if partitioned:
+        connection = op.get_bind()
+        first, current = connection.execute(sa.text(
+            f"SELECT min(created_at)::date, localtimestamp::date FROM logs.{table}_old"
+        )).one()
+        month = date((first or current).year, (first or current).month, 1)
+        last = add_months(date(current.year, current.month, 1), MONTHS_AHEAD)
+        while month <= last:
+            op.execute(f"""
+                CREATE TABLE logs.{table}_p{month:%Y_%m} PARTITION OF logs.{table}
+                FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')
+            """)
+            month = add_months(month, 1)
+        # Catches rows outside every monthly partition instead of failing the insert
+        op.execute(f"CREATE TABLE logs.{table}_default PARTITION OF logs.{table} DEFAULT")
+
+    op.execute(f"INSERT INTO logs.{table} SELECT * FROM logs.{table}_old")
+    op.execute(f"ALTER SEQUENCE logs.{table}_id_seq OWNED BY logs.{table}.id")
+    op.execute(f"DROP TABLE logs.{table}_old")
+
+
+def add_keys_and_triggers(partitioned):
+    # A partitioned table's primary key has to include the partition key
+    key = 'id, created_at' if partitioned else 'id'
+    op.execute(f"ALTER TABLE logs.responses ADD CONSTRAINT responses_pkey PRIMARY KEY ({key})")
+    op.execute(f"ALTER TABLE logs.queries ADD CONSTRAINT queries_pkey PRIMARY KEY ({key})")
+    op.execute("""
+        ALTER TABLE logs.queries ADD CONSTRAINT queries_user_id_fkey
+        FOREIGN KEY (user_id) REFERENCES entities.users (user_id) ON DELETE CASCADE
+    """)
+    op.execute("""
+        ALTER TABLE logs.queries ADD CONSTRAINT fk_queries_response_type_id
+        FOREIGN KEY (response_type_id) REFERENCES meta.response_types (id) ON DELETE SET NULL
+    """)
+    if not partitioned:
+        op.execute("""
+            ALTER TABLE logs.queries ADD CONSTRAINT queries_response_id_fkey
+            FOREIGN KEY (response_id) REFERENCES logs.responses (id) ON DELETE CASCADE
+        """)
+    op.execute('CREATE INDEX idx_queries_timestamp ON logs.queries ("timestamp")')
+    op.execute("CREATE INDEX idx_queries_user_created ON logs.queries (user_id, created_at DESC, id DESC)")
+
+    for table in ('queries', 'responses'):
+        op.execute(f"""
+            CREATE TRIGGER update_{table}_updated_at BEFORE UPDATE ON logs.{table}
+            FOR EACH ROW EXECUTE FUNCTION meta.update_updated_at_column()
+        """)
+    op.execute(COUNTER_TRIGGERS)
+
+
+def upgrade() -> None:
+    # Rewrites both tables; writers wait until the migration commits
+    op.execute("LOCK TABLE logs.responses, logs.queries IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER TABLE logs.queries DROP CONSTRAINT queries_response_id_fkey")
+    copy_table('responses', partitioned=True)
+    copy_table('queries', partitioned=True)
+    add_keys_and_triggers(partitioned=True)
+
+    # A foreign key into a partitioned table would need the response's created_at
+    # on every query, so deleting a response removes its query with a trigger instead
+    op.execute("""
+        CREATE FUNCTION logs.responses_delete_queries() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM logs.queries WHERE response_id IN (SELECT id FROM old_rows);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER responses_delete_queries AFTER DELETE ON logs.responses
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION logs.responses_delete_queries();
+    """)
+    # Fresh tables have no planner statistics yet
+    op.execute("ANALYZE logs.responses, logs.queries")
+
+
+def downgrade() -> None:
+    # Rows in partitions already detached by the retention job are not brought back
+    op.execute("LOCK TABLE logs.responses, logs.queries IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER IF EXISTS responses_delete_queries ON logs.responses")
+    op.execute("DROP FUNCTION IF EXISTS logs.responses_delete_queries()")
+    # The foreign key comes back, so drop queries whose response is gone (the counter triggers still see this)
+    op.execute("DELETE FROM logs.queries WHERE response_id NOT IN (SELECT id FROM logs.responses)")
+    copy_table('responses', partitioned=False)
+    copy_table('queries', partitioned=False)
+    add_keys_and_triggers(partitioned=False)
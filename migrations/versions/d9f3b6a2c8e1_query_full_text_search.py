@@ -0,0 +1,47 @@
+"""Full-text search columns and indexes on questions and answers
+
+Revision ID: d9f3b6a2c8e1
+Revises: c4e8a1f7d2b6
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f3b6a2c8e1'
+down_revision: Union[str, None] = 'c4e8a1f7d2b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stored generated columns rewrite every partition once; the database keeps them in step after that.
+    # Questions are weighted A and answers B, so a match in the question ranks higher.
+    op.execute("""
+        ALTER TABLE logs.queries ADD COLUMN query_tsv tsvector
+        GENERATED ALWAYS AS (setweight(to_tsvector('english', query_text), 'A')) STORED
+    """)
+    op.execute("""
+        ALTER TABLE logs.responses ADD COLUMN response_tsv tsvector
+        GENERATED ALWAYS AS (setweight(to_tsvector('english', response_text), 'B')) STORED
+    """)
+    op.execute("COMMENT ON COLUMN logs.queries.query_tsv IS 'Search vector of the query text'")
+    op.execute("COMMENT ON COLUMN logs.responses.response_tsv IS 'Search vector of the response text'")
+
+    # Partitioned parents cannot be indexed concurrently; the rewrite above already holds the lock
+    op.execute("CREATE INDEX idx_queries_query_tsv ON logs.queries USING gin (query_tsv)")
+    op.execute("CREATE INDEX idx_responses_response_tsv ON logs.responses USING gin (response_tsv)")
+    # From a matching answer back to its question (and for the responses_delete_queries trigger)
+    op.execute("CREATE INDEX idx_queries_response_id ON logs.queries (response_id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS logs.idx_queries_response_id")
+    op.execute("DROP INDEX IF EXISTS logs.idx_responses_response_tsv")
+    op.execute("DROP INDEX IF EXISTS logs.idx_queries_query_tsv")
+    op.execute("ALTER TABLE logs.responses DROP COLUMN IF EXISTS response_tsv")
+    op.execute("ALTER TABLE logs.queries DROP COLUMN IF EXISTS query_tsv")
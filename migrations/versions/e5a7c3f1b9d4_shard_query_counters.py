@@ -0,0 +1,118 @@
+"""Spread each query counter over several rows
+
+Revision ID: e5a7c3f1b9d4
+Revises: d9f3b6a2c8e1
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c3f1b9d4'
+down_revision: Union[str, None] = 'd9f3b6a2c8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows per counter; keep in step with COUNTER_SHARD in mastermind/utils/partitions.py
+SHARDS = 16
+
+
+def counter_functions(shard):
+    """The counter trigger functions, updating only the counter rows matching the `shard` condition."""
+    return f"""
+        CREATE OR REPLACE FUNCTION logs.queries_counters_insert() RETURNS trigger AS $$
+        BEGIN
+            UPDATE logs.query_counters AS counters
+            SET value = counters.value + delta.amount, updated_at = now()
+            FROM (
+                SELECT 'total' AS name, count(*) AS amount FROM new_rows
+                UNION ALL
+                SELECT 'showcase', count(*) FILTER (WHERE showcase) FROM new_rows
+            ) AS delta
+            WHERE counters.name = delta.name AND delta.amount <> 0{shard};
+
+            INSERT INTO logs.showcase_queries (query_id)
+            SELECT id FROM new_rows WHERE showcase
+            ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION logs.queries_counters_delete() RETURNS trigger AS $$
+        BEGIN
+            UPDATE logs.query_counters AS counters
+            SET value = counters.value - delta.amount, updated_at = now()
+            FROM (
+                SELECT 'total' AS name, count(*) AS amount FROM old_rows
+                UNION ALL
+                SELECT 'showcase', count(*) FILTER (WHERE showcase) FROM old_rows
+            ) AS delta
+            WHERE counters.name = delta.name AND delta.amount <> 0{shard};
+
+            DELETE FROM logs.showcase_queries
+            WHERE query_id IN (SELECT id FROM old_rows WHERE showcase);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION logs.queries_counters_update() RETURNS trigger AS $$
+        BEGIN
+            UPDATE logs.query_counters AS counters
+            SET value = counters.value
+                + (SELECT count(*) FILTER (WHERE showcase) FROM new_rows)
+                - (SELECT count(*) FILTER (WHERE showcase) FROM old_rows),
+                updated_at = now()
+            WHERE counters.name = 'showcase'{shard};
+
+            DELETE FROM logs.showcase_queries
+            WHERE query_id IN (
+                SELECT old_rows.id FROM old_rows JOIN new_rows ON new_rows.id = old_rows.id
+                WHERE old_rows.showcase AND NOT new_rows.showcase
+            );
+            INSERT INTO logs.showcase_queries (query_id)
+            SELECT new_rows.id FROM new_rows JOIN old_rows ON old_rows.id = new_rows.id
+            WHERE new_rows.showcase AND NOT old_rows.showcase
+            ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """
+
+
+def upgrade() -> None:
+    # Every write to logs.queries used to update the same 'total' row, so concurrent
+    # inserts queued on its row lock. Each connection now updates the shard picked
+    # by its backend pid and readers add the shards up. A shard may go negative
+    # (a delete on another connection than the insert); only the sum means anything.
+    op.add_column(
+        'query_counters',
+        sa.Column('shard', sa.SmallInteger(), nullable=False, server_default='0', comment="Row of the counter a connection updates"),
+        schema='logs'
+    )
+    op.execute("ALTER TABLE logs.query_counters DROP CONSTRAINT query_counters_pkey")
+    op.execute("ALTER TABLE logs.query_counters ADD PRIMARY KEY (name, shard)")
+    op.execute(f"""
+        INSERT INTO logs.query_counters (name, shard, value)
+        SELECT counters.name, shards.shard, 0
+        FROM logs.query_counters AS counters, generate_series(1, {SHARDS - 1}) AS shards (shard)
+    """)
+    op.execute(counter_functions(f" AND counters.shard = pg_backend_pid() % {SHARDS}"))
+
+
+def downgrade() -> None:
+    op.execute(counter_functions(""))
+    op.execute("LOCK TABLE logs.query_counters IN EXCLUSIVE MODE")
+    op.execute("""
+        UPDATE logs.query_counters AS counters
+        SET value = totals.value, updated_at = now()
+        FROM (SELECT name, sum(value) AS value FROM logs.query_counters GROUP BY name) AS totals
+        WHERE counters.name = totals.name AND counters.shard = 0
+    """)
+    op.execute("DELETE FROM logs.query_counters WHERE shard <> 0")
+    op.execute("ALTER TABLE logs.query_counters DROP CONSTRAINT query_counters_pkey")
+    op.execute("ALTER TABLE logs.query_counters ADD PRIMARY KEY (name)")
+    op.drop_column('query_counters', 'shard', schema='logs')
@@ -3,7 +3,7 @@ import os
 from mastermind import begin_era, logger
 
 def main():
-    app = begin_era()
+    app = begin_era(warm=True)
 
 
     logger.info("🚀 Jack is writing...")
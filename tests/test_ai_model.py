@@ -0,0 +1,171 @@
+# tests/test_ai_model.py
+import json
+import pytest
+from mastermind.ai_model import (
+    AnswerStreamExtractor, parse_answer_content, iter_stream_tokens, prepare_json_payload, speaking_time_tokens,
+    construct_full_prompt
+)
+
+MODEL_OUTPUT = json.dumps({
+    "answer": "Housing is a \"crisis\".\nWe act now — together.",
+    "inference": False,
+    "links": [{"url": "https://example.com/housing/", "text": "Housing"}]
+})
+
+class FakeStream:
+    """Minimal stand-in for a streamed requests.Response."""
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=True):
+        return iter(self.lines)
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(MODEL_OUTPUT)])
+def test_extractor_decodes_answer_across_chunk_boundaries(size):
+    """The answer comes out intact however the tokens are split."""
+    extractor = AnswerStreamExtractor()
+    pieces = [MODEL_OUTPUT[i:i + size] for i in range(0, len(MODEL_OUTPUT), size)]
+    streamed = "".join(extractor.feed(piece) for piece in pieces)
+    assert streamed == json.loads(MODEL_OUTPUT)["answer"]
+    assert extractor.state == "done"
+    assert extractor.text == MODEL_OUTPUT
+
+def test_parse_answer_content_reads_links_after_stream():
+    """The complete streamed text still yields links and the inference flag."""
+    result = parse_answer_content(MODEL_OUTPUT)
+    assert result["answer"] == json.loads(MODEL_OUTPUT)["answer"]
+    assert not result["warning"]
+    assert result["links"][0]["url"] == "https://example.com/housing/"
+    assert result["inference"] is False
+
+def test_streamed_tokens_and_final_answer_agree(monkeypatch):
+    """The `done` result (and so the saved answer) is the text the client was streamed, links included."""
+    import types
+    import mastermind.ai_model as ai_model
+
+    class FakeEventStream(FakeStream):
+        status_code = 200
+
+        def close(self):
+            pass
+
+    lines = [f"data: {json.dumps({'response': MODEL_OUTPUT[i:i + 5]})}" for i in range(0, len(MODEL_OUTPUT), 5)]
+    monkeypatch.setattr(ai_model, 'prepare_full_prompt', lambda *args, **kwargs: "prompt")
+    monkeypatch.setattr(ai_model, 'prompt_template', lambda *args: types.SimpleNamespace(prefix=lambda prompt: (0, "key")))
+    monkeypatch.setattr(ai_model, 'send_request', lambda *args, **kwargs: FakeEventStream(lines + ["data: [DONE]"]))
+
+    events = list(ai_model.stream_response("Housing?", {}, CONFIG))
+    streamed = "".join(text for kind, text in events if kind == 'token')
+    kind, result = events[-1]
+    assert kind == 'done'
+    assert result['answer'] == streamed == 'Housing is a "crisis".\nWe act now — together.'
+    assert result['links'][0]['url'] == "https://example.com/housing/"
+    assert not result['warning']
+
+def test_parse_answer_content_without_json():
+    """Plain text is passed through with a warning."""
+    result = parse_answer_content("Just words.")
+    assert result["answer"] == "Just words."
+    assert result["warning"]
+
+def test_iter_stream_tokens_reads_sse_events():
+    """Workers AI SSE frames are turned into text pieces, stopping at [DONE]."""
+    lines = [
+        'data: {"response": "{\\"answer\\": \\"Hi"}',
+        "",
+        "data: not json",
+        'data: {"response": "\\"}", "usage": {"total_tokens": 5}}',
+        "data: [DONE]",
+        'data: {"response": "ignored"}',
+    ]
+    events = list(iter_stream_tokens(FakeStream(lines)))
+    assert [text for text, _ in events] == ['{"answer": "Hi', '"}']
+    assert events[-1][1] == {"total_tokens": 5}
+
+def test_iter_stream_tokens_decodes_utf8_without_a_charset():
+    """A text/event-stream with no charset is still read as UTF-8, even with characters split across chunks."""
+    import io
+    import requests
+    from requests.utils import get_encoding_from_headers
+
+    text = "I’ve worked on it — with Zoë Martínez."
+    body = f"data: {json.dumps({'response': text}, ensure_ascii=False)}\n\ndata: [DONE]\n\n".encode('utf-8')
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'text/event-stream'
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.raw = io.BytesIO(body)
+    assert response.encoding == 'ISO-8859-1'  # What requests picks for this reply
+
+    assert [piece for piece, _ in iter_stream_tokens(response)] == [text]
+
+CONFIG = {'ai': {'settings': {'temperature': 0.5, 'frequency_penalty': 0.5}}}
+
+def test_speaking_time_tokens_scales_with_seconds():
+    """30 s at 150 wpm is 75 words, plus the JSON/links overhead."""
+    assert speaking_time_tokens(30) == 102 + 200
+    assert speaking_time_tokens(60, {'overhead_tokens': 0}) == 203
+
+@pytest.mark.parametrize("option, expected", [
+    (None, {'temperature': 0.5, 'frequency_penalty': 0.5}),
+    ({'speaking_seconds': 30}, {'temperature': 0.5, 'frequency_penalty': 0.5, 'max_tokens': 302}),
+    ({'speaking_seconds': 30, 'settings': {'max_tokens': 80, 'temperature': 0.2}},
+     {'temperature': 0.2, 'frequency_penalty': 0.5, 'max_tokens': 80}),
+])
+def test_prepare_json_payload_forwards_generation_settings(option, expected):
+    """Global settings are sent, overlaid by the response type's own and its speaking-time cap."""
+    payload = prepare_json_payload("system", "prompt", CONFIG, option)
+    assert payload.pop('messages')[1] == {"role": "user", "content": "prompt"}
+    assert payload == expected
+
+
+def test_prompt_template_keeps_the_static_prefix_first():
+    """Requests for different questions and response types share the whole static prefix."""
+    from mastermind.ai_model import SYSTEM_PROMPT, prepare_full_prompt, prompt_template
+    config = {'ai': {'prompt': 'Answer as Don.', 'retrieval': {'enabled': False}}}
+    data = {'bio.md': 'Source: https://example.com/bio\n\nDon is a congressman.'}
+
+    first = prepare_full_prompt(data, config, 'Housing? Be concise.')
+    second = prepare_full_prompt(data, config, 'Transit? Take 30 seconds.')
+    template = prompt_template(config, data)
+
+    assert first == construct_full_prompt('Answer as Don.', data['bio.md'], 'Housing? Be concise.')
+    assert first.startswith(template.user_prefix) and second.startswith(template.user_prefix)
+    assert template.prefix_chars == len(SYSTEM_PROMPT) + len(template.user_prefix)
+    assert prompt_template(dict(config), data) is not template  # A reloaded config recompiles
+
+def test_context_budget_leaves_room_for_the_answer():
+    """Longer answers get less context, and a response type's own cap wins when it is smaller."""
+    from mastermind.ai_model import context_budget, prompt_template
+    config = {'ai': {'prompt': 'Answer as Don.', 'context': {'window_tokens': 4000, 'reserve_tokens': 100}}}
+    template = prompt_template(config, {})
+
+    short = context_budget(config, template, 'Housing?', {'settings': {'max_tokens': 200}})
+    long = context_budget(config, template, 'Housing?', {'settings': {'max_tokens': 1200}})
+    assert short - long == 1000
+    assert short == 4000 - 100 - 200 - template.base_tokens - 2
+    assert context_budget(config, template, 'Housing?', {'context_tokens': 50}) == 50
+
+def test_oversized_static_corpus_falls_back_to_packed_chunks():
+    """With retrieval off, a corpus over the budget is replaced by the chunks that fit."""
+    from flask import Flask, g
+    from mastermind.ai_model import SYSTEM_PROMPT, prepare_full_prompt, prompt_template
+    config = {'ai': {'prompt': 'Answer as Don.', 'retrieval': {'enabled': False}}}
+    data = {
+        'housing.md': 'Title:  Housing\n\nAffordable housing in Virginia.',
+        'transit.md': 'Title:  Transit\n\n' + 'Metro funding keeps us moving. ' * 40,
+    }
+
+    whole = prepare_full_prompt(data, config, 'Housing?')
+    packed = prepare_full_prompt(data, config, 'Housing?', response_option={'context_tokens': 30})
+    assert 'Metro funding' in whole and 'Affordable housing' in whole
+    assert 'Affordable housing' in packed and 'Metro funding' not in packed
+
+    # Only the system prompt and instructions are shared by the packed prompt, and affinity follows them
+    template = prompt_template(config, data)
+    assert template.prefix(whole) == (template.prefix_chars, template.prefix_key)
+    assert template.prefix(packed) == (len(SYSTEM_PROMPT) + len('Answer as Don.\n\n'), template.instructions_key)
+    assert template.instructions_key != template.prefix_key
+    with Flask(__name__).test_request_context():
+        prepare_full_prompt(data, config, 'Housing?', response_option={'context_tokens': 30})
+        assert g.prompt_prefix[0] == template.instructions_chars
@@ -1,16 +1,276 @@
 # tests/test_backend.py
+import json
 import pytest
+from sqlalchemy import text
+from benchmarks.mock_llm import MockLLMServer
+import mastermind.ai_model as ai_model
 from mastermind import backend
 
+TEST_EMAIL = 'backend-test@example.com'
+TEST_PASSWORD = 'Backend-test-password-1!'
+
+
+@pytest.fixture(scope='module')
+def app():
+    """Flask application backed by the configured Postgres database; skipped if it is unreachable."""
+    from mastermind import begin_era
+    from mastermind.models import db
+    try:
+        app = begin_era()
+        with app.app_context():
+            db.session.execute(text('SELECT 1'))
+    except Exception as e:
+        pytest.skip(f"Database not available: {e}")
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+@pytest.fixture(scope='module')
+def mock_llm():
+    """Local mock of the AI API answering with well-formed JSON."""
+    with MockLLMServer(latency=0.01) as server:
+        yield server
+
+
 @pytest.fixture
-def client():
-    """Test client for the Flask application."""
+def client(app, mock_llm, monkeypatch):
+    """Test client logged in as a throwaway user, with the AI API mocked and the answer cache off."""
+    from mastermind.models import db, User, UserType, UserTypeEnum, Query, Response
+
+    monkeypatch.setattr(ai_model, 'CLOUDFLARE_API_BASE', mock_llm.base_url)
+    backend.get_config()  # Load it now so it does not re-enable the cache mid-test
+    monkeypatch.setattr(backend.response_cache, 'enabled', False)
+
+    with app.app_context():
+        user = User.query.filter_by(email=TEST_EMAIL).first()
+        if not user:
+            user = User(email=TEST_EMAIL, user_type=UserType.query.filter_by(name=UserTypeEnum.USER).first())
+            user.set_password(TEST_PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+        user_id = user.user_id
+
     with app.test_client() as client:
+        client.post('/auth/login', data={'email': TEST_EMAIL, 'password': TEST_PASSWORD})
         yield client
 
+    with app.app_context():
+        response_ids = [query.response_id for query in Query.query.filter_by(user_id=user_id)]
+        db.session.query(Response).filter(Response.id.in_(response_ids)).delete(synchronize_session=False)
+        db.session.delete(User.query.get(user_id))
+        db.session.commit()
+
+
 def test_ask_question(client):
     """Test the question-answer functionality."""
-    response = client.post('/api/ask', json={'question': 'What is your stance on environment?'})
+    response = client.post(
+        '/api/ask',
+        json={'question': 'What is your stance on environment?', 'response_type': 'Concise'},
+        headers={'User-ID': TEST_EMAIL}
+    )
     json_data = response.get_json()
     assert response.status_code == 200
     assert 'answer' in json_data
+    # Estimated prompt tokens next to what the (mock) AI API counted
+    estimate, actual = map(int, response.headers['X-Prompt-Tokens'].split('/'))
+    assert estimate > 0 and actual == 1200
+
+def test_streamed_answer_keeps_non_ascii_text(app, client):
+    """Tokens streamed as raw UTF-8 reach the client and the log unchanged."""
+    from benchmarks.mock_llm import ANSWER
+    from mastermind.models import Query, User
+
+    response = client.post(
+        '/api/ask', json={'question': 'What about housing?', 'response_type': 'Concise', 'stream': True},
+        headers={'User-ID': TEST_EMAIL}
+    )
+    events = [json.loads(line[len('data: '):]) for line in response.get_data(as_text=True).splitlines()
+              if line.startswith('data: ')]
+    assert "".join(event.get('text', '') for event in events[:-1]) == ANSWER['answer']
+    assert events[-1]['answer'] == ANSWER['answer']
+
+    with app.app_context():
+        user = User.query.filter_by(email=TEST_EMAIL).first()
+        assert Query.query.filter_by(user_id=user.user_id).one().response.response_text == ANSWER['answer']
+
+def test_usage_is_recorded_and_summarized(app, client):
+    """The query row keeps the API's token usage, and the usage report adds it up per user."""
+    from datetime import datetime, timedelta
+    from mastermind.models import Query, User
+    from mastermind.backend.usage import usage_summary
+
+    client.post(
+        '/api/ask', json={'question': 'What about Metro funding?', 'response_type': 'Concise'},
+        headers={'User-ID': TEST_EMAIL}
+    )
+
+    with app.app_context():
+        user = User.query.filter_by(email=TEST_EMAIL).first()
+        query = Query.query.filter_by(user_id=user.user_id).one()
+        assert (query.prompt_tokens, query.completion_tokens, query.cache_hit) == (1200, 60, False)
+        assert query.model == ai_model.MODEL
+        assert query.prompt_tokens_estimate > 0 and query.upstream_ms >= 0
+
+        rows = usage_summary(
+            datetime.utcnow() - timedelta(days=1), group_by=('user', 'response_type'),
+            pricing={'prompt_per_million': 1.0, 'completion_per_million': 2.0}
+        )
+        row = next(row for row in rows if row['user'] == TEST_EMAIL)
+        assert row['response_type'] == 'Concise'
+        assert (row['queries'], row['cache_hits'], row['total_tokens']) == (1, 0, 1260)
+        assert row['cost_usd'] == round((1200 * 1.0 + 60 * 2.0) / 1_000_000, 6)
+
+def test_query_counters_follow_inserts_updates_and_deletes(app, client):
+    """Triggers keep the counters and showcase ids in step with logs.queries."""
+    from mastermind.models import db, Query, QueryCounter, ShowcaseQuery, User
+    from mastermind.utils.query_stats import query_stats
+
+    def counts():
+        return QueryCounter.totals()
+
+    with app.app_context():
+        user = User.query.filter_by(email=TEST_EMAIL).first()
+        before = counts()
+        queries = [Query(query_text=f"Question {i}", user_id=user.user_id, showcase=i == 0) for i in range(3)]
+        db.session.add_all(queries)
+        db.session.commit()
+        showcased = queries[0].id
+        assert counts() == {'total': before['total'] + 3, 'showcase': before['showcase'] + 1}
+        assert db.session.get(ShowcaseQuery, showcased) is not None
+
+        query_stats.invalidate()
+        assert showcased in query_stats.snapshot()['showcase_ids']
+        assert showcased in [query.id for query in query_stats.random_showcase(len(query_stats.snapshot()['showcase_ids']))]
+
+        queries[0].showcase = False
+        db.session.commit()
+        assert counts()['showcase'] == before['showcase']
+        assert db.session.get(ShowcaseQuery, showcased) is None
+
+        for query in queries:
+            db.session.delete(query)
+        db.session.commit()
+        assert counts() == before
+        query_stats.invalidate()
+
+        # Each connection updates its own row of a counter
+        assert db.session.query(QueryCounter).filter_by(name='total').count() == 16
+
+def test_metrics_serves_counter_snapshot(client):
+    """The public metrics route answers from the counters snapshot."""
+    from mastermind.utils.query_stats import query_stats
+    query_stats.invalidate()
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.get_json()['total_queries'] == query_stats.snapshot()['total_queries']
+
+def test_history_pages_through_every_query_once(app, client):
+    """Following next_cursor walks the whole history newest first, without gaps or repeats."""
+    from datetime import datetime, timedelta
+    from mastermind.models import db, Query, Response, User
+
+    with app.app_context():
+        user = User.query.filter_by(email=TEST_EMAIL).first()
+        started = datetime(2026, 1, 1)
+        for i in range(5):
+            response = Response(response_text=f"Answer {i}")
+            db.session.add(response)
+            db.session.flush()
+            # Two queries share a timestamp, so the id breaks the tie
+            db.session.add(Query(
+                query_text=f"History {i}", user_id=user.user_id, response_id=response.id,
+                created_at=started + timedelta(minutes=min(i, 3))
+            ))
+        db.session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        page = client.get('/api/history', query_string={'limit': 2, **({'cursor': cursor} if cursor else {})}).get_json()
+        seen.extend((query['query_text'], query['response_text']) for query in page['queries'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert seen == [(f"History {i}", f"Answer {i}") for i in (4, 3, 2, 1, 0)]
+
+    assert client.get('/api/history?cursor=not-a-cursor').status_code == 400
+    assert client.get('/auth/profile?cursor=not-a-cursor').status_code == 200
+
+def test_partition_maintenance_moves_stranded_rows_and_detaches_expired_months(app, client, monkeypatch):
+    """Creating a month moves its rows out of the default partition; expiring it takes the counters along."""
+    from datetime import date, datetime
+    from mastermind.models import db, Query, QueryCounter, Response, User
+    from mastermind.utils.partitions import partition_maintenance
+
+    def counts():
+        return QueryCounter.totals()
+
+    month = date(2001, 1, 1)
+    with app.app_context():
+        user = User.query.filter_by(email=TEST_EMAIL).first()
+        before = counts()
+        old = datetime(2001, 1, 15)
+        response = Response(response_text="An old answer", created_at=old)
+        db.session.add(response)
+        db.session.flush()
+        db.session.add(Query(query_text="An old question", user_id=user.user_id, response_id=response.id, showcase=True, created_at=old))
+        db.session.commit()
+        assert partition_maintenance.partitions('logs.queries')[1] == 'logs.queries_default'
+
+        created = [partition_maintenance.create(table, month) for table in ('logs.responses', 'logs.queries')]
+        assert created == ['logs.responses_p2001_01', 'logs.queries_p2001_01']
+        assert db.session.execute(text("SELECT count(*) FROM logs.queries_p2001_01")).scalar() == 1
+        assert counts() == {'total': before['total'] + 1, 'showcase': before['showcase'] + 1}
+
+        monkeypatch.setitem(partition_maintenance.settings, 'retention_months', 1)
+        monkeypatch.setitem(partition_maintenance.settings, 'archive_schema', None)
+        assert partition_maintenance.expire(current=date(2001, 3, 1)) == created
+        assert month not in partition_maintenance.partitions('logs.queries')[0]
+        assert counts() == before
+
+def test_search_ranks_question_matches_first_and_pages(app, client):
+    """Full-text search finds a term in questions and answers, question matches first, one page at a time."""
+    from mastermind.models import db, Query, Response, User
+    from mastermind.backend.search import search_queries
+
+    with app.app_context():
+        user = User.query.filter_by(email=TEST_EMAIL).first()
+        for question, answer in (
+            ("What about the Metro Silver Line?", "We extended the Silver Line."),
+            ("What about roads?", "Roads and the Metro both need funding."),
+            ("What about parks?", "More parks."),
+            ("What about <b>tags</b>?", "<script>alert('Metro')</script> & the Orange Line"),
+        ):
+            response = Response(response_text=answer)
+            db.session.add(response)
+            db.session.flush()
+            db.session.add(Query(query_text=question, user_id=user.user_id, response_id=response.id))
+        db.session.commit()
+
+        rows, total = search_queries('metro', page=1, per_page=1)
+        assert total >= 2
+        assert rows[0]['query_text'] == "What about the Metro Silver Line?"
+        rows, _ = search_queries('metro -silver', page=1, per_page=1)
+        assert rows[0]['query_text'] == "What about roads?"
+        assert '<mark>Metro</mark>' in rows[0]['headline']
+        assert search_queries('metro', page=1000, per_page=100) == ([], total)
+
+        # Only the highlight markers are markup
+        rows, _ = search_queries('orange', page=1, per_page=1)
+        headline = rows[0]['headline']
+        assert "&lt;/script&gt; &amp; the <mark>Orange</mark> Line" in headline
+        assert not {'<', '>'} & set(headline.replace('<mark>', '').replace('</mark>', ''))
+
+    # Staff only
+    assert client.get('/api/search?q=metro').status_code == 403
+
+@pytest.mark.parametrize('payload', [
+    {'items': ['What about housing?']},
+    {'questions': ['What about housing?'], 'response_type': 'Concise', 'concurrency': 'x'},
+    {'questions': ['What about housing?'], 'response_type': 'Tweet'},
+])
+def test_batch_rejects_bad_input_with_json_400(client, payload):
+    """Malformed batches get a JSON error instead of a server error."""
+    response = client.post('/api/ask/batch', json=payload)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
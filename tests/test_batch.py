@@ -0,0 +1,53 @@
+# tests/test_batch.py
+import io
+import pytest
+from mastermind.backend.batch import expand_items, read_items, batch_settings
+
+
+def test_expand_items_crosses_questions_and_response_types():
+    """Every question is asked in every requested response type, after explicit items."""
+    items = expand_items({
+        'items': [{'question': 'Explicit?', 'response_type': 'Tweet'}],
+        'questions': ['Housing?', 'Transit?'],
+        'response_types': ['Concise', 'Detailed'],
+    })
+    assert items == [
+        {'question': 'Explicit?', 'response_type': 'Tweet'},
+        {'question': 'Housing?', 'response_type': 'Concise'},
+        {'question': 'Housing?', 'response_type': 'Detailed'},
+        {'question': 'Transit?', 'response_type': 'Concise'},
+        {'question': 'Transit?', 'response_type': 'Detailed'},
+    ]
+
+
+def test_expand_items_drops_blank_questions():
+    assert expand_items({'questions': ['', 'Housing?'], 'response_type': 'Concise'}) == [
+        {'question': 'Housing?', 'response_type': 'Concise'}
+    ]
+
+
+def test_read_items_accepts_text_and_json_lines():
+    source = io.StringIO('Housing?\n\n{"question": "Transit?", "response_type": "Detailed"}\n')
+    assert read_items(source, ('Concise',)) == [
+        {'question': 'Housing?', 'response_type': 'Concise'},
+        {'question': 'Transit?', 'response_type': 'Detailed'},
+    ]
+
+
+@pytest.mark.parametrize('config, expected', [
+    ({}, 32),
+    ({'batch': {'max_concurrency': 4}}, 4),
+])
+def test_batch_settings_defaults(config, expected):
+    assert batch_settings(config)['max_concurrency'] == expected
+
+
+@pytest.mark.parametrize('payload', [
+    ['Housing?'],
+    {'items': ['Housing?']},
+    {'questions': 'Housing?'},
+    {'items': [{'question': 42, 'response_type': 'Concise'}]},
+])
+def test_expand_items_rejects_malformed_payloads(payload):
+    with pytest.raises(ValueError):
+        expand_items(payload)
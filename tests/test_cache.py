@@ -0,0 +1,65 @@
+# tests/test_cache.py
+import time
+import pytest
+from mastermind.utils.cache import ResponseCache, TTLCache, normalize_question, is_cacheable
+
+AI_CONFIG = {"model": "llama", "settings": {"temperature": 0.5}}
+
+@pytest.fixture
+def cache():
+    """An enabled in-process answer cache."""
+    response_cache = ResponseCache()
+    response_cache.configure({"enabled": True, "ttl_seconds": 60, "max_entries": 2})
+    return response_cache
+
+def test_normalize_question_ignores_case_space_and_punctuation():
+    """Trivially different phrasings normalize to the same text."""
+    assert normalize_question("  What is your position on   HOUSING? ") == "what is your position on housing"
+
+def test_key_changes_with_response_type_settings_and_corpus(cache):
+    """Anything that alters the answer yields a different key."""
+    base = cache.make_key("Housing?", "Concise", AI_CONFIG, "v1")
+    assert cache.make_key("housing", "Concise", AI_CONFIG, "v1") == base
+    assert cache.make_key("housing", "Detailed", AI_CONFIG, "v1") != base
+    assert cache.make_key("housing", "Concise", {**AI_CONFIG, "model": "other"}, "v1") != base
+    assert cache.make_key("housing", "Concise", AI_CONFIG, "v2") != base
+
+def test_hits_misses_and_lru_eviction(cache):
+    """Counters track lookups and the oldest entry is evicted first."""
+    assert cache.get("a") is None
+    cache.set("a", {"answer": "A"})
+    cache.set("b", {"answer": "B"})
+    assert cache.get("a") == {"answer": "A"}
+    cache.set("c", {"answer": "C"})
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+
+def test_invalidate_clears_entries(cache):
+    """Reloading data or config drops cached answers."""
+    cache.set("a", {"answer": "A"})
+    cache.invalidate()
+    assert cache.get("a") is None
+
+def test_ttl_expiry():
+    """Entries disappear once their TTL has passed."""
+    ttl_cache = TTLCache(max_entries=10, ttl=0.01)
+    ttl_cache.set("a", 1)
+    time.sleep(0.02)
+    assert ttl_cache.get("a") is None
+
+def test_errors_are_not_cacheable():
+    """Upstream failures are never cached."""
+    assert is_cacheable({"answer": "Fine."})
+    assert not is_cacheable({"answer": "Error: 500 - boom"})
+    assert not is_cacheable({"answer": ""})
+
+def test_unparsed_answers_are_not_cacheable():
+    """Raw model output that was not a JSON answer is retried instead of cached."""
+    from mastermind.ai_model import parse_answer_content
+    assert is_cacheable(parse_answer_content('{"answer": "Fine.", "links": []}'))
+    assert not is_cacheable(parse_answer_content("Just words."))
+    assert not is_cacheable(parse_answer_content('{"answer": "Cut off'))
+    assert not is_cacheable(parse_answer_content('{"answer": "Fine.", "links": [}'))
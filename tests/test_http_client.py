@@ -0,0 +1,125 @@
+# tests/test_http_client.py
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from mastermind.utils.http_client import PooledHTTPClient, AsyncPooledHTTPClient, parse_retry_after
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers 429 for the first `failures` requests, then 200."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        server = self.server
+        server.hits += 1
+        if server.hits <= server.failures:
+            body = b'{"errors": ["slow down"]}'
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+        else:
+            body = b'{"result": {"response": "{}"}, "success": true}'
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    """Local stand-in for the Cloudflare endpoint."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.hits = 0
+    server.failures = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def url_for(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/ai/run"
+
+def test_connections_are_reused(stub_server):
+    """Keep-alive means several requests share one pooled connection."""
+    client = PooledHTTPClient(max_retries=0)
+    for _ in range(3):
+        assert client.post(url_for(stub_server), json={}).status_code == 200
+    stats = client.stats()
+    assert stats["requests"] == 3
+    assert stats["pools"][0]["connections_opened"] == 1
+
+def test_retries_on_429_honouring_retry_after(stub_server):
+    """A 429 with Retry-After: 0 is retried until it succeeds."""
+    stub_server.failures = 2
+    client = PooledHTTPClient(max_retries=2)
+    response = client.post(url_for(stub_server), json={})
+    assert response.status_code == 200
+    assert client.stats()["retries"] == 2
+
+def test_gives_up_after_max_retries(stub_server):
+    """Once retries are spent the last error response is returned."""
+    stub_server.failures = 5
+    client = PooledHTTPClient(max_retries=1, backoff_base=0)
+    assert client.post(url_for(stub_server), json={}).status_code == 429
+    assert client.stats()["failures"] == 1
+
+def test_connect_failure_raises():
+    """Nothing listening raises after the retries are used up."""
+    client = PooledHTTPClient(max_retries=1, backoff_base=0, connect_timeout=0.5)
+    with pytest.raises(requests.ConnectionError):
+        client.post("http://127.0.0.1:9/ai/run", json={})
+    assert client.stats()["retries"] == 1
+
+def test_async_client_retries_and_reuses_connections(stub_server):
+    """The asyncio client retries a 429 and keeps its counters."""
+    stub_server.failures = 1
+
+    async def run():
+        client = AsyncPooledHTTPClient(max_retries=1)
+        try:
+            responses = await asyncio.gather(*(client.post(url_for(stub_server), json={}) for _ in range(3)))
+            return responses, client.stats()
+        finally:
+            await client.aclose()
+
+    responses, stats = asyncio.run(run())
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert stats["retries"] == 1
+    assert stats["in_flight"] == 0
+
+def test_parse_retry_after():
+    """Retry-After accepts delta-seconds and ignores garbage."""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+def test_read_timeout_is_not_retried():
+    """A POST that timed out waiting for the answer is not sent again."""
+    class SlowHandler(StubHandler):
+        def do_POST(self):
+            self.server.hits += 1
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.server.release.wait(2)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    server.hits = 0
+    server.release = threading.Event()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = PooledHTTPClient(max_retries=2, backoff_base=0, read_timeout=0.2)
+        with pytest.raises(requests.ReadTimeout):
+            client.post(url_for(server), json={})
+        assert server.hits == 1
+        assert client.stats()["retries"] == 0
+        assert client.stats()["timeouts"] == 1
+    finally:
+        server.release.set()
+        server.shutdown()
+        server.server_close()
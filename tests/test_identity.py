@@ -0,0 +1,41 @@
+# tests/test_identity.py
+import uuid
+import pytest
+from mastermind.models import UserTypeEnum
+from mastermind.utils.identity import Identity, IdentityCache
+
+
+@pytest.fixture
+def identity():
+    """A cached identity for a regular user."""
+    return Identity(uuid.uuid4(), 'user@example.com', True, 'USER')
+
+
+def test_identity_exposes_role_like_a_user(identity):
+    assert identity.user_type.name is UserTypeEnum.USER
+    assert identity.user_type.name.value == 'USER'
+    assert identity.is_authenticated and identity.is_active
+    assert identity.get_id() == str(identity.user_id)
+
+
+def test_cached_identity_is_served_without_loading(identity):
+    cache = IdentityCache()
+    cache.by_id.set(str(identity.user_id), identity)
+    cache.by_email.set(identity.email, identity)
+
+    assert cache.get(identity.user_id) is identity
+    assert cache.get_by_email(identity.email) is identity
+    assert cache.stats()['hits'] == 2
+
+
+def test_invalidate_drops_id_and_every_email(identity):
+    cache = IdentityCache()
+    cache.by_id.set(str(identity.user_id), identity)
+    cache.by_email.set(identity.email, identity)
+    cache.by_email.set('old@example.com', identity)
+
+    cache.invalidate(identity.user_id, 'old@example.com')
+
+    assert cache.by_id.get(str(identity.user_id)) is None
+    assert cache.by_email.get(identity.email) is None
+    assert cache.by_email.get('old@example.com') is None
@@ -0,0 +1,65 @@
+# tests/test_load.py
+import os
+import pytest
+from mastermind.data_manager.load import CorpusLoader
+from mastermind.data_manager.retrieve import get_index
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """A data directory with two markdown documents and a file that is not one."""
+    (tmp_path / "issues").mkdir()
+    (tmp_path / "issues" / "housing.md").write_text("Title:  Housing\n\nAffordable housing in Virginia.\n")
+    (tmp_path / "issues" / "transportation.md").write_text("Title:  Transportation\n\nMetro funding.\n")
+    (tmp_path / "notes.txt").write_text("not part of the corpus")
+    return tmp_path
+
+def touch(path, text):
+    """Rewrite `path` and move its mtime forward so the change is seen even on coarse clocks."""
+    stat = path.stat()
+    path.write_text(text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_unchanged_reload_returns_same_snapshot(data_dir):
+    """Nothing on disk changed, so no file is re-read and the snapshot is reused."""
+    loader = CorpusLoader(str(data_dir))
+    first = loader.load()
+    assert sorted(first) == [os.path.join("issues", "housing.md"), os.path.join("issues", "transportation.md")]
+    assert loader.load() is first
+    assert loader.files_read == 2
+
+def test_only_changed_files_are_reread(data_dir):
+    """Editing, adding and removing files re-reads just those and yields a new version."""
+    loader = CorpusLoader(str(data_dir))
+    first = loader.load()
+    touch(data_dir / "issues" / "housing.md", "Title:  Housing\n\nHousing vouchers.\n")
+    (data_dir / "issues" / "climate.md").write_text("Title:  Climate\n\nClean energy.\n")
+    (data_dir / "issues" / "transportation.md").unlink()
+
+    second = loader.load()
+    assert second is not first
+    assert second.version != first.version
+    assert loader.files_read == 4
+    assert loader.last_changes == {
+        "added": [os.path.join("issues", "climate.md")],
+        "modified": [os.path.join("issues", "housing.md")],
+        "removed": [os.path.join("issues", "transportation.md")],
+    }
+    assert "Housing vouchers" in second[os.path.join("issues", "housing.md")]
+    # The old snapshot is untouched for requests still using it
+    assert "Affordable housing" in first[os.path.join("issues", "housing.md")]
+
+def test_touched_file_with_same_content_is_not_a_change(data_dir):
+    """A new mtime alone re-reads the file but keeps the snapshot."""
+    loader = CorpusLoader(str(data_dir))
+    first = loader.load()
+    path = data_dir / "issues" / "housing.md"
+    touch(path, path.read_text())
+    assert loader.load() is first
+
+def test_snapshot_is_read_only_and_keeps_its_index(data_dir):
+    """Snapshots cannot be mutated in place, and their index is built once."""
+    snapshot = CorpusLoader(str(data_dir)).load()
+    with pytest.raises(TypeError):
+        snapshot["issues/new.md"] = "text"
+    assert get_index(snapshot) is get_index(snapshot)
+    assert get_index(snapshot).search("Metro")[0][0].title == "Transportation"
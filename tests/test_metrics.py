@@ -0,0 +1,110 @@
+# tests/test_metrics.py
+import json
+import os
+from flask import Flask, g
+from mastermind.utils.metrics import (
+    Counter, Gauge, Histogram, Registry, PROMPT_ESTIMATE_RATIO, record_stage, record_prompt_tokens, server_timing_header
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("test_seconds", "Test latency.", ("stage",), buckets=(0.1, 1.0)))
+    histogram.observe(0.05, stage="parse")
+    histogram.observe(0.5, stage="parse")
+    histogram.observe(5.0, stage="parse")
+
+    text = registry.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="parse",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="parse"} 3' in text
+    assert 'test_seconds_sum{stage="parse"} 5.55' in text
+
+
+def test_counter_renders_totals_with_escaped_labels():
+    registry = Registry()
+    counter = registry.register(Counter("test_requests", "Test requests.", ("endpoint", "status")))
+    counter.inc(endpoint='say "hi"', status=200)
+    counter.inc(2, endpoint='say "hi"', status=200)
+
+    assert 'test_requests_total{endpoint="say \\"hi\\"",status="200"} 3' in registry.render()
+
+
+def test_gauge_keeps_the_last_value():
+    registry = Registry()
+    gauge = registry.register(Gauge("test_startup_seconds", "Test startup.", ("phase",)))
+    gauge.set(0.5, phase="boot")
+    gauge.set(0.25, phase="boot")
+
+    assert 'test_startup_seconds{phase="boot"} 0.25' in registry.render()
+
+
+def test_shared_registry_reports_every_worker(tmp_path):
+    def worker_registry():
+        registry = Registry()
+        registry.register(Counter("test_requests", "Test requests.", ("endpoint",)))
+        registry.register(Histogram("test_seconds", "Test latency.", buckets=(0.1, 1.0)))
+        registry.register(Gauge("test_startup_seconds", "Test startup.", ("phase",)))
+        registry.share(tmp_path)
+        return registry
+
+    # Another worker's file, written under its pid (1 is always running)
+    other = worker_registry()
+    other.metrics[0].inc(2, endpoint="ask")
+    other.metrics[1].observe(0.05)
+    other.metrics[2].set(0.5, phase="boot")
+    other.write()
+    os.replace(tmp_path / f"{os.getpid()}.json", tmp_path / "1.json")
+    # and one from a worker that has exited: its counts stay, its gauges go
+    other.write(force=True)
+    os.replace(tmp_path / f"{os.getpid()}.json", tmp_path / "999999999.json")
+
+    this = worker_registry()
+    this.metrics[0].inc(endpoint="ask")
+    this.metrics[1].observe(0.5)
+    this.metrics[2].set(0.25, phase="boot")
+
+    text = this.render()
+    assert 'test_requests_total{endpoint="ask"} 5' in text
+    assert 'test_seconds_bucket{le="0.1"} 2' in text
+    assert 'test_seconds_count 3' in text
+    assert 'test_startup_seconds{phase="boot",worker="1"} 0.5' in text
+    assert f'test_startup_seconds{{phase="boot",worker="{os.getpid()}"}} 0.25' in text
+    assert 'worker="999999999"' not in text
+    # Rendering does not fold the other workers into this one's own values
+    assert this.metrics[0].value(endpoint="ask") == 1
+
+
+def test_shared_registry_writes_at_most_once_per_interval(tmp_path):
+    registry = Registry()
+    counter = registry.register(Counter("test_requests", "Test requests."))
+    registry.share(tmp_path, interval=60)
+    path = tmp_path / f"{os.getpid()}.json"
+
+    counter.inc()
+    registry.write()
+    counter.inc()
+    registry.write()  # Within the interval: skipped
+    assert json.loads(path.read_text()) == {"test_requests": [[[], 1]]}
+
+    registry.write(force=True)  # Scrapes and worker exit do not wait
+    assert json.loads(path.read_text()) == {"test_requests": [[[], 2]]}
+
+
+def test_record_stage_collects_server_timing_inside_a_request():
+    with Flask(__name__).test_request_context():
+        record_stage("upstream", 0.25)
+        record_stage("parse", 0.0015)
+        assert server_timing_header(g.server_timing) == "upstream;dur=250.0, parse;dur=1.5"
+
+
+def test_record_prompt_tokens_compares_estimate_with_usage():
+    observed = PROMPT_ESTIMATE_RATIO.count()
+    with Flask(__name__).test_request_context():
+        record_prompt_tokens(1000, {"prompt_tokens": 1100})
+        assert g.prompt_tokens == (1000, 1100)
+        record_prompt_tokens(1000, None)
+        assert g.prompt_tokens == (1000, 0)
+    assert PROMPT_ESTIMATE_RATIO.count() == observed + 1
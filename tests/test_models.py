@@ -0,0 +1,16 @@
+# tests/test_models.py
+from mastermind.models import Query, Response, ResponseType
+
+def test_serialize_many_matches_serialize():
+    """The bulk path gives the same dictionaries as serializing row by row, response text included."""
+    response_type = ResponseType(id=1, name="Concise", prompt="Be concise.")
+    queries = [
+        Query(id=1, query_text="Housing?", response_type=response_type, response=Response(id=1, response_text="Build more.")),
+        Query(id=2, query_text="Transit?", response_type=None, response=None),
+    ]
+
+    serialized = Query.serialize_many(queries)
+    assert serialized == [query.serialize() for query in queries]
+    assert serialized[0]["response_text"] == "Build more."
+    assert serialized[0]["response_type"] == {"name": "Concise"}
+    assert serialized[1]["response_text"] is None
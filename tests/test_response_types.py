@@ -0,0 +1,21 @@
+# tests/test_response_types.py
+from mastermind.backend.response_types import response_options
+
+
+def make_config(*names):
+    return {'options': {'response': [{'name': name, 'prompt': f"{name} prompt", 'about': ''} for name in names]}}
+
+
+def test_response_options_are_indexed_by_name():
+    config = make_config('Concise', 'Detailed')
+    options = response_options(config)
+    assert list(options) == ['Concise', 'Detailed']
+    assert options['Detailed']['prompt'] == 'Detailed prompt'
+
+
+def test_response_options_rebuild_only_for_a_new_config():
+    config = make_config('Concise')
+    assert response_options(config) is response_options(config)
+
+    reloaded = make_config('Tweet')
+    assert list(response_options(reloaded)) == ['Tweet']
@@ -0,0 +1,55 @@
+# tests/test_retrieve.py
+import pytest
+from mastermind.data_manager.retrieve import chunk_document, build_index, get_index, render_chunks
+
+HOUSING = (
+    "Source: https://example.com/housing/\n"
+    "Title:  Housing\n\n"
+    "There is an affordable housing crisis in Virginia.\n\n"
+    "I co-lead the Affordable Housing Credit Improvement Act.\n\n"
+    "###\n"
+)
+TRANSPORT = (
+    "Source: https://example.com/transportation/\n"
+    "Title:  Transportation\n\n"
+    "Metro funding keeps Northern Virginia moving.\n"
+)
+
+@pytest.fixture
+def corpus():
+    """A tiny two-document corpus shaped like load_data() output."""
+    return {"issues/housing.md": HOUSING, "issues/transportation.md": TRANSPORT}
+
+def test_chunk_document_keeps_source_and_title():
+    """Every chunk carries the document's Source and Title."""
+    chunks = chunk_document("issues/housing.md", HOUSING)
+    assert len(chunks) == 2
+    assert all(chunk.source == "https://example.com/housing/" for chunk in chunks)
+    assert all(chunk.title == "Housing" for chunk in chunks)
+
+def test_search_ranks_matching_document_first(corpus):
+    """BM25 puts the chunks about the asked topic at the top."""
+    index = build_index(corpus)
+    chunk, score = index.search("What about Metro?")[0]
+    assert chunk.doc_key == "issues/transportation.md"
+    assert score > 0
+
+def test_select_respects_token_budget(corpus):
+    """Selected chunks never exceed the configured budget."""
+    index = build_index(corpus)
+    selected = index.select("housing", top_k=10, token_budget=20)
+    assert sum(chunk.tokens for chunk in selected) <= 20
+
+def test_render_context_includes_source(corpus):
+    """Rendered context keeps the Source: line for citations."""
+    index = build_index(corpus)
+    context = index.render_context("housing crisis", top_k=1, token_budget=500)
+    assert context.startswith("Source: https://example.com/housing/")
+    assert render_chunks([]) == ""
+
+def test_get_index_rebuilds_for_new_corpus(corpus):
+    """A reloaded corpus gets a new index; the same corpus reuses it."""
+    first = get_index(corpus)
+    assert get_index(corpus) is first
+    assert get_index(dict(corpus)) is not first
+    assert first.stats()["build_ms"] >= 0
@@ -0,0 +1,83 @@
+# tests/test_singleflight.py
+import asyncio
+import threading
+import time
+from mastermind.utils.singleflight import SingleFlight, AsyncSingleFlight
+
+def test_concurrent_callers_share_one_call():
+    """N simultaneous identical calls run the function once."""
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return {"answer": "shared"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["coalesced"] < 4:
+        time.sleep(0.01)
+    assert flight.stats()["waiters"] == {"key": 4}
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [result for result, _ in results] == [{"answer": "shared"}] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.stats()["in_flight"] == 0
+
+def test_errors_propagate_to_waiters():
+    """Every caller sees the leader's exception."""
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def boom():
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("key", boom)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+
+def test_sequential_calls_are_not_coalesced():
+    """Once a call finishes the next one runs afresh."""
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == (1, False)
+    assert flight.do("key", lambda: 2) == (2, False)
+
+def test_async_concurrent_callers_share_one_call():
+    """Coroutines awaiting the same key share one execution."""
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "shared"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", slow) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert {result for result, _ in results} == {"shared"}
+    assert flight.stats()["coalesced"] == 9
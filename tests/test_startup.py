@@ -0,0 +1,14 @@
+# tests/test_startup.py
+import subprocess
+import sys
+
+
+def test_import_does_not_load_config_or_corpus():
+    """Importing the app leaves config and corpus for first use or warm_up."""
+    probe = (
+        "import mastermind.backend as backend; "
+        "assert backend.config is None and backend.data is None; "
+        "backend.warm_up(); "
+        "assert backend.config and backend.data is not None"
+    )
+    subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True)
@@ -0,0 +1,79 @@
+# tests/test_write_behind.py
+import threading
+import time
+import pytest
+from mastermind.utils.write_behind import WriteBehindQueue
+
+
+@pytest.fixture
+def written():
+    """Batches handed to the flush function."""
+    return []
+
+
+def make_queue(written, **settings):
+    log = WriteBehindQueue('test', written.append)
+    log.configure({'enabled': True, 'flush_interval_ms': 10, **settings})
+    return log
+
+
+def test_disabled_queue_writes_inline(written):
+    log = WriteBehindQueue('test', written.append)
+    log.put('a')
+    assert written == [['a']]
+    assert not log.stats()['running']
+
+
+def test_items_are_batched_and_flushed_on_close(written):
+    log = make_queue(written, batch_size=50)
+    for i in range(20):
+        log.put(i)
+    log.close()
+
+    assert sorted(item for batch in written for item in batch) == list(range(20))
+    stats = log.stats()
+    assert stats['written'] == 20
+    assert stats['enqueued'] == 20
+    assert stats['depth'] == 0
+    assert not stats['running']
+
+
+def test_full_queue_writes_inline(written):
+    release = threading.Event()
+
+    def slow_flush(items):
+        if items == ['first']:
+            release.wait(5)
+        written.append(items)
+
+    log = WriteBehindQueue('test', slow_flush)
+    log.configure({'enabled': True, 'max_size': 1, 'batch_size': 1, 'flush_interval_ms': 10, 'put_timeout_ms': 10})
+    log.put('first')  # Taken by the worker, which blocks in slow_flush
+    time.sleep(0.1)
+    log.put('second')  # Fills the queue
+    log.put('third')  # Queue stays full, so the caller writes it itself
+    assert written == [['third']]
+    assert log.stats()['inline_writes'] == 1
+
+    release.set()
+    log.close()
+    assert sorted(item for batch in written for item in batch) == ['first', 'second', 'third']
+
+
+def test_failed_batch_is_retried_item_by_item(written):
+    def flaky_flush(items):
+        if len(items) > 1 or items == ['bad']:
+            raise ValueError('boom')
+        written.append(items)
+
+    log = WriteBehindQueue('test', flaky_flush)
+    log.configure({'enabled': True, 'flush_interval_ms': 10})
+    log._ensure_started()
+    for item in ('good', 'bad', 'also good'):
+        log._queue.put((time.monotonic(), item))
+    log.close()
+
+    stats = log.stats()
+    assert sorted(batch[0] for batch in written) == ['also good', 'good']
+    assert stats['dropped'] == 1
+    assert stats['failed_batches'] >= 1
@@ -8,6 +8,7 @@ import secrets
 
 from mastermind.models import db, User, UserType, UserTypeEnum
 from mastermind.utils import generate_token, send_email, logger
+from mastermind.utils.identity import identity_cache
 
 from flask_wtf.csrf import CSRFProtect
 
@@ -150,6 +151,7 @@ def delete_user(user_id):
         user = User.query.get_or_404(user_id)
         db.session.delete(user)
         db.session.commit()
+        identity_cache.invalidate(user.user_id, user.email)
         logger.info(f"User {user.email} deleted by admin {current_user.email}")
         flash('User deleted successfully.', 'success')
         return redirect(url_for('admin.list_users'))
@@ -187,6 +189,7 @@ def edit_user(user_id):
     if request.method == 'POST':
         try:
             previous_user_type = user.user_type.name  # Store previous user type
+            previous_email = user.email
 
             user.given_name = request.form.get('given_name')
             user.email = request.form.get('email')
@@ -216,6 +219,7 @@ def edit_user(user_id):
             user.user_type = user_type
 
             db.session.commit()
+            identity_cache.invalidate(user.user_id, previous_email, user.email)
 
             # Send welcome email if user is upgraded from VIEWER to USER
             if previous_user_type == UserTypeEnum.VIEWER and user.user_type.name == UserTypeEnum.USER:
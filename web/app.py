@@ -1,9 +1,10 @@
 # web/app.py
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, Response
 from mastermind.utils import logger
+from mastermind.utils.metrics import registry
+from mastermind.utils.query_stats import query_stats
+from mastermind.models import Query
 from flask_login import current_user, login_required
-from mastermind.models import Query, db
-from sqlalchemy.sql import func
 
 
 web_bp = Blueprint('web_bp', __name__)
@@ -53,13 +54,12 @@ def potus():
 def get_metrics():
     """Get and display app metrics and recent queries."""
     try:
-        total_queries = Query.query.count()
-        showcased_queries_count = Query.query.filter_by(showcase=True).count()
-        recent_queries = Query.query.order_by(Query.created_at.desc()).limit(5).all()  # Get 5 recent queries
+        # Trigger-maintained counters, cached for a few seconds
+        snapshot = query_stats.snapshot()
 
         data = {
-            "total_queries": total_queries,
-            "recent_queries": [query.serialize() for query in recent_queries]
+            "total_queries": snapshot["total_queries"],
+            "recent_queries": snapshot["recent_queries"]
         }
 
         return jsonify(data)
@@ -67,14 +67,23 @@ def get_metrics():
         logger.error(f"Error retrieving metrics and recent queries: {e}")
         return jsonify({"error": "Failed to retrieve data"}), 500
 
+@web_bp.route('/metrics/prometheus')
+def get_prometheus_metrics():
+    """Expose request, stage latency and token metrics in the Prometheus text format."""
+    try:
+        return Response(registry.render(), mimetype=None, content_type=registry.content_type)
+    except Exception as e:
+        logger.error(f"Error rendering Prometheus metrics: {e}")
+        return "An error occurred", 500
+
 @web_bp.route('/random_showcase')
 def random_showcase():
     """Get random showcased queries."""
     try:
-        showcased_queries = Query.query.filter_by(showcase=True).order_by(func.random()).limit(5).all()
+        showcased_queries = query_stats.random_showcase(5)
 
         data = {
-            "showcased_queries": [query.serialize() for query in showcased_queries]
+            "showcased_queries": Query.serialize_many(showcased_queries)
         }
 
         return jsonify(data)
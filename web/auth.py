@@ -24,6 +24,7 @@ from mastermind.models import db, User, UserType, UserTypeEnum, Organization, Qu
 from mastermind.utils.email import send_email
 from mastermind.utils.token_utils import generate_token, confirm_token
 from mastermind.utils.logging import logger
+from mastermind.utils.identity import identity_cache
 
 
 
@@ -36,7 +37,7 @@ login_manager.session_protection = 'strong'
 @login_manager.user_loader
 def load_user(user_id):
     logger.debug(f"Loading user with id: {user_id}")
-    return User.query.get(user_id)
+    return identity_cache.get(user_id)
 
 # Initialize Flask-Limiter
 limiter = Limiter(key_func=get_remote_address)
@@ -394,6 +395,7 @@ def register():
 @login_required
 @observe(name="user_profile_update")
 def profile():
+    user = current_user.record
     if request.method == 'POST':
         given_name = request.form.get('given_name')
         family_name = request.form.get('family_name')
@@ -402,10 +404,10 @@ def profile():
         notes = request.form.get('notes')
 
         # Update user profile
-        current_user.given_name = given_name
-        current_user.family_name = family_name
-        current_user.preferred_name = preferred_name
-        current_user.notes = notes
+        user.given_name = given_name
+        user.family_name = family_name
+        user.preferred_name = preferred_name
+        user.notes = notes
 
         # Handle organization creation if needed
         if organization_name:
@@ -417,9 +419,9 @@ def profile():
                 db.session.flush()  # Flush to get the new organization ID
 
             # Assign the whole object instead of just the ID
-            current_user.organization = organization
+            user.organization = organization
         else:
-            current_user.organization = None
+            user.organization = None
 
         try:
             db.session.commit()
@@ -465,8 +467,12 @@ def profile():
 
             flash('An error occurred while updating your profile.', 'danger')
 
-    user_queries = Query.query.filter_by(user_id=current_user.user_id).all()
-    return render_template('auth/profile.html', user=current_user, queries=user_queries)
+    # Only one page of history (and its responses) is loaded; older pages follow the cursor
+    try:
+        user_queries, next_cursor = Query.history_page(current_user.user_id, request.args.get('cursor'))
+    except ValueError:
+        user_queries, next_cursor = Query.history_page(current_user.user_id)
+    return render_template('auth/profile.html', user=user, queries=user_queries, next_cursor=next_cursor)
 
 @auth_bp.route('/profile/security', methods=['GET', 'POST'])
 @login_required
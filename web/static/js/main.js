@@ -96,8 +96,10 @@ document.getElementById('questionForm').onsubmit = async function(event) {
         'value': responseType
     });
 
+    const stream = document.getElementById('streamToggle')?.checked ?? false;
+
     try {
-        console.log('Sending request to /api/ask with:', { question: questionInput, response_type: responseType, userId: userId });
+        console.log('Sending request to /api/ask with:', { question: questionInput, response_type: responseType, userId: userId, stream: stream });
 
         const response = await fetch('/api/ask', {
             method: 'POST',
@@ -106,11 +108,17 @@ document.getElementById('questionForm').onsubmit = async function(event) {
                 'X-CSRFToken': csrfToken,
                 'User-ID': userId
             },
-            body: JSON.stringify({ question: questionInput, response_type: responseType })
+            body: JSON.stringify({ question: questionInput, response_type: responseType, stream: stream })
         });
 
         console.log('Received response:', response);
         console.log('Response status:', response.status);
+
+        if (stream && response.ok) {
+            await readStreamedAnswer(response, responseContainer);
+            return;
+        }
+
         const responseText = await response.text();
         console.log('Response text:', responseText);
 
@@ -118,42 +126,93 @@ document.getElementById('questionForm').onsubmit = async function(event) {
             throw new Error(`Server responded with ${response.status}: ${responseText}`);
         }
 
-        // Clear the loading indicator
-        responseContainer.innerHTML = '';
-
         const data = JSON.parse(responseText); // Manually parse JSON
-        let { answer, warning, links } = data;
-
-        if (warning) {
-            const warningElement = document.createElement('div');
-            warningElement.className = 'warning-message';
-            warningElement.innerHTML = `<strong>Note:</strong> ${warning}`;
-            responseContainer.appendChild(warningElement);
-        }
-
-        const answerElement = document.createElement('div');
-        answerElement.className = 'answer-message';
-        answerElement.innerHTML = answer.replace(/\n/g, '<br>'); // Preserve line breaks
-        responseContainer.appendChild(answerElement);
-
-        if (links && links.length > 0) {
-            const linksContainer = document.createElement('div');
-            linksContainer.className = 'links-container';
-            linksContainer.innerHTML = '<strong>Resources:</strong> ';
-            links.forEach(link => {
-                const linkElement = createLinkElement(link.url, link.text);
-                linksContainer.appendChild(linkElement);
-            });
-            responseContainer.appendChild(linksContainer);
-        }
-
-        responseContainer.style.display = 'block';
+        renderAnswer(responseContainer, data);
     } catch (error) {
         console.error('Error during fetch:', error);
         responseContainer.innerHTML = `<div class="error-message">${error.message}</div>`;
     }
 };
 
+function renderAnswer(responseContainer, data) {
+    // Clear the loading indicator or streamed preview
+    responseContainer.innerHTML = '';
+
+    let { answer, warning, links } = data;
+
+    if (warning) {
+        const warningElement = document.createElement('div');
+        warningElement.className = 'warning-message';
+        warningElement.innerHTML = `<strong>Note:</strong> ${warning}`;
+        responseContainer.appendChild(warningElement);
+    }
+
+    const answerElement = document.createElement('div');
+    answerElement.className = 'answer-message';
+    answerElement.innerHTML = answer.replace(/\n/g, '<br>'); // Preserve line breaks
+    responseContainer.appendChild(answerElement);
+
+    if (links && links.length > 0) {
+        const linksContainer = document.createElement('div');
+        linksContainer.className = 'links-container';
+        linksContainer.innerHTML = '<strong>Resources:</strong> ';
+        links.forEach(link => {
+            const linkElement = createLinkElement(link.url, link.text);
+            linksContainer.appendChild(linkElement);
+        });
+        responseContainer.appendChild(linksContainer);
+    }
+
+    responseContainer.style.display = 'block';
+}
+
+// Read server-sent events from /api/ask, showing answer tokens as they arrive
+async function readStreamedAnswer(response, responseContainer) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answerElement = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = 'message';
+            let payload = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event:')) {
+                    eventName = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    payload += line.slice(5).trim();
+                }
+            });
+            const data = payload ? JSON.parse(payload) : {};
+
+            if (eventName === 'token') {
+                if (!answerElement) {
+                    responseContainer.innerHTML = ''; // Drop the spinner on the first token
+                    answerElement = document.createElement('div');
+                    answerElement.className = 'answer-message';
+                    responseContainer.appendChild(answerElement);
+                }
+                answerElement.textContent += data.text;
+            } else if (eventName === 'done') {
+                renderAnswer(responseContainer, data);
+            } else if (eventName === 'error') {
+                console.error('Stream error:', data.error);
+            }
+        }
+    }
+}
+
 // Allow the user to submit the form by pressing Enter
 document.getElementById('questionInput').addEventListener('keypress', function(event) {
     if (event.key === 'Enter' && !event.shiftKey) {
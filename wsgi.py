@@ -0,0 +1,7 @@
+# wsgi.py
+from mastermind import begin_era
+
+# WSGI entry point for gunicorn (see gunicorn.conf.py). Built once in the
+# master with preload_app, so config, corpus and retrieval index are loaded
+# before the workers fork and their pages are shared copy-on-write.
+app = begin_era(warm=True)